@@ -1,16 +1,30 @@
-from io import BytesIO
+import os
+import tempfile
+import uuid
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
-from reportlab.pdfgen import canvas
-import qrcode
 
-from backend.db import db_session
+from backend.api.paging import list_response, page_request
+from backend.db import (
+    clear_slow_queries,
+    db_session,
+    recent_slow_queries,
+    set_slow_query_threshold,
+    slow_query_threshold_ms,
+)
 from backend.logic.auth import hash_password, require_admin
+from backend.logic.columnar import is_columnar
+from backend.logic.csv_import import ImportFileError, read_csv_upload, read_xlsx_upload, run_import
+from backend.logic.export import ParquetUnavailableError, write_logs_parquet
+from backend.logic.fuzzy import product_index
+from backend.logic.labels import LabelSelectionError, LabelsNotFoundError, fetch_selection, selection_pages
+from backend.logic.pdf import StreamingPdf, iter_pdf
+from backend.logic.product_import import ProductImporter
+from backend.profiler import MAX_PROFILE_SECONDS, ProfiledRoute, get_profile, profile_for, recent_profiles
 from backend.models.admin import (
     WorkerCreateIn,
     WorkerUpdateIn,
@@ -27,11 +41,17 @@ from backend.models.admin import (
     LocationCreateIn,
     LocationUpdateIn,
     ProductSiteLocationUpsertIn,
+    SlowQueryThresholdIn,
 )
-from backend.repo.products import list_products
+from backend.repo.locations import product_site_locations_page_sql
+from backend.repo.paging import PageRequest
+from backend.repo.products import get_product, products_page_sql
 from backend.repo.workers import list_workers
 
-router = APIRouter(prefix="/api/admin", tags=["admin"])
+router = APIRouter(prefix="/api/admin", tags=["admin"], route_class=ProfiledRoute)
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MAX_IMPORT_MB = float(os.environ.get("LAGER_MAX_IMPORT_MB") or 20)
 
 
 @router.post("/workers")
@@ -234,9 +254,24 @@ def admin_reset_worker_password(
 
 
 @router.get("/products")
-def admin_list_products(admin: dict = Depends(require_admin)) -> list[dict]:
+def admin_list_products(
+    category_id: int | None = None,
+    brand_id: int | None = None,
+    active: bool | None = None,
+    format: str | None = None,
+    page: PageRequest = Depends(page_request),
+    admin: dict = Depends(require_admin),
+) -> list[dict]:
+    columnar = is_columnar(format)
+
     with db_session() as con:
-        return list_products(con)
+        sql, params, keys = products_page_sql(
+            page,
+            category_id=category_id,
+            brand_id=brand_id,
+            active=active,
+        )
+        return list_response(con, sql, params, keys, page, columnar)
 
 
 
@@ -289,6 +324,9 @@ def admin_create_product(
         )
 
         product_id = int(cur.lastrowid)
+        product = get_product(con, product_id)
+
+    product_index.upsert(product)
 
     return {
         "ok": True,
@@ -349,9 +387,59 @@ def admin_update_product(
         if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Product not found")
 
+        product = get_product(con, product_id)
+
+    product_index.upsert(product)
+
     return {"ok": True, "message": "Product updated"}
 
 
+@router.post("/products/import")
+def admin_import_products(
+    file: UploadFile = File(...),
+    create_missing: bool = False,
+    admin: dict = Depends(require_admin),
+) -> dict:
+    # Products are matched by NC number and updated, new ones inserted.
+    # Unknown brands and categories are row errors unless create_missing.
+    name = (file.filename or "").lower()
+    is_xlsx = name.endswith(".xlsx") or file.content_type == XLSX_MEDIA_TYPE
+
+    size = file.file.seek(0, os.SEEK_END)
+    file.file.seek(0)
+    if size > MAX_IMPORT_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"Import files are limited to {MAX_IMPORT_MB:g} MB")
+
+    importer = ProductImporter(upsert=True, create_missing=create_missing)
+
+    # The file is checked as a whole before the first chunk is committed.
+    try:
+        fieldnames, rows = (read_xlsx_upload if is_xlsx else read_csv_upload)(file.file)
+    except ImportFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        with db_session() as con:
+            counts = run_import(con, f"upload:{uuid.uuid4().hex}", importer, fieldnames, rows)
+    except ImportFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        product_index.invalidate()
+
+    return {
+        "ok": True,
+        "rows": importer.row,
+        "inserted": counts["inserted"],
+        "updated": counts["updated"],
+        "unchanged": counts["unchanged"],
+        "skipped": counts["skipped"],
+        "invalid": counts["invalid"],
+        "created_brands": importer.brands.created,
+        "created_categories": importer.categories.created,
+        "errors": importer.errors,
+    }
+
+
 @router.get("/categories")
 def admin_list_categories(admin: dict = Depends(require_admin)) -> list[dict]:
     with db_session() as con:
@@ -654,27 +742,26 @@ def admin_update_location(
 
 
 @router.get("/product-site-locations")
-def admin_list_product_site_locations(admin: dict = Depends(require_admin)) -> list[dict]:
-    with db_session() as con:
-        rows = con.execute(
-            """
-            SELECT
-                psl.site_id,
-                s.name AS site_name,
-                psl.product_id,
-                p.product_name,
-                psl.location_id,
-                l.shelf,
-                l.row
-            FROM product_site_locations psl
-            JOIN sites s ON s.id = psl.site_id
-            JOIN products p ON p.id = psl.product_id
-            JOIN locations l ON l.id = psl.location_id
-            ORDER BY p.product_name, s.name
-            """
-        ).fetchall()
+def admin_list_product_site_locations(
+    site_id: int | None = None,
+    category_id: int | None = None,
+    brand_id: int | None = None,
+    active: bool | None = None,
+    format: str | None = None,
+    page: PageRequest = Depends(page_request),
+    admin: dict = Depends(require_admin),
+) -> list[dict]:
+    columnar = is_columnar(format)
 
-        return [dict(r) for r in rows]
+    with db_session() as con:
+        sql, params, keys = product_site_locations_page_sql(
+            page,
+            site_id=site_id,
+            category_id=category_id,
+            brand_id=brand_id,
+            active=active,
+        )
+        return list_response(con, sql, params, keys, page, columnar)
 
 
 @router.put("/products/{product_id}/default-location")
@@ -746,108 +833,131 @@ def admin_products_qr_pdf(
         if x.strip()
     ]
 
-    if not ids:
-        raise HTTPException(status_code=400, detail="No products selected")
-
-    placeholders = ",".join(["?"] * len(ids))
-
-    with db_session() as con:
-        site = con.execute(
-            """
-            SELECT id, name
-            FROM sites
-            WHERE id = ?
-            """,
-            (site_id,),
-        ).fetchone()
-
-        if not site:
-            raise HTTPException(status_code=404, detail="Site not found")
-
-        rows = con.execute(
-            f"""
-            SELECT
-                id,
-                product_name,
-                nc_nummer
-            FROM products
-            WHERE id IN ({placeholders})
-            ORDER BY product_name
-            """,
-            ids,
-        ).fetchall()
-
-    buffer = BytesIO()
+    try:
+        with db_session() as con:
+            site, rows = fetch_selection(con, site_id, ids)
+    except LabelsNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except LabelSelectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    page_w, page_h = A4
+    pdf = StreamingPdf(A4)
 
-    label_w = 30 * mm
-    label_h = 30 * mm
+    return StreamingResponse(
+        iter_pdf(pdf, selection_pages(pdf, site, rows)),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition":
+            'inline; filename="products_qr.pdf"'
+        },
+    )
 
-    margin_x = 15 * mm
-    margin_y = 15 * mm
 
-    gap_x = 5 * mm
-    gap_y = 5 * mm
+@router.get("/logs/export.parquet")
+def admin_export_logs_parquet(
+    site_id: int | None = None,
+    product_id: int | None = None,
+    worker_id: int | None = None,
+    action: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    admin: dict = Depends(require_admin),
+):
+    # Parquet needs a seekable sink for its footer, so the file is built in
+    # row-group chunks on disk and removed once it has been sent.
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
 
-    cols = 5
+    try:
+        with db_session() as con:
+            write_logs_parquet(
+                con,
+                path,
+                site_id=site_id,
+                product_id=product_id,
+                worker_id=worker_id,
+                action=action,
+                date_from=date_from,
+                date_to=date_to,
+            )
+    except ParquetUnavailableError as e:
+        os.unlink(path)
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception:
+        os.unlink(path)
+        raise
+
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename="logs.parquet",
+        background=BackgroundTask(os.unlink, path),
+    )
 
-    c = canvas.Canvas(buffer, pagesize=A4)
 
-    for i, row in enumerate(rows):
-        col = i % cols
-        line = i // cols
+@router.get("/slow-queries")
+def admin_list_slow_queries(admin: dict = Depends(require_admin)) -> dict:
+    return {
+        "threshold_ms": slow_query_threshold_ms(),
+        "queries": recent_slow_queries(),
+    }
 
-        x = margin_x + (label_w + gap_x) * col
-        y = page_h - margin_y - label_h - ((label_h + gap_y) * line)
 
-        payload = f"{site_id}-{row['id']}"
+@router.put("/slow-queries/threshold")
+def admin_set_slow_query_threshold(
+    payload: SlowQueryThresholdIn,
+    admin: dict = Depends(require_admin),
+) -> dict:
+    set_slow_query_threshold(payload.threshold_ms)
+    return {"ok": True, "threshold_ms": slow_query_threshold_ms()}
 
-        qr = qrcode.QRCode(border=1)
-        qr.add_data(payload)
-        qr.make(fit=True)
 
-        img = qr.make_image(
-            fill_color="black",
-            back_color="white"
-        ).get_image()
+@router.delete("/slow-queries")
+def admin_clear_slow_queries(admin: dict = Depends(require_admin)) -> dict:
+    clear_slow_queries()
+    return {"ok": True}
 
-        c.rect(x, y, label_w, label_h)
 
-        c.drawImage(
-            ImageReader(img),
-            x + 6 * mm,
-            y + 9 * mm,
-            18 * mm,
-            18 * mm,
-            mask="auto"
+@router.get("/profile")
+async def admin_profile(
+    seconds: float = 10,
+    interval_ms: float = 5,
+    include_idle: bool = False,
+    admin: dict = Depends(require_admin),
+):
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be between 0 and {MAX_PROFILE_SECONDS}",
         )
 
-        c.setFont("Helvetica-Bold", 4.7)
+    if interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1")
 
-        c.drawCentredString(
-            x + label_w / 2,
-            y + 6 * mm,
-            str(row["product_name"])[:34]
-        )
+    collapsed, samples = await profile_for(seconds, interval_ms / 1000, include_idle)
 
-        c.setFont("Helvetica", 4)
+    return PlainTextResponse(collapsed, headers={"X-Profile-Samples": str(samples)})
 
-        c.drawCentredString(
-            x + label_w / 2,
-            y + 3.8 * mm,
-            f"{site['name']} | {payload}"
-        )
 
-    c.save()
+@router.get("/profiles")
+def admin_list_profiles(admin: dict = Depends(require_admin)) -> list[dict]:
+    return [
+        {
+            "id": p.id,
+            "method": p.method,
+            "path": p.path,
+            "status": p.status,
+            "duration_ms": p.duration_ms,
+            "samples": p.samples,
+        }
+        for p in recent_profiles()
+    ]
 
-    buffer.seek(0)
 
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition":
-            'inline; filename="products_qr.pdf"'
-        },
-    )
+@router.get("/profiles/{profile_id}")
+def admin_get_profile(profile_id: str, admin: dict = Depends(require_admin)):
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return PlainTextResponse(profile.collapsed)
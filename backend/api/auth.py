@@ -9,9 +9,10 @@ from backend.logic.auth import (
     verify_password,
 )
 from backend.models.auth import ChangePasswordIn, LoginIn, LoginOut, SetPasswordIn
+from backend.profiler import ProfiledRoute
 from backend.repo.workers import get_worker_by_username
 
-router = APIRouter(prefix="/api/auth", tags=["auth"])
+router = APIRouter(prefix="/api/auth", tags=["auth"], route_class=ProfiledRoute)
 
 
 @router.post("/set-password")
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from backend.db import db_session
+from backend.logic.auth import get_current_user
+from backend.logic.export import EXPORT_MEDIA_TYPES, check_export_format, stream_export
+from backend.logic.sites import site_id_from_name
+from backend.profiler import ProfiledRoute
+from backend.repo.logs import iter_logs
+from backend.repo.stock import iter_stock
+
+router = APIRouter(prefix="/api/export", tags=["export"], route_class=ProfiledRoute)
+
+
+def export_response(fmt: str, name: str, query) -> StreamingResponse:
+    return StreamingResponse(
+        stream_export(fmt, query),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.{fmt}"',
+        },
+    )
+
+
+def resolve_site_id(site: str | None) -> int | None:
+    if not site:
+        return None
+
+    with db_session() as con:
+        return site_id_from_name(con, site)
+
+
+@router.get("/logs")
+def export_logs(
+    format: str = "csv",
+    site: str | None = None,
+    product_id: int | None = None,
+    worker_id: int | None = None,
+    action: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    current_user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    fmt = check_export_format(format)
+
+    if action and action not in {"load", "take"}:
+        raise HTTPException(status_code=400, detail="Invalid action")
+
+    site_id = resolve_site_id(site)
+
+    def query(con):
+        return iter_logs(
+            con,
+            site_id=site_id,
+            product_id=product_id,
+            worker_id=worker_id,
+            action=action,
+            date_from=date_from,
+            date_to=date_to,
+        )
+
+    return export_response(fmt, "logs", query)
+
+
+@router.get("/stock")
+def export_stock(
+    format: str = "csv",
+    site: str | None = None,
+    current_user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    fmt = check_export_format(format)
+    site_id = resolve_site_id(site)
+
+    def query(con):
+        return iter_stock(con, site_id=site_id)
+
+    return export_response(fmt, "stock", query)
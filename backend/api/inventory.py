@@ -1,16 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
 
+from backend.api.paging import list_response, page_request
+from backend.api.responses import FastJSONResponse
 from backend.db import db_session
 from backend.logic.auth import get_current_user
+from backend.logic.columnar import is_columnar, to_columnar
+from backend.logic.fuzzy import product_index
 from backend.logic.sites import site_id_from_name
 from backend.logic.stock import act
 from backend.models.inventory import ActionIn, ProductLocationIn
-from backend.repo.logs import list_logs
-from backend.repo.products import list_products
-from backend.repo.stock import list_stock_combined, list_stock_for_site
+from backend.profiler import ProfiledRoute
+from backend.repo.logs import logs_json, query_logs
+from backend.repo.paging import PageRequest
+from backend.repo.products import list_products_by_ids, products_page_sql, search_products
+from backend.repo.stock import query_stock, stock_json, stock_page_sql
 from backend.repo.workers import list_workers
 
-router = APIRouter(prefix="/api", tags=["inventory"])
+router = APIRouter(prefix="/api", tags=["inventory"], route_class=ProfiledRoute)
 
 
 @router.get("/resolve")
@@ -119,8 +125,11 @@ def resolve(code: str, current_user: dict = Depends(get_current_user)) -> dict:
 def api_logs(
     limit: int = 50,
     offset: int = 0,
+    format: str | None = None,
     current_user: dict = Depends(get_current_user),
 ) -> list[dict]:
+    columnar = is_columnar(format)
+
     if limit < 1:
         limit = 1
     if limit > 200:
@@ -129,13 +138,22 @@ def api_logs(
         offset = 0
 
     with db_session() as con:
-        return list_logs(con, limit=limit, offset=offset)
+        if columnar:
+            return FastJSONResponse(to_columnar(query_logs(con, limit=limit, offset=offset)))
+        return FastJSONResponse(logs_json(con, limit=limit, offset=offset))
 
 
 @router.get("/stock/combined")
-def api_stock_combined(current_user: dict = Depends(get_current_user)) -> list[dict]:
+def api_stock_combined(
+    format: str | None = None,
+    current_user: dict = Depends(get_current_user),
+) -> list[dict]:
+    columnar = is_columnar(format)
+
     with db_session() as con:
-        return list_stock_combined(con)
+        if columnar:
+            return FastJSONResponse(to_columnar(query_stock(con)))
+        return FastJSONResponse(stock_json(con))
 
 
 @router.get("/{site}/products/{product_id}/resolve")
@@ -229,17 +247,98 @@ def api_workers(site: str, current_user: dict = Depends(get_current_user)) -> li
 
 
 @router.get("/{site}/products")
-def api_products(site: str, current_user: dict = Depends(get_current_user)) -> list[dict]:
+def api_products(
+    site: str,
+    category_id: int | None = None,
+    brand_id: int | None = None,
+    active: bool | None = None,
+    format: str | None = None,
+    page: PageRequest = Depends(page_request),
+    current_user: dict = Depends(get_current_user),
+) -> list[dict]:
+    columnar = is_columnar(format)
+
+    with db_session() as con:
+        site_id_from_name(con, site)
+        sql, params, keys = products_page_sql(
+            page,
+            category_id=category_id,
+            brand_id=brand_id,
+            active=active,
+        )
+        return list_response(con, sql, params, keys, page, columnar)
+
+
+@router.get("/{site}/products/search")
+def api_search_products(
+    site: str,
+    q: str,
+    limit: int = 20,
+    current_user: dict = Depends(get_current_user),
+) -> list[dict]:
+    if limit < 1:
+        limit = 1
+    if limit > 100:
+        limit = 100
+
     with db_session() as con:
         site_id_from_name(con, site)
-        return list_products(con)
+        return search_products(con, q, limit=limit)
+
+
+@router.get("/{site}/products/fuzzy")
+def api_fuzzy_products(
+    site: str,
+    q: str,
+    limit: int = 20,
+    current_user: dict = Depends(get_current_user),
+) -> list[dict]:
+    if limit < 1:
+        limit = 1
+    if limit > 100:
+        limit = 100
+
+    with db_session() as con:
+        site_id_from_name(con, site)
+
+    matches = product_index.search(q, limit=limit)
+    scores = dict(matches)
+
+    with db_session() as con:
+        products = list_products_by_ids(con, [product_id for product_id, _ in matches])
+
+    for p in products:
+        p["score"] = scores[p["id"]]
+
+    return products
 
 
 @router.get("/{site}/stock")
-def api_stock(site: str, current_user: dict = Depends(get_current_user)) -> list[dict]:
+def api_stock(
+    site: str,
+    category_id: int | None = None,
+    brand_id: int | None = None,
+    has_location: bool | None = None,
+    min_quantity: int | None = None,
+    max_quantity: int | None = None,
+    format: str | None = None,
+    page: PageRequest = Depends(page_request),
+    current_user: dict = Depends(get_current_user),
+) -> list[dict]:
+    columnar = is_columnar(format)
+
     with db_session() as con:
         site_id = site_id_from_name(con, site)
-        return list_stock_for_site(con, site_id)
+        sql, params, keys = stock_page_sql(
+            site_id,
+            page,
+            category_id=category_id,
+            brand_id=brand_id,
+            has_location=has_location,
+            min_quantity=min_quantity,
+            max_quantity=max_quantity,
+        )
+        return list_response(con, sql, params, keys, page, columnar)
 
 
 @router.get("/{site}/locations")
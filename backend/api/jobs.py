@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from backend.db import db_session
+from backend.jobs import get_job, job_artifact, list_jobs, queue
+from backend.logic.auth import require_admin
+from backend.logic.labels import LabelSelectionError, LabelsNotFoundError, check_site_labels, fetch_selection
+from backend.models.admin import LabelsJobIn, LogsExportJobIn, SiteLabelsJobIn
+from backend.profiler import ProfiledRoute
+
+# Registers the job kinds.
+import backend.logic.export  # noqa: F401
+
+router = APIRouter(prefix="/api/admin/jobs", tags=["jobs"], route_class=ProfiledRoute)
+
+
+def submit(kind: str, payload: BaseModel, admin: dict) -> dict:
+    return queue.submit(kind, payload.model_dump(), created_by=admin["id"])
+
+
+def check_labels(check) -> None:
+    # A selection that cannot be printed is rejected here rather than
+    # queued as a job that fails.
+    try:
+        with db_session() as con:
+            check(con)
+    except LabelsNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except LabelSelectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/labels", status_code=202)
+def submit_labels_job(payload: LabelsJobIn, admin: dict = Depends(require_admin)) -> dict:
+    check_labels(lambda con: fetch_selection(con, payload.site_id, payload.product_ids))
+    return submit("labels", payload, admin)
+
+
+@router.post("/site-labels", status_code=202)
+def submit_site_labels_job(payload: SiteLabelsJobIn, admin: dict = Depends(require_admin)) -> dict:
+    check_labels(lambda con: check_site_labels(con, payload.site_id))
+    return submit("site_labels", payload, admin)
+
+
+@router.post("/logs-export", status_code=202)
+def submit_logs_export_job(payload: LogsExportJobIn, admin: dict = Depends(require_admin)) -> dict:
+    return submit("logs_export", payload, admin)
+
+
+@router.get("")
+def admin_list_jobs(limit: int = 50, admin: dict = Depends(require_admin)) -> list[dict]:
+    return list_jobs(max(1, min(limit, 500)))
+
+
+@router.get("/{job_id}")
+def admin_get_job(job_id: str, admin: dict = Depends(require_admin)) -> dict:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/artifact")
+def admin_job_artifact(job_id: str, admin: dict = Depends(require_admin)) -> FileResponse:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+    artifact = job_artifact(job_id)
+    if artifact is None:
+        raise HTTPException(status_code=410, detail="Job result has expired")
+
+    path, filename, media_type = artifact
+    return FileResponse(path, media_type=media_type, filename=filename)
+
+
+@router.delete("/{job_id}")
+def admin_cancel_job(job_id: str, admin: dict = Depends(require_admin)) -> dict:
+    # Cancels a queued or running job; a finished one is removed together
+    # with its result.
+    if queue.cancel(job_id):
+        return {"ok": True, "message": "Job cancelled"}
+    if queue.delete(job_id):
+        return {"ok": True, "message": "Job deleted"}
+    raise HTTPException(status_code=404, detail="Job not found")
@@ -1,29 +1,33 @@
-from pathlib import Path
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
 
-from fastapi import APIRouter
-from fastapi.responses import FileResponse
+from backend.metrics import render_metrics
+from backend.profiler import ProfiledRoute
+from backend.static import asset_response, html_page
 
-router = APIRouter()
-
-BASE_DIR = Path(__file__).resolve().parents[2]
-FRONTEND_DIR = BASE_DIR / "frontend"
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.get("/")
-def serve_index():
-    return FileResponse(FRONTEND_DIR / "index.html")
+def serve_index(request: Request) -> Response:
+    return asset_response(html_page("index.html"), request.scope)
 
 
 @router.get("/lager")
-def serve_lager():
-    return FileResponse(FRONTEND_DIR / "lager.html")
+def serve_lager(request: Request) -> Response:
+    return asset_response(html_page("lager.html"), request.scope)
 
 
 @router.get("/admin")
-def serve_admin():
-    return FileResponse(FRONTEND_DIR / "admin.html")
+def serve_admin(request: Request) -> Response:
+    return asset_response(html_page("admin.html"), request.scope)
 
 
 @router.get("/health")
 def health() -> dict:
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@router.get("/metrics")
+def metrics() -> Response:
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
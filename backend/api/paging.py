@@ -0,0 +1,61 @@
+import sqlite3
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from backend.api.responses import FastJSONResponse
+from backend.db import rows_json
+from backend.logic.columnar import rows_to_columnar, to_columnar
+from backend.repo.paging import InvalidPageError, PageRequest, SortKey, next_cursor, output_order
+
+MAX_PAGE_SIZE = 1000
+
+
+def page_request(
+    limit: int | None = None,
+    cursor: str | None = None,
+    sort: str | None = None,
+    order: str = "asc",
+) -> PageRequest:
+    if limit is not None:
+        limit = min(max(limit, 1), MAX_PAGE_SIZE)
+
+    order = order.strip().lower()
+    if order not in {"asc", "desc"}:
+        raise HTTPException(status_code=400, detail="Order must be asc or desc")
+
+    return PageRequest(limit=limit, cursor=cursor or None, sort=sort or None, desc=order == "desc")
+
+
+def list_response(
+    con: sqlite3.Connection,
+    sql: str,
+    params: list,
+    keys: list[SortKey],
+    page: PageRequest,
+    columnar: bool = False,
+) -> FastJSONResponse:
+    # Without a limit the full list goes through the bulk JSON paths; pages
+    # are small, so they are fetched as rows to compute the next cursor.
+    if page.limit is None:
+        if columnar:
+            return FastJSONResponse(to_columnar(con.execute(sql, params)))
+        return FastJSONResponse(rows_json(con, sql, params, output_order(keys, page.desc)))
+
+    cur = con.execute(sql, params)
+    rows = cur.fetchall()
+
+    headers = {}
+    cursor = next_cursor(rows, keys, page.limit)
+    if cursor:
+        headers["X-Next-Cursor"] = cursor
+
+    if columnar:
+        columns = [d[0] for d in cur.description]
+        return FastJSONResponse(rows_to_columnar(columns, rows), headers=headers)
+
+    return FastJSONResponse([dict(r) for r in rows], headers=headers)
+
+
+async def invalid_page_handler(request: Request, exc: InvalidPageError) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
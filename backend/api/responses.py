@@ -0,0 +1,42 @@
+import json
+import sqlite3
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# orjson is in the Pipfile; the fallback is for development environments
+# installed without it.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # Pre-encoded bodies from backend.db.rows_json pass straight through.
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+async def database_busy_handler(request: Request, exc: sqlite3.OperationalError) -> Response:
+    # Another writer held the lock for longer than the connection timeout.
+    # Clients may retry; any other OperationalError stays a 500.
+    if "locked" not in str(exc) and "busy" not in str(exc):
+        raise exc
+
+    return FastJSONResponse(
+        {"detail": "Database is busy, please retry"},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
@@ -1,16 +1,29 @@
 from __future__ import annotations
 
+import logging
+import os
+import re
 import sqlite3
+import time
+from collections import deque
 from contextlib import contextmanager
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterator
 
+from backend.metrics import current_request, observe_statement, route_label, statement_kind
 
 ROOT = Path(__file__).resolve().parents[1]
-DB_PATH = ROOT / "db" / "Lager_live.db"
+DB_PATH = Path(os.environ.get("LAGER_DB_PATH") or ROOT / "db" / "Lager_live.db")
 SCHEMA_PATH = ROOT / "backend" / "schema.sql"
 
+SLOW_QUERY_MS = float(os.environ.get("LAGER_SLOW_QUERY_MS") or 200)
+SLOW_QUERY_LOG_SIZE = 200
+EXPLAINABLE = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE"}
+
+logger = logging.getLogger(__name__)
+
 
 class DbConfigError(RuntimeError):
     pass
@@ -30,7 +43,188 @@ class DbConfig:
     schema_path: Path = SCHEMA_PATH
 
 
-def get_conn(cfg: DbConfig = DbConfig()) -> sqlite3.Connection:
+_slow_query_seconds = SLOW_QUERY_MS / 1000
+_slow_queries: deque[dict] = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+
+def slow_query_threshold_ms() -> float:
+    return _slow_query_seconds * 1000
+
+
+def set_slow_query_threshold(ms: float) -> None:
+    global _slow_query_seconds
+    _slow_query_seconds = ms / 1000
+
+
+def recent_slow_queries() -> list[dict]:
+    return list(reversed(_slow_queries))
+
+
+def clear_slow_queries() -> None:
+    _slow_queries.clear()
+
+
+def params_shape(params) -> list[str] | dict[str, str]:
+    # Only types are kept: parameters can hold password hashes or names.
+    if isinstance(params, dict):
+        return {k: type(v).__name__ for k, v in params.items()}
+    return [type(v).__name__ for v in params]
+
+
+def query_plan(con: sqlite3.Connection, sql: str, params) -> list[str] | None:
+    if statement_kind(sql) not in EXPLAINABLE:
+        return None
+
+    try:
+        cur = sqlite3.Cursor(con)
+        rows = cur.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except (sqlite3.Error, ValueError):
+        return None
+    return [row[3] for row in rows]
+
+
+def record_slow_query(con: sqlite3.Connection, sql: str, params, seconds: float, rows: int) -> None:
+    stats = current_request.get()
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "route": route_label(stats.scope if stats else None),
+        "duration_ms": round(seconds * 1000, 1),
+        "rows": rows,
+        "sql": re.sub(r"\s+", " ", sql).strip(),
+        "params": params_shape(params) if params is not None else None,
+        "plan": query_plan(con, sql, params) if params is not None else None,
+    }
+    _slow_queries.append(entry)
+
+    logger.warning(
+        "slow query %.1f ms, %d rows, %s: %s | plan: %s",
+        entry["duration_ms"],
+        rows,
+        entry["route"],
+        entry["sql"][:500],
+        "; ".join(entry["plan"] or ()),
+    )
+
+
+class TimedCursor(sqlite3.Cursor):
+    # A statement is timed from execute until its rows are exhausted, the
+    # cursor is reused or closed, or (for single-row lookups) the cursor is
+    # dropped, and then reported to backend.metrics.
+    _sql: str | None = None
+    _params = None
+    _seconds = 0.0
+    _rows = 0
+
+    def _start(self, sql: str, params) -> None:
+        self._finish()
+        self._sql, self._params, self._seconds, self._rows = sql, params, 0.0, 0
+
+    def _finish(self) -> None:
+        if self._sql is None:
+            return
+
+        sql, self._sql = self._sql, None
+        observe_statement(sql, self._seconds, self._rows)
+
+        if self._seconds >= _slow_query_seconds:
+            record_slow_query(self.connection, sql, self._params, self._seconds, self._rows)
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._seconds += time.perf_counter() - start
+
+    def execute(self, sql: str, parameters=()) -> TimedCursor:
+        self._start(sql, parameters)
+        self._timed(super().execute, sql, parameters)
+
+        if self.description is None:
+            self._rows = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters) -> TimedCursor:
+        # No single parameter set to explain; the plan is left out.
+        self._start(sql, None)
+        try:
+            self._timed(super().executemany, sql, seq_of_parameters)
+            self._rows = max(self.rowcount, 0)
+        finally:
+            self._finish()
+        return self
+
+    def executescript(self, sql_script: str) -> TimedCursor:
+        self._start("SCRIPT", None)
+        try:
+            self._timed(super().executescript, sql_script)
+        finally:
+            self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list:
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        self._rows += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self) -> list:
+        rows = self._timed(super().fetchall)
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        self._rows += 1
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        self._finish()
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters=()) -> TimedCursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> TimedCursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str) -> TimedCursor:
+        return self.cursor().executescript(sql_script)
+
+
+# Called with every new connection, e.g. to install a trace callback.
+_connection_hooks: list[Callable[[sqlite3.Connection], None]] = []
+
+
+def add_connection_hook(hook: Callable[[sqlite3.Connection], None]) -> None:
+    _connection_hooks.append(hook)
+
+
+def get_conn(cfg: DbConfig = DbConfig(), check_same_thread: bool = True) -> sqlite3.Connection:
     db_dir = cfg.db_path.parent
 
     if not db_dir.exists():
@@ -40,19 +234,31 @@ def get_conn(cfg: DbConfig = DbConfig()) -> sqlite3.Connection:
         raise DbConfigError(f"DB path is not a file: {cfg.db_path}")
 
     try:
-        con = sqlite3.connect(str(cfg.db_path), timeout=10)
+        con = sqlite3.connect(
+            str(cfg.db_path),
+            timeout=10,
+            check_same_thread=check_same_thread,
+            factory=TimedConnection,
+        )
         con.row_factory = sqlite3.Row
         con.execute("PRAGMA foreign_keys = ON;")
         con.execute("PRAGMA journal_mode = WAL;")
         con.execute("PRAGMA synchronous = NORMAL;")
+        for hook in _connection_hooks:
+            hook(con)
         return con
     except sqlite3.Error as e:
         raise DbConnectionError(f"Cannot open sqlite DB: {cfg.db_path}") from e
 
 
 @contextmanager
-def db_session(cfg: DbConfig = DbConfig()) -> Iterator[sqlite3.Connection]:
-    con = get_conn(cfg)
+def db_session(
+    cfg: DbConfig = DbConfig(),
+    check_same_thread: bool = True,
+) -> Iterator[sqlite3.Connection]:
+    # Streaming responses resume their generator on arbitrary threadpool
+    # threads, so they open their session with check_same_thread=False.
+    con = get_conn(cfg, check_same_thread=check_same_thread)
     try:
         yield con
         con.commit()
@@ -63,6 +269,50 @@ def db_session(cfg: DbConfig = DbConfig()) -> Iterator[sqlite3.Connection]:
         con.close()
 
 
+def iter_chunks(cur: sqlite3.Cursor, chunk_size: int = 500) -> Iterator[list[sqlite3.Row]]:
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+_json_columns: dict[str, list[str]] = {}
+
+# ORDER BY inside an aggregate needs SQLite 3.44 or newer.
+ORDERED_AGGREGATES = sqlite3.sqlite_version_info >= (3, 44, 0)
+
+
+def rows_json(
+    con: sqlite3.Connection,
+    sql: str,
+    params: tuple | list = (),
+    order_by: str = "",
+) -> bytes:
+    # SQLite builds the JSON array itself, so large lists never become
+    # sqlite3.Row objects or dicts on the Python side. json_group_array
+    # does not keep the order of its subquery, so order_by repeats it over
+    # the output columns, written as q."name".
+    columns = _json_columns.get(sql)
+    if columns is None:
+        cur = con.execute(f"SELECT * FROM ({sql}) LIMIT 0", params)
+        columns = _json_columns[sql] = [d[0] for d in cur.description]
+
+    pairs = ", ".join(f"'{name}', q.\"{name}\"" for name in columns)
+    order = f" ORDER BY {order_by}" if order_by else ""
+
+    if ORDERED_AGGREGATES:
+        row = con.execute(
+            f"SELECT json_group_array(json_object({pairs}){order}) FROM ({sql}) AS q",
+            params,
+        ).fetchone()
+        return row[0].encode("utf-8")
+
+    # Older SQLite: one JSON object per row, joined here.
+    cur = con.execute(f"SELECT json_object({pairs}) FROM ({sql}) AS q{order}", params)
+    return ("[" + ",".join(r[0] for r in cur) + "]").encode("utf-8")
+
+
 def init_db(cfg: DbConfig = DbConfig()) -> None:
     if not cfg.schema_path.exists():
         raise DbSchemaError(f"schema.sql missing: {cfg.schema_path}")
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from backend.db import DB_PATH, db_session
+
+JOBS_DIR = Path(os.environ.get("LAGER_JOBS_DIR") or DB_PATH.parent / "jobs")
+JOB_WORKERS = int(os.environ.get("LAGER_JOB_WORKERS") or 2)
+JOB_RETENTION_HOURS = float(os.environ.get("LAGER_JOB_RETENTION_HOURS") or 24)
+
+# A running job writes a heartbeat with every progress update. Jobs whose
+# process died (restart, crash) stop doing so and are failed after this.
+STALE_SECONDS = 120
+HEARTBEAT_SECONDS = 1.0
+
+ACTIVE = ("queued", "running")
+
+# Created on start, unlike the rest of schema.sql: applying the whole schema
+# backfills indexes under a write lock, which stays an explicit step
+# (python -m backend.seed). Artifacts are files named after the job id.
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+  id TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'queued'
+    CHECK (status IN ('queued','running','done','failed','cancelled')),
+  params TEXT NOT NULL,
+  progress REAL NOT NULL DEFAULT 0,
+  error TEXT,
+  filename TEXT,
+  media_type TEXT,
+  created_by INTEGER,
+  created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  started_at TEXT,
+  heartbeat_at TEXT,
+  finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, finished_at);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class JobArtifact:
+    filename: str
+    media_type: str
+
+
+class JobContext:
+    def __init__(self, job_id: str, params: dict, path: Path) -> None:
+        self.id = job_id
+        self.params = params
+        self.path = path
+        self._last_beat = 0.0
+
+    def progress(self, done: int, total: int | None = None) -> None:
+        # Also the cancellation point: a DELETE on any uvicorn worker sets
+        # the status in SQLite, and the job stops at its next update.
+        now = time.monotonic()
+        if now - self._last_beat < HEARTBEAT_SECONDS and (total is None or done < total):
+            return
+        self._last_beat = now
+
+        value = min(1.0, done / total) if total else None
+        with db_session() as con:
+            row = con.execute(
+                """
+                UPDATE jobs
+                SET progress = COALESCE(?, progress), heartbeat_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'running'
+                RETURNING id
+                """,
+                (value, self.id),
+            ).fetchone()
+
+        if row is None:
+            raise JobCancelled(self.id)
+
+
+JobHandler = Callable[[JobContext], JobArtifact]
+
+_kinds: dict[str, JobHandler] = {}
+
+
+def job_kind(name: str) -> Callable[[JobHandler], JobHandler]:
+    def register(handler: JobHandler) -> JobHandler:
+        _kinds[name] = handler
+        return handler
+
+    return register
+
+
+def artifact_path(job_id: str) -> Path:
+    return JOBS_DIR / job_id
+
+
+def job_json(row) -> dict:
+    return {
+        "id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "params": json.loads(row["params"]),
+        "progress": row["progress"],
+        "error": row["error"],
+        "filename": row["filename"],
+        "created_by": row["created_by"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+    }
+
+
+def get_job(job_id: str) -> dict | None:
+    with db_session() as con:
+        row = con.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return job_json(row) if row else None
+
+
+def list_jobs(limit: int = 50) -> list[dict]:
+    with db_session() as con:
+        rows = con.execute(
+            "SELECT * FROM jobs ORDER BY created_at DESC, rowid DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    return [job_json(r) for r in rows]
+
+
+def job_artifact(job_id: str) -> tuple[Path, str, str] | None:
+    with db_session() as con:
+        row = con.execute(
+            "SELECT filename, media_type FROM jobs WHERE id = ? AND status = 'done'",
+            (job_id,),
+        ).fetchone()
+
+    if row is None or not artifact_path(job_id).exists():
+        return None
+    return artifact_path(job_id), row["filename"], row["media_type"]
+
+
+class JobQueue:
+    # Runs jobs on a small thread pool inside the server process. State
+    # lives in the jobs table, so status, downloads and cancellation work
+    # from every uvicorn worker and survive restarts.
+
+    def __init__(self, workers: int = JOB_WORKERS) -> None:
+        self.workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        JOBS_DIR.mkdir(parents=True, exist_ok=True)
+        with db_session() as con:
+            con.executescript(JOBS_SCHEMA)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="job")
+
+        self.cleanup()
+
+        # Jobs submitted before a restart are picked up again.
+        with db_session() as con:
+            queued = [r["id"] for r in con.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY rowid")]
+        for job_id in queued:
+            self._executor.submit(self._run, job_id)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, kind: str, params: dict, created_by: int | None = None) -> dict:
+        if kind not in _kinds:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._executor is None:
+            self.start()
+        else:
+            self.cleanup()
+
+        job_id = uuid.uuid4().hex
+        with db_session() as con:
+            con.execute(
+                "INSERT INTO jobs(id, kind, params, created_by) VALUES (?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params), created_by),
+            )
+
+        self._executor.submit(self._run, job_id)
+        return get_job(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        with db_session() as con:
+            cur = con.execute(
+                """
+                UPDATE jobs
+                SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status IN (?, ?)
+                """,
+                (job_id, *ACTIVE),
+            )
+        return cur.rowcount == 1
+
+    def delete(self, job_id: str) -> bool:
+        with db_session() as con:
+            cur = con.execute(
+                "DELETE FROM jobs WHERE id = ? AND status NOT IN (?, ?)",
+                (job_id, *ACTIVE),
+            )
+        artifact_path(job_id).unlink(missing_ok=True)
+        return cur.rowcount == 1
+
+    def cleanup(self) -> None:
+        with db_session() as con:
+            con.execute(
+                f"""
+                UPDATE jobs
+                SET status = 'failed', error = 'Worker stopped', finished_at = CURRENT_TIMESTAMP
+                WHERE status = 'running'
+                  AND heartbeat_at < datetime('now', '-{STALE_SECONDS} seconds')
+                """
+            )
+            expired = [
+                r["id"]
+                for r in con.execute(
+                    """
+                    DELETE FROM jobs
+                    WHERE status NOT IN (?, ?)
+                      AND finished_at < datetime('now', ?)
+                    RETURNING id
+                    """,
+                    (*ACTIVE, f"-{JOB_RETENTION_HOURS * 3600:.0f} seconds"),
+                )
+            ]
+
+        for job_id in expired:
+            artifact_path(job_id).unlink(missing_ok=True)
+
+    def _run(self, job_id: str) -> None:
+        with db_session() as con:
+            row = con.execute(
+                """
+                UPDATE jobs
+                SET status = 'running', started_at = CURRENT_TIMESTAMP, heartbeat_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'queued'
+                RETURNING kind, params
+                """,
+                (job_id,),
+            ).fetchone()
+
+        # Cancelled while queued, or already claimed by another worker.
+        if row is None:
+            return
+
+        path = artifact_path(job_id)
+        ctx = JobContext(job_id, json.loads(row["params"]), path)
+
+        try:
+            artifact = _kinds[row["kind"]](ctx)
+        except JobCancelled:
+            path.unlink(missing_ok=True)
+            return
+        except Exception as e:
+            path.unlink(missing_ok=True)
+            logger.exception("job %s (%s) failed", job_id, row["kind"])
+            self._finish(job_id, "failed", error=str(e))
+            return
+
+        self._finish(job_id, "done", artifact=artifact)
+
+    def _finish(self, job_id: str, status: str, artifact: JobArtifact | None = None, error: str | None = None) -> None:
+        with db_session() as con:
+            cur = con.execute(
+                """
+                UPDATE jobs
+                SET status = ?, progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END,
+                    filename = ?, media_type = ?, error = ?, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = 'running'
+                """,
+                (
+                    status,
+                    status,
+                    artifact.filename if artifact else None,
+                    artifact.media_type if artifact else None,
+                    error,
+                    job_id,
+                ),
+            )
+
+        # Cancelled after the last progress update: drop the result.
+        if cur.rowcount == 0:
+            artifact_path(job_id).unlink(missing_ok=True)
+
+
+queue = JobQueue()
@@ -0,0 +1,59 @@
+import sqlite3
+
+from fastapi import HTTPException
+
+# Text columns that repeat across many rows of the list endpoints. They are
+# sent once in "dictionaries" and referenced by index in "rows".
+DICTIONARY_COLUMNS = {
+    "action",
+    "category_name",
+    "brand_name",
+    "site_name",
+    "first_name",
+    "last_name",
+    "username",
+}
+
+
+def is_columnar(fmt: str | None) -> bool:
+    fmt = (fmt or "").strip().lower()
+
+    if fmt in {"", "rows"}:
+        return False
+
+    if fmt != "columnar":
+        raise HTTPException(status_code=400, detail="Format must be rows or columnar")
+
+    return True
+
+
+def rows_to_columnar(columns: list[str], rows) -> dict:
+    encoded = [i for i, name in enumerate(columns) if name in DICTIONARY_COLUMNS]
+    lookups: dict[int, dict] = {i: {} for i in encoded}
+
+    out = []
+    for r in rows:
+        row = list(r)
+
+        for i in encoded:
+            value = row[i]
+            if value is None:
+                continue
+
+            lookup = lookups[i]
+            index = lookup.get(value)
+            if index is None:
+                index = lookup[value] = len(lookup)
+            row[i] = index
+
+        out.append(row)
+
+    return {
+        "columns": columns,
+        "dictionaries": {columns[i]: list(lookups[i]) for i in encoded},
+        "rows": out,
+    }
+
+
+def to_columnar(cur: sqlite3.Cursor) -> dict:
+    return rows_to_columnar([d[0] for d in cur.description], cur)
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+import sqlite3
+import time
+import zipfile
+from collections import Counter
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from openpyxl import load_workbook
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# (rows done, bytes read, file size, rows per second)
+ProgressCallback = Callable[[int, int, int, float], None]
+
+
+class ImportFileError(ValueError):
+    # The file as a whole cannot be imported, e.g. a missing column.
+    pass
+
+
+class SourceRow(dict):
+    # A data row keyed by the header, with its row number in the file (the
+    # header is row 1), so errors point at the row an admin has to fix.
+
+    def __init__(self, line: int, values: Iterable[tuple[str, str]]) -> None:
+        super().__init__(values)
+        self.line = line
+
+
+def numbered_rows(reader, fieldnames: list[str], lines_before: int) -> Iterator[SourceRow]:
+    # A record starts on the line after the previous one ended; blank lines
+    # are skipped but still counted.
+    end = 0
+    for values in reader:
+        start, end = end + 1, reader.line_num
+        if values:
+            yield SourceRow(lines_before + start, zip(fieldnames, values))
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    offset: int
+    rows: int
+    counts: dict[str, int]
+
+
+class ImportRun:
+    def __init__(self, con: sqlite3.Connection, source: str) -> None:
+        self.con = con
+        self.source = source
+
+    def mark(self, key: str, value: str | None = None) -> bool:
+        # Remembers a key for the rest of the import, resumed runs included.
+        # False if it was marked before, e.g. a duplicate row in the file.
+        cur = self.con.execute(
+            "INSERT OR IGNORE INTO import_keys(source, key, value) VALUES (?, ?, ?)",
+            (self.source, key, value),
+        )
+        return cur.rowcount == 1
+
+
+class CsvImporter:
+    # One kind of import. start() sees the header once per run, chunk()
+    # writes a list of rows inside that chunk's transaction, finish() runs in
+    # the last one. All three return nothing or counters that are added up.
+    # Work that needs every row of the file, like deactivating what is
+    # missing from it, uses ImportRun.mark() instead of keeping rows around.
+
+    def start(self, run: ImportRun, fieldnames: list[str]) -> None:
+        pass
+
+    def chunk(self, run: ImportRun, rows: list[SourceRow]) -> Counter:
+        raise NotImplementedError
+
+    def finish(self, run: ImportRun) -> Counter:
+        return Counter()
+
+
+class _Lines:
+    # Decoded lines of a binary file. csv.reader pulls exactly the lines of
+    # each record, so after every record `offset` is where the next starts.
+
+    def __init__(self, f: BinaryIO) -> None:
+        self.f = f
+        self.offset = f.tell()
+
+    def seek(self, offset: int) -> None:
+        self.f.seek(offset)
+        self.offset = offset
+
+    def __iter__(self) -> _Lines:
+        return self
+
+    def __next__(self) -> str:
+        raw = self.f.readline()
+        if not raw:
+            raise StopIteration
+        self.offset += len(raw)
+        return raw.decode("utf-8")
+
+
+def count_lines(f: BinaryIO, offset: int) -> int:
+    # Lines before offset, read in blocks so memory stays flat.
+    f.seek(0)
+    lines = 0
+    while offset > 0:
+        block = f.read(min(offset, 1 << 20))
+        if not block:
+            break
+        lines += block.count(b"\n")
+        offset -= len(block)
+    return lines
+
+
+def file_signature(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def load_checkpoint(con: sqlite3.Connection, source: str, signature: str) -> Checkpoint | None:
+    row = con.execute(
+        """
+        SELECT signature, offset, rows, counts
+        FROM import_checkpoints
+        WHERE source = ?
+        """,
+        (source,),
+    ).fetchone()
+
+    # A file that changed since the checkpoint is imported from the start.
+    if row is None or row["signature"] != signature:
+        return None
+    return Checkpoint(int(row["offset"]), int(row["rows"]), json.loads(row["counts"]))
+
+
+def save_checkpoint(con: sqlite3.Connection, source: str, signature: str, offset: int, rows: int, counts: Counter) -> None:
+    con.execute(
+        """
+        INSERT INTO import_checkpoints(source, signature, offset, rows, counts, updated_at)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(source) DO UPDATE SET
+            signature = excluded.signature,
+            offset = excluded.offset,
+            rows = excluded.rows,
+            counts = excluded.counts,
+            updated_at = excluded.updated_at
+        """,
+        (source, signature, offset, rows, json.dumps(counts)),
+    )
+
+
+def clear_checkpoint(con: sqlite3.Connection, source: str) -> None:
+    con.execute("DELETE FROM import_checkpoints WHERE source = ?", (source,))
+    con.execute("DELETE FROM import_keys WHERE source = ?", (source,))
+
+
+def print_progress(rows: int, offset: int, size: int, rate: float) -> None:
+    percent = 100 * offset / size if size else 100
+    print(f"[{percent:5.1f}%] {rows} rows, {rate:,.0f} rows/s", flush=True)
+
+
+def _transaction(con: sqlite3.Connection, fn: Callable[[], None]) -> None:
+    con.execute("BEGIN")
+    try:
+        fn()
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+
+
+def run_csv_import(
+    con: sqlite3.Connection,
+    source: str,
+    path: Path,
+    importer: CsvImporter,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    restart: bool = False,
+    progress: ProgressCallback | None = print_progress,
+) -> Counter:
+    # Streams a UTF-8 CSV file into the DB in chunks of chunk_size rows,
+    # one transaction each, so memory stays flat for any file size. The
+    # position after each chunk is stored in the same transaction: an
+    # interrupted import continues after the last committed chunk when it
+    # is run again with the same, unchanged file.
+    signature = file_signature(path)
+    size = path.stat().st_size
+    checkpoint = None if restart else load_checkpoint(con, source, signature)
+
+    if checkpoint is None:
+        _transaction(con, lambda: clear_checkpoint(con, source))
+
+    run = ImportRun(con, source)
+    counts = Counter(checkpoint.counts if checkpoint else {})
+    rows_done = resumed = checkpoint.rows if checkpoint else 0
+    start = time.perf_counter()
+
+    if checkpoint is not None:
+        print(f"Resuming {source} import after {rows_done} rows")
+
+    with path.open("rb") as f:
+        if f.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+            f.seek(0)
+
+        lines = _Lines(f)
+        header = csv.reader(lines)
+        fieldnames = next(header, [])
+        lines_before = header.line_num
+        counts.update(importer.start(run, fieldnames) or {})
+
+        if checkpoint is not None:
+            lines_before = count_lines(f, checkpoint.offset)
+            lines.seek(checkpoint.offset)
+
+        records = numbered_rows(csv.reader(lines), fieldnames, lines_before)
+
+        while rows := list(islice(records, chunk_size)):
+
+            def write() -> None:
+                counts.update(importer.chunk(run, rows) or {})
+                save_checkpoint(con, source, signature, lines.offset, rows_done + len(rows), counts)
+
+            _transaction(con, write)
+            rows_done += len(rows)
+
+            if progress is not None:
+                seconds = time.perf_counter() - start
+                progress(rows_done, lines.offset, size, (rows_done - resumed) / seconds if seconds else 0.0)
+
+    def finish() -> None:
+        counts.update(importer.finish(run) or {})
+        clear_checkpoint(con, source)
+
+    _transaction(con, finish)
+    return counts
+
+
+def check_utf8(f: BinaryIO) -> None:
+    # Rows are imported in committed chunks, so a decoding error has to be
+    # found before the first one, not halfway through the file.
+    start = f.tell()
+    for n, raw in enumerate(f, 1):
+        try:
+            raw.decode("utf-8")
+        except UnicodeDecodeError:
+            raise ImportFileError(f"CSV file must be UTF-8 (line {n} is not)") from None
+    f.seek(start)
+
+
+def read_csv_upload(f: BinaryIO) -> tuple[list[str], Iterator[SourceRow]]:
+    # Spreadsheet exports use ";" or tabs as often as commas; the header line
+    # decides.
+    check_utf8(f)
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+    header = text.readline()
+    delimiter = max(",;\t", key=header.count)
+    fieldnames = next(csv.reader([header], delimiter=delimiter), [])
+    return fieldnames, numbered_rows(csv.reader(text, delimiter=delimiter), fieldnames, 1)
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def read_xlsx_upload(f: BinaryIO) -> tuple[list[str], Iterator[SourceRow]]:
+    # First sheet, first row as header. Read-only mode streams the rows
+    # instead of loading the whole workbook; the checksums are tested first
+    # so a damaged file fails before any row is imported.
+    try:
+        with zipfile.ZipFile(f) as z:
+            damaged = z.testzip()
+        f.seek(0)
+        wb = load_workbook(f, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError("Not a readable XLSX file") from e
+
+    if damaged is not None:
+        wb.close()
+        raise ImportFileError("Not a readable XLSX file")
+
+    # Read-only sheets fill gaps with empty rows, so rows count from 1.
+    rows = wb.worksheets[0].iter_rows(min_row=1, values_only=True)
+    fieldnames = [_cell_text(v) for v in next(rows, None) or ()]
+
+    def records() -> Iterator[SourceRow]:
+        try:
+            for line, values in enumerate(rows, 2):
+                if any(v is not None for v in values):
+                    yield SourceRow(line, zip(fieldnames, map(_cell_text, values)))
+        finally:
+            wb.close()
+
+    return fieldnames, records()
+
+
+def run_import(
+    con: sqlite3.Connection,
+    source: str,
+    importer: CsvImporter,
+    fieldnames: list[str],
+    rows: Iterable[SourceRow],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Counter:
+    # run_csv_import for rows from anywhere else, e.g. an upload: the same
+    # chunks and transactions, without checkpoints.
+    run = ImportRun(con, source)
+    counts = Counter(importer.start(run, fieldnames) or {})
+    rows = iter(rows)
+
+    try:
+        while chunk := list(islice(rows, chunk_size)):
+            _transaction(con, lambda: counts.update(importer.chunk(run, chunk) or {}))
+
+        _transaction(con, lambda: counts.update(importer.finish(run) or {}))
+    finally:
+        _transaction(con, lambda: clear_checkpoint(con, source))
+
+    return counts
@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+from typing import Callable, Iterator
+
+from fastapi import HTTPException
+
+from backend.db import db_session
+from backend.jobs import JobArtifact, JobContext, job_kind
+from backend.repo.logs import iter_logs
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def check_export_format(fmt: str) -> str:
+    fmt = (fmt or "").strip().lower()
+
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+
+    return fmt
+
+
+def encode_csv(columns: list[str], chunks: Iterator[list]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def encode_ndjson(columns: list[str], chunks: Iterator[list]) -> Iterator[str]:
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(columns, r)), ensure_ascii=False) + "\n"
+            for r in rows
+        )
+
+
+def stream_export(fmt: str, query: Callable) -> Iterator[str]:
+    # The session lives for as long as the client keeps reading, so memory
+    # stays bounded by one fetchmany() chunk instead of the full result.
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+
+    with db_session(check_same_thread=False) as con:
+        columns, chunks = query(con)
+        yield from encode(columns, chunks)
+
+
+class ParquetUnavailableError(RuntimeError):
+    pass
+
+
+# Columns of backend.repo.logs.LOGS_SELECT that repeat heavily across rows.
+# They are written as dictionary arrays so pandas reads them as categoricals.
+LOG_DICTIONARY_COLUMNS = {
+    "action",
+    "site_name",
+    "first_name",
+    "last_name",
+    "username",
+    "product_name",
+    "nc_nummer",
+    "category_name",
+    "brand_name",
+}
+
+
+def log_arrow_schema(pa, columns: list[str]):
+    fields = []
+
+    for name in columns:
+        if name in LOG_DICTIONARY_COLUMNS:
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        elif name == "created_at":
+            fields.append(pa.field(name, pa.timestamp("s")))
+        else:
+            fields.append(pa.field(name, pa.int64()))
+
+    return pa.schema(fields)
+
+
+def write_logs_parquet(
+    con,
+    out,
+    chunk_size: int = 50_000,
+    compression: str = "zstd",
+    progress: Callable[[int], None] | None = None,
+    **filters,
+) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ParquetUnavailableError("pyarrow is required for Parquet exports") from e
+
+    columns, chunks = iter_logs(con, chunk_size=chunk_size, **filters)
+    schema = log_arrow_schema(pa, columns)
+    written = 0
+
+    # Each fetchmany() chunk becomes one row group, so memory is bounded by
+    # chunk_size no matter how long the history is.
+    with pq.ParquetWriter(out, schema, compression=compression) as writer:
+        for rows in chunks:
+            values = list(zip(*rows))
+            arrays = []
+
+            for field, col in zip(schema, values):
+                if pa.types.is_dictionary(field.type):
+                    arrays.append(pa.array(col, type=pa.string()).dictionary_encode())
+                elif pa.types.is_timestamp(field.type):
+                    arrays.append(pa.array(col, type=pa.string()).cast(field.type))
+                else:
+                    arrays.append(pa.array(col, type=field.type))
+
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            written += len(rows)
+            if progress is not None:
+                progress(written)
+
+    return written
+
+
+@job_kind("logs_export")
+def logs_export_job(ctx: JobContext) -> JobArtifact:
+    params = dict(ctx.params)
+    fmt = params.pop("format")
+
+    if fmt == "parquet":
+        with db_session() as con:
+            write_logs_parquet(con, str(ctx.path), progress=ctx.progress, **params)
+        return JobArtifact("logs.parquet", "application/vnd.apache.parquet")
+
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+    written = 0
+
+    with db_session() as con, open(ctx.path, "w", encoding="utf-8", newline="") as f:
+        columns, chunks = iter_logs(con, chunk_size=5000, **params)
+
+        def counted():
+            nonlocal written
+            for rows in chunks:
+                yield rows
+                written += len(rows)
+                ctx.progress(written)
+
+        for text in encode(columns, counted()):
+            f.write(text)
+
+    return JobArtifact(f"logs.{fmt}", EXPORT_MEDIA_TYPES[fmt])
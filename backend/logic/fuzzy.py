@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import math
+import threading
+import unicodedata
+
+import numpy as np
+
+from backend.db import db_session
+from backend.repo.products import list_products
+
+
+def normalize(text: str | None) -> str:
+    text = (text or "").casefold().replace("ß", "ss")
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def trigrams(text: str | None) -> set[str]:
+    grams = set()
+
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+
+    return grams
+
+
+def product_grams(product: dict) -> set[str]:
+    return trigrams(f"{product['product_name'] or ''} {product['nc_nummer'] or ''}")
+
+
+class TrigramIndex:
+    # In-memory trigram index over active products, for typo-tolerant lookup
+    # ("Kabelbiner" -> "Kabelbinder") that FTS prefix matching cannot do.
+    # Postings are kept as sets for cheap incremental updates and frozen into
+    # numpy arrays on first use, so scoring is one bincount per query.
+    # The index lives in the process: with several uvicorn workers, products
+    # saved or imported through one worker reach the others after a restart.
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._postings: dict[str, set[int]] = {}
+        self._arrays: dict[str, np.ndarray] = {}
+        self._doc_grams: dict[int, frozenset[str]] = {}
+        self._doc_len = np.zeros(0, dtype=np.int32)
+
+    def _add(self, product_id: int, grams: set[str]) -> None:
+        self._doc_grams[product_id] = frozenset(grams)
+
+        if product_id >= len(self._doc_len):
+            grown = np.zeros(max(product_id + 1, 2 * len(self._doc_len)), dtype=np.int32)
+            grown[: len(self._doc_len)] = self._doc_len
+            self._doc_len = grown
+        self._doc_len[product_id] = len(grams)
+
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(product_id)
+            self._arrays.pop(gram, None)
+
+    def _remove(self, product_id: int) -> None:
+        for gram in self._doc_grams.pop(product_id, ()):
+            self._arrays.pop(gram, None)
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self._postings[gram]
+
+        if product_id < len(self._doc_len):
+            self._doc_len[product_id] = 0
+
+    def _posting_array(self, gram: str) -> np.ndarray:
+        arr = self._arrays.get(gram)
+        if arr is None:
+            arr = self._arrays[gram] = np.fromiter(self._postings[gram], dtype=np.int64)
+        return arr
+
+    def _load(self, products: list[dict]) -> None:
+        self._postings = {}
+        self._arrays = {}
+        self._doc_grams = {}
+        self._doc_len = np.zeros(0, dtype=np.int32)
+
+        for p in products:
+            if int(p["active"]) == 1:
+                self._add(int(p["id"]), product_grams(p))
+
+        self._loaded = True
+
+    def load(self, products: list[dict]) -> None:
+        with self._lock:
+            self._load(products)
+
+    def ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+
+        # The catalog is read under the lock: an upsert that comes in
+        # meanwhile waits and is applied on top, instead of being dropped
+        # because the index is not loaded yet.
+        with self._lock:
+            if self._loaded:
+                return
+
+            with db_session() as con:
+                products = list_products(con)
+
+            self._load(products)
+
+    def invalidate(self) -> None:
+        # After bulk changes a reload beats thousands of upserts; it happens
+        # on the next search.
+        with self._lock:
+            self._loaded = False
+
+    def upsert(self, product: dict) -> None:
+        # Before the first search there is nothing to update; the initial
+        # load reads the current catalog anyway.
+        with self._lock:
+            if not self._loaded:
+                return
+
+            product_id = int(product["id"])
+            self._remove(product_id)
+
+            if int(product["active"]) == 1:
+                self._add(product_id, product_grams(product))
+
+    def search(self, text: str, limit: int = 20, min_score: float = 0.3) -> list[tuple[int, float]]:
+        query = trigrams(text)
+        if not query:
+            return []
+
+        self.ensure_loaded()
+
+        with self._lock:
+            arrays = [self._posting_array(g) for g in query if g in self._postings]
+            if not arrays:
+                return []
+
+            counts = np.bincount(np.concatenate(arrays))
+            doc_len = self._doc_len[: len(counts)]
+
+        # Score is the share of the query found in the product; shorter
+        # product texts win ties.
+        need = max(1, math.ceil(min_score * len(query)))
+        ids = np.flatnonzero(counts >= need)
+        if not len(ids):
+            return []
+
+        common = counts[ids]
+        tiebreak = common / np.maximum(doc_len[ids], 1)
+        order = np.lexsort((ids, -tiebreak, -common))[:limit]
+
+        return [
+            (int(ids[i]), round(float(common[i]) / len(query), 3))
+            for i in order
+        ]
+
+
+product_index = TrigramIndex()
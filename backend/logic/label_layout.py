@@ -0,0 +1,165 @@
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+ELLIPSIS = "..."
+HYPHEN = "-"
+
+# Summed glyph widths can differ from reportlab's own sum in the last bits.
+EPSILON = 1e-9
+
+
+class GlyphWidths:
+    # Widths of single characters of one font and size. The standard PDF
+    # fonts have no kerning, so a string is as wide as its characters, and
+    # every character is measured by reportlab only once.
+
+    def __init__(self, font: str, size: float) -> None:
+        self.font = font
+        self.size = size
+        self._widths: dict[str, float] = {}
+
+    def char(self, ch: str) -> float:
+        width = self._widths.get(ch)
+        if width is None:
+            width = self._widths[ch] = stringWidth(ch, self.font, self.size)
+        return width
+
+    def text(self, text: str) -> float:
+        return sum(map(self.char, text))
+
+    def prefix(self, text: str) -> list[float]:
+        # prefix[k] is the width of text[:k].
+        return list(accumulate(map(self.char, text), initial=0.0))
+
+
+@lru_cache(maxsize=None)
+def glyph_widths(font: str, size: float) -> GlyphWidths:
+    return GlyphWidths(font, size)
+
+
+def text_width(text: str, font: str, size: float) -> float:
+    return glyph_widths(font, size).text(text)
+
+
+def _fit(prefix: list[float], start: int, max_width: float) -> int:
+    # End of the longest text[start:end] no wider than max_width.
+    return bisect_right(prefix, prefix[start] + max_width + EPSILON) - 1
+
+
+def ellipsize(text: str, font: str, size: float, max_width: float) -> str:
+    text = (text or "").strip()
+    if not text:
+        return ""
+
+    widths = glyph_widths(font, size)
+    prefix = widths.prefix(text)
+    if prefix[-1] <= max_width + EPSILON:
+        return text
+
+    room = max_width - widths.text(ELLIPSIS)
+    if room < 0:
+        return ""
+
+    return text[:_fit(prefix, 0, room)].rstrip() + ELLIPSIS
+
+
+def wrap_words(text: str, font: str, size: float, max_width: float, max_lines: int) -> list[str]:
+    # Breaks at spaces only; the last line is ellipsized when the text
+    # needs more than max_lines.
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    widths = glyph_widths(font, size)
+    space = widths.char(" ")
+    words = text.split()
+    lines = []
+    cur, cur_w = "", 0.0
+
+    for i, word in enumerate(words):
+        word_w = widths.text(word)
+        candidate_w = word_w if not cur else cur_w + space + word_w
+
+        if candidate_w <= max_width + EPSILON:
+            cur = word if not cur else f"{cur} {word}"
+            cur_w = candidate_w
+            continue
+
+        if cur:
+            lines.append(cur)
+        cur, cur_w = word, word_w
+
+        if len(lines) == max_lines - 1:
+            remaining = " ".join([cur] + words[i + 1:])
+            lines.append(ellipsize(remaining, font, size, max_width))
+            return lines
+
+    if cur:
+        lines.append(cur)
+
+    lines = lines[:max_lines]
+    if len(lines) == max_lines:
+        lines[-1] = ellipsize(lines[-1], font, size, max_width)
+
+    return lines
+
+
+def split_long_word(word: str, font: str, size: float, max_width: float) -> list[str]:
+    # Hyphenates a word wider than max_width into chunks that fit, at least
+    # one character each.
+    word = word.strip()
+    if not word:
+        return []
+
+    widths = glyph_widths(font, size)
+    prefix = widths.prefix(word)
+    if prefix[-1] <= max_width + EPSILON:
+        return [word]
+
+    hyphen = widths.char(HYPHEN)
+    parts = []
+    start = 0
+
+    while start < len(word):
+        if prefix[-1] - prefix[start] <= max_width + EPSILON:
+            end = len(word)
+        else:
+            end = max(start + 1, _fit(prefix, start, max_width - hyphen))
+
+        parts.append(word[start:end] + (HYPHEN if end < len(word) else ""))
+        start = end
+
+    return parts
+
+
+def wrap_hyphenated(text: str, font: str, size: float, max_width: float) -> list[str]:
+    # Like wrap_words without a line limit, but words wider than a line are
+    # hyphenated instead of overflowing.
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    widths = glyph_widths(font, size)
+    space = widths.char(" ")
+    lines = []
+    cur, cur_w = "", 0.0
+
+    for word in text.split():
+        for part in split_long_word(word, font, size, max_width):
+            part_w = widths.text(part)
+            candidate_w = part_w if not cur else cur_w + space + part_w
+
+            if candidate_w <= max_width + EPSILON:
+                cur = part if not cur else f"{cur} {part}"
+                cur_w = candidate_w
+            else:
+                if cur:
+                    lines.append(cur)
+                cur, cur_w = part, part_w
+
+    if cur:
+        lines.append(cur)
+    return lines
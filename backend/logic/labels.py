@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import zipfile
+from pathlib import Path
+from typing import Callable, Iterator
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from backend.db import db_session
+from backend.jobs import JobArtifact, JobContext, job_kind
+from backend.logic.label_layout import ellipsize, wrap_words
+from backend.logic.pdf import PdfCanvas, StreamingPdf
+from backend.logic.qr import draw_qr
+
+
+def fetch_label_rows(con: sqlite3.Connection, site_id: int | None = None) -> list[sqlite3.Row]:
+    site_filter = "AND s.id = ?" if site_id is not None else ""
+    return con.execute(
+        f"""
+        SELECT
+          s.id AS site_id,
+          s.name AS site_name,
+          p.id AS product_id,
+          p.product_name,
+          p.nc_nummer,
+          l.id AS location_id,
+          l.shelf,
+          l.row
+        FROM sites s
+        CROSS JOIN products p
+        LEFT JOIN product_site_locations psl
+          ON psl.site_id = s.id
+         AND psl.product_id = p.id
+        LEFT JOIN locations l
+          ON l.id = psl.location_id
+         AND l.site_id = s.id
+         AND l.active = 1
+        WHERE s.active = 1
+          AND p.active = 1
+          {site_filter}
+        ORDER BY s.id, p.id
+        """,
+        (site_id,) if site_id is not None else (),
+    ).fetchall()
+
+
+def group_by_site(rows: list[sqlite3.Row]) -> dict[tuple[int, str], list[sqlite3.Row]]:
+    grouped: dict[tuple[int, str], list[sqlite3.Row]] = {}
+    for r in rows:
+        key = (int(r["site_id"]), r["site_name"])
+        grouped.setdefault(key, []).append(r)
+    return grouped
+
+
+def site_sheet_filename(site_id: int, site_name: str) -> str:
+    return f"qr_{site_id}_{slugify(site_name)}.pdf"
+
+
+# Part of every label fingerprint: bump it when draw_label changes so that
+# sheets are redrawn even though their data did not change.
+LABEL_LAYOUT_VERSION = 1
+
+
+def label_fingerprint(r: sqlite3.Row) -> str:
+    # Everything draw_label prints.
+    data = json.dumps(
+        [LABEL_LAYOUT_VERSION, r["site_id"], r["site_name"], r["product_id"], r["product_name"], r["nc_nummer"], r["shelf"], r["row"]],
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def sheet_fingerprint(labels: dict[int, str]) -> str:
+    # Labels by product id, in sheet order.
+    data = "\n".join(f"{product_id}:{fp}" for product_id, fp in labels.items())
+    return hashlib.sha256(data.encode("ascii")).hexdigest()
+
+
+def slugify(text: str) -> str:
+    text = (text or "").strip().lower()
+    text = re.sub(r"\s+", "_", text)
+    text = re.sub(r"[^a-z0-9_äöüß]", "", text)
+    return text or "site"
+
+
+def draw_label(c, x, y, label_w, label_h, r):
+    site_id = int(r["site_id"])
+    product_id = int(r["product_id"])
+    payload = f"{site_id}-{product_id}"
+
+    left = x + 3 * mm
+    top = y + label_h - 2.7 * mm
+
+    c.setFont("Helvetica", 6.8)
+    c.drawString(left, top, f"QR: {payload}")
+
+    qr_size = 24.5 * mm
+    qr_y = top - 1.8 * mm - qr_size
+    qr_x = left
+
+    draw_qr(c, payload, qr_x, qr_y, qr_size)
+
+    text_left = left
+    text_width_available = label_w - 6 * mm
+
+    product_line = f"{(r['product_name'] or '').strip()} {(r['site_name'] or '').strip()}".strip()
+    name_lines = wrap_words(
+        product_line,
+        "Helvetica-Bold",
+        6.7,
+        text_width_available,
+        max_lines=3,
+    )
+
+    name_y = qr_y - 2.4 * mm
+    c.setFont("Helvetica-Bold", 6.7)
+    for i, line in enumerate(name_lines):
+        c.drawString(text_left, name_y - i * 3.15 * mm, line)
+
+    after_name_y = name_y - max(1, len(name_lines)) * 3.15 * mm - 0.6 * mm
+
+    nc_text = ellipsize(r["nc_nummer"] or "-", "Helvetica", 6.0, text_width_available)
+    c.setFont("Helvetica", 6.0)
+    c.drawString(text_left, after_name_y, nc_text)
+
+    shelf = r["shelf"]
+    row = r["row"]
+    if shelf is None or row is None:
+        loc_text = "Regal - / Fach -"
+    else:
+        loc_text = f"Regal {shelf} / Fach {row}"
+
+    loc_text = ellipsize(loc_text, "Helvetica-Bold", 6.2, text_width_available)
+    c.setFont("Helvetica-Bold", 6.2)
+    c.drawString(text_left, after_name_y - 3.7 * mm, loc_text)
+
+
+def draw_grid_lines(c, page_w, page_h, cols_n, rows_per_page, margin_x, margin_y, gap_x, gap_y, label_w, label_h):
+    c.setLineWidth(0.25)
+
+    # vertical separator lines between columns
+    for col in range(cols_n - 1):
+        x_line = margin_x + (col + 1) * label_w + col * gap_x + gap_x / 2
+        c.line(x_line, margin_y, x_line, page_h - margin_y)
+
+    # horizontal separator lines between rows
+    for row in range(rows_per_page - 1):
+        y_top_current = page_h - margin_y - row * (label_h + gap_y) - label_h
+        y_line = y_top_current - gap_y / 2
+        c.line(margin_x, y_line, page_w - margin_x, y_line)
+
+
+def generate_for_site(
+    rows: list[sqlite3.Row],
+    out_pdf: Path,
+    progress: Callable[[int, int], None] | None = None,
+) -> None:
+    c = canvas.Canvas(str(out_pdf), pagesize=A4)
+    W, H = A4
+
+    cols_n = 4
+    rows_per_page = 6
+
+    margin_x = 2.5 * mm
+    margin_y = 3.5 * mm
+
+    gap_x = 2.0 * mm
+    gap_y = 4.6 * mm
+
+    label_w = (W - 2 * margin_x - (cols_n - 1) * gap_x) / cols_n
+    label_h = (H - 2 * margin_y - (rows_per_page - 1) * gap_y) / rows_per_page
+
+    labels_per_page = cols_n * rows_per_page
+
+    for i, r in enumerate(rows):
+        idx = i % labels_per_page
+        row_i = idx // cols_n
+        col_i = idx % cols_n
+
+        if idx == 0:
+            draw_grid_lines(
+                c, W, H, cols_n, rows_per_page,
+                margin_x, margin_y, gap_x, gap_y, label_w, label_h
+            )
+
+        x = margin_x + col_i * (label_w + gap_x)
+        y = H - margin_y - (row_i + 1) * label_h - row_i * gap_y
+
+        draw_label(c, x, y, label_w, label_h, r)
+
+        if (i + 1) % labels_per_page == 0 and (i + 1) != len(rows):
+            c.showPage()
+            if progress is not None:
+                progress(i + 1, len(rows))
+
+    c.save()
+
+
+# Labels for products picked on the admin page: a 5 x 7 grid of small
+# labels per A4 page.
+SELECTION_LABEL = 30 * mm
+SELECTION_MARGIN = 15 * mm
+SELECTION_GAP = 5 * mm
+SELECTION_COLS = 5
+SELECTION_LINES = int((A4[1] - 2 * SELECTION_MARGIN + SELECTION_GAP) // (SELECTION_LABEL + SELECTION_GAP))
+SELECTION_PER_PAGE = SELECTION_COLS * SELECTION_LINES
+
+
+class LabelSelectionError(ValueError):
+    pass
+
+
+class LabelsNotFoundError(LabelSelectionError):
+    pass
+
+
+def check_site_labels(con: sqlite3.Connection, site_id: int | None = None) -> None:
+    # What site_labels_job would fail on, without reading every label.
+    site_filter = "AND id = ?" if site_id is not None else ""
+    row = con.execute(
+        f"""
+        SELECT 1
+        FROM sites
+        WHERE active = 1
+          {site_filter}
+          AND EXISTS (SELECT 1 FROM products WHERE active = 1)
+        LIMIT 1
+        """,
+        (site_id,) if site_id is not None else (),
+    ).fetchone()
+
+    if row is None:
+        raise LabelsNotFoundError("No active sites/products found")
+
+
+def fetch_selection(con: sqlite3.Connection, site_id: int, product_ids: list[int]) -> tuple[sqlite3.Row, list[sqlite3.Row]]:
+    if not product_ids:
+        raise LabelSelectionError("No products selected")
+
+    site = con.execute(
+        """
+        SELECT id, name
+        FROM sites
+        WHERE id = ?
+        """,
+        (site_id,),
+    ).fetchone()
+
+    if not site:
+        raise LabelsNotFoundError("Site not found")
+
+    placeholders = ",".join(["?"] * len(product_ids))
+    rows = con.execute(
+        f"""
+        SELECT
+            id,
+            product_name,
+            nc_nummer
+        FROM products
+        WHERE id IN ({placeholders})
+        ORDER BY product_name
+        """,
+        product_ids,
+    ).fetchall()
+
+    if not rows:
+        raise LabelsNotFoundError("Products not found")
+
+    return site, rows
+
+
+def selection_pages(pdf: StreamingPdf, site: sqlite3.Row, rows: list[sqlite3.Row]) -> Iterator[PdfCanvas]:
+    # Pages are drawn one at a time as they are consumed, so memory stays
+    # bounded by a single page however many labels are printed.
+    page_h = A4[1]
+    label_w = label_h = SELECTION_LABEL
+    text_w = label_w - 2 * mm
+
+    for first in range(0, len(rows), SELECTION_PER_PAGE):
+        c = pdf.canvas()
+
+        for i, row in enumerate(rows[first:first + SELECTION_PER_PAGE]):
+            col = i % SELECTION_COLS
+            line = i // SELECTION_COLS
+
+            x = SELECTION_MARGIN + (label_w + SELECTION_GAP) * col
+            y = page_h - SELECTION_MARGIN - label_h - ((label_h + SELECTION_GAP) * line)
+
+            payload = f"{site['id']}-{row['id']}"
+
+            c.rect(x, y, label_w, label_h)
+
+            draw_qr(c, payload, x + 6 * mm, y + 9 * mm, 18 * mm)
+
+            c.setFont("Helvetica-Bold", 4.7)
+
+            c.drawCentredString(
+                x + label_w / 2,
+                y + 6 * mm,
+                ellipsize(str(row["product_name"]), "Helvetica-Bold", 4.7, text_w)
+            )
+
+            c.setFont("Helvetica", 4)
+
+            c.drawCentredString(
+                x + label_w / 2,
+                y + 3.8 * mm,
+                ellipsize(f"{site['name']} | {payload}", "Helvetica", 4, text_w)
+            )
+
+        yield c
+
+
+@job_kind("labels")
+def labels_job(ctx: JobContext) -> JobArtifact:
+    with db_session() as con:
+        site, rows = fetch_selection(con, ctx.params["site_id"], ctx.params["product_ids"])
+
+    pdf = StreamingPdf(A4)
+    pages = -(-len(rows) // SELECTION_PER_PAGE)
+
+    with open(ctx.path, "wb") as f:
+        f.write(pdf.begin())
+        for n, page in enumerate(selection_pages(pdf, site, rows), start=1):
+            f.write(pdf.page(page))
+            ctx.progress(n, pages)
+        f.write(pdf.end())
+
+    return JobArtifact("products_qr.pdf", "application/pdf")
+
+
+@job_kind("site_labels")
+def site_labels_job(ctx: JobContext) -> JobArtifact:
+    # The per-site sheets of scripts/generate_qr_pdf.py: one PDF for a
+    # single site, a zip with one PDF per site otherwise.
+    site_id = ctx.params.get("site_id")
+
+    with db_session() as con:
+        grouped = group_by_site(fetch_label_rows(con, site_id))
+
+    if not grouped:
+        raise LabelsNotFoundError("No active sites/products found")
+
+    total = sum(len(rows) for rows in grouped.values())
+    done = 0
+
+    def progress(n: int, _: int) -> None:
+        ctx.progress(done + n, total)
+
+    if site_id is not None:
+        [(key, rows)] = grouped.items()
+        generate_for_site(rows, ctx.path, progress)
+        return JobArtifact(site_sheet_filename(*key), "application/pdf")
+
+    part = ctx.path.with_suffix(".part.pdf")
+    try:
+        with zipfile.ZipFile(ctx.path, "w") as zf:
+            for key, rows in grouped.items():
+                generate_for_site(rows, part, progress)
+                zf.write(part, site_sheet_filename(*key))
+                done += len(rows)
+                ctx.progress(done, total)
+    finally:
+        part.unlink(missing_ok=True)
+
+    return JobArtifact("qr_labels.zip", "application/zip")
@@ -0,0 +1,168 @@
+import zlib
+from typing import Iterable, Iterator
+
+from reportlab.lib.rl_accel import escapePDF, fp_str
+from reportlab.pdfbase.pdfmetrics import getFont, stringWidth, unicode2T1
+
+CATALOG, PAGES = 1, 2
+
+
+class PdfPath:
+    def __init__(self) -> None:
+        self.ops: list[str] = []
+
+    def rect(self, x: float, y: float, width: float, height: float) -> None:
+        self.ops.append(f"{fp_str(x)} {fp_str(y)} {fp_str(width)} {fp_str(height)} re")
+
+
+class PdfCanvas:
+    # The part of reportlab's Canvas the label sheets use, drawing into the
+    # content stream of a single page.
+
+    def __init__(self, fonts: dict[str, str]) -> None:
+        self._fonts = fonts
+        self._font = None
+        self._size = 0.0
+        self._ops: list[str] = []
+
+    def content(self) -> bytes:
+        return "\n".join(self._ops).encode("latin-1")
+
+    def setFont(self, name: str, size: float) -> None:
+        if name not in self._fonts:
+            raise ValueError(f"Font {name} is not available in this document")
+        self._font, self._size = name, size
+
+    def stringWidth(self, text: str, font: str, size: float) -> float:
+        return stringWidth(text, font, size)
+
+    def setLineWidth(self, width: float) -> None:
+        self._ops.append(f"{fp_str(width)} w")
+
+    def setFillColorRGB(self, r: float, g: float, b: float) -> None:
+        self._ops.append(f"{fp_str(r)} {fp_str(g)} {fp_str(b)} rg")
+
+    def saveState(self) -> None:
+        self._ops.append("q")
+
+    def restoreState(self) -> None:
+        self._ops.append("Q")
+
+    def line(self, x1: float, y1: float, x2: float, y2: float) -> None:
+        self._ops.append(f"{fp_str(x1)} {fp_str(y1)} m {fp_str(x2)} {fp_str(y2)} l S")
+
+    def rect(self, x: float, y: float, width: float, height: float, stroke: int = 1, fill: int = 0) -> None:
+        path = PdfPath()
+        path.rect(x, y, width, height)
+        self.drawPath(path, stroke=stroke, fill=fill)
+
+    def beginPath(self) -> PdfPath:
+        return PdfPath()
+
+    def drawPath(self, path: PdfPath, stroke: int = 1, fill: int = 0) -> None:
+        if not path.ops:
+            return
+        paint = {(1, 0): "S", (0, 1): "f", (1, 1): "B"}.get((stroke, fill), "n")
+        self._ops.append("\n".join(path.ops) + f" {paint}")
+
+    def drawString(self, x: float, y: float, text: str) -> None:
+        # Encoded the way reportlab's Canvas does it: characters the font
+        # lacks come from its substitution fonts (Symbol, ZapfDingbats), and
+        # anything else prints as reportlab's missing-glyph box, never as "?".
+        font = getFont(self._font)
+        runs = " ".join(
+            f"/{self._fonts[f.fontName]} {fp_str(self._size)} Tf ({escapePDF(raw)}) Tj"
+            for f, raw in unicode2T1(text, [font, *font.substitutionFonts])
+        )
+        self._ops.append(f"BT {fp_str(x)} {fp_str(y)} Td {runs} ET")
+
+    def drawCentredString(self, x: float, y: float, text: str) -> None:
+        self.drawString(x - stringWidth(text, self._font, self._size) / 2, y, text)
+
+    def drawRightString(self, x: float, y: float, text: str) -> None:
+        self.drawString(x - stringWidth(text, self._font, self._size), y, text)
+
+
+class StreamingPdf:
+    # Writes a PDF page by page: every page is sent as soon as it is drawn,
+    # and only the object offsets are kept until the final cross-reference
+    # table. reportlab's Canvas keeps the whole document until save().
+
+    def __init__(self, pagesize: tuple[float, float], fonts: Iterable[str] = ("Helvetica", "Helvetica-Bold")) -> None:
+        self.pagesize = pagesize
+        names = list(dict.fromkeys(
+            name
+            for font in map(getFont, fonts)
+            for name in [font.fontName, *(f.fontName for f in font.substitutionFonts)]
+        ))
+        self.fonts = {name: f"F{i}" for i, name in enumerate(names, start=1)}
+        self._font_objects = {key: PAGES + i for i, key in enumerate(self.fonts.values(), start=1)}
+        self._offsets: dict[int, int] = {}
+        self._pages: list[int] = []
+        self._size = 0
+        self._next = PAGES + len(self.fonts) + 1
+
+    def _object(self, body: bytes, number: int | None = None) -> bytes:
+        if number is None:
+            number = self._next
+            self._next += 1
+        data = f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+        self._offsets[number] = self._size
+        self._size += len(data)
+        return data
+
+    def _emit(self, data: bytes) -> bytes:
+        self._size += len(data)
+        return data
+
+    def begin(self) -> bytes:
+        out = [self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")]
+        for name, key in self.fonts.items():
+            # Symbol and ZapfDingbats only work with their built-in encoding.
+            encoding = " /Encoding /WinAnsiEncoding" if getFont(name).encName == "WinAnsiEncoding" else ""
+            font = f"<< /Type /Font /Subtype /Type1 /BaseFont /{name}{encoding} >>"
+            out.append(self._object(font.encode("ascii"), self._font_objects[key]))
+        return b"".join(out)
+
+    def canvas(self) -> PdfCanvas:
+        return PdfCanvas(self.fonts)
+
+    def page(self, canvas: PdfCanvas) -> bytes:
+        stream = zlib.compress(canvas.content())
+        content_number = self._next
+        content = self._object(
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("ascii") + stream + b"\nendstream"
+        )
+
+        fonts = " ".join(f"/{key} {number} 0 R" for key, number in self._font_objects.items())
+        w, h = self.pagesize
+        self._pages.append(self._next)
+        page = self._object(
+            (
+                f"<< /Type /Page /Parent {PAGES} 0 R /MediaBox [0 0 {fp_str(w)} {fp_str(h)}]"
+                f" /Resources << /Font << {fonts} >> >> /Contents {content_number} 0 R >>"
+            ).encode("ascii")
+        )
+        return content + page
+
+    def end(self) -> bytes:
+        kids = " ".join(f"{n} 0 R" for n in self._pages)
+        out = [
+            self._object(f"<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>".encode("ascii"), PAGES),
+            self._object(f"<< /Type /Catalog /Pages {PAGES} 0 R >>".encode("ascii"), CATALOG),
+        ]
+
+        xref_at = self._size
+        count = self._next
+        lines = [f"xref\n0 {count}\n", "0000000000 65535 f \n"]
+        lines += [f"{self._offsets[n]:010d} 00000 n \n" for n in range(1, count)]
+        lines.append(f"trailer\n<< /Size {count} /Root {CATALOG} 0 R >>\nstartxref\n{xref_at}\n%%EOF\n")
+        out.append(self._emit("".join(lines).encode("ascii")))
+        return b"".join(out)
+
+
+def iter_pdf(pdf: StreamingPdf, pages: Iterator[PdfCanvas]) -> Iterator[bytes]:
+    yield pdf.begin()
+    for canvas in pages:
+        yield pdf.page(canvas)
+    yield pdf.end()
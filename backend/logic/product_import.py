@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import sqlite3
+from collections import Counter
+from typing import NamedTuple
+
+from backend.logic.csv_import import CsvImporter, ImportFileError, ImportRun, SourceRow
+from backend.repo.products import bulk_product_inserts
+
+DEFAULT_BRAND = "Netcom"
+DEFAULT_CATEGORY = "Other"
+
+MAX_REPORTED_ERRORS = 100
+
+ACTIVE_VALUES = {"1": 1, "true": 1, "ja": 1, "yes": 1, "x": 1, "0": 0, "false": 0, "nein": 0, "no": 0}
+
+# SQLite's lower() only folds ASCII letters, the same has to hold for the
+# in-memory keys or they disagree with the lower(trim(name)) indexes.
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def norm(x: str | None) -> str:
+    return " ".join((x or "").replace("\xa0", " ").split()).strip()
+
+
+def name_key(name: str) -> str:
+    return name.strip(" ").translate(_ASCII_LOWER)
+
+
+class Dimension:
+    # Name -> id map of brands or categories, loaded once and extended with
+    # the names an import adds, so rows are resolved without queries.
+
+    def __init__(self, con: sqlite3.Connection, table: str, create_missing: bool = True) -> None:
+        self.con = con
+        self.table = table
+        self.create_missing = create_missing
+        self.ids: dict[str, int] = {}
+        self.inactive: set[int] = set()
+        self.created: list[str] = []
+
+        for r in con.execute(f"SELECT id, name, active FROM {table}"):
+            self.ids[name_key(r["name"])] = int(r["id"])
+            if not r["active"]:
+                self.inactive.add(int(r["id"]))
+
+    def resolve(self, names: list[str]) -> None:
+        # New names are inserted in the order they first appear.
+        new = {}
+        for name in names:
+            new.setdefault(name_key(name), name)
+        for key in self.ids.keys() & new.keys():
+            del new[key]
+
+        if new and self.create_missing:
+            self.con.executemany(
+                f"INSERT INTO {self.table}(name, active) VALUES (?, 1)",
+                [(name,) for name in new.values()],
+            )
+            placeholders = ",".join(["?"] * len(new))
+            for r in self.con.execute(
+                f"SELECT id, name FROM {self.table} WHERE lower(trim(name)) IN ({placeholders})",
+                list(new),
+            ):
+                self.ids[name_key(r["name"])] = int(r["id"])
+            self.created += new.values()
+
+        # Importing a product reactivates its brand and category.
+        used = self.inactive & {self.ids.get(name_key(name)) for name in names}
+        if used:
+            self.con.executemany(
+                f"UPDATE {self.table} SET active = 1 WHERE id = ?",
+                [(i,) for i in used],
+            )
+            self.inactive -= used
+
+    def get(self, name: str) -> int | None:
+        return self.ids.get(name_key(name))
+
+
+class ProductRow(NamedTuple):
+    row: int
+    product_name: str
+    nc_nummer: str | None
+    brand_id: int
+    category_id: int
+    active: int
+
+
+class ProductImporter(CsvImporter):
+    # Products from a CSV or SAP export. By default rows are only inserted,
+    # products whose NC number exists already are skipped. With upsert they
+    # are updated instead; rows without an NC number match an existing
+    # product without one by name.
+
+    def __init__(self, upsert: bool = False, create_missing: bool = True) -> None:
+        self.upsert = upsert
+        self.create_missing = create_missing
+        self.row = 0
+        self.errors: list[dict] = []
+
+    def start(self, run: ImportRun, fieldnames: list[str]) -> None:
+        if not fieldnames:
+            raise ImportFileError("The product file has no header")
+
+        hdr = {h.strip().lower(): h for h in fieldnames if h}
+
+        self.k_nc = hdr.get("nc_nummer") or hdr.get("nc-nummer") or hdr.get("ncnummer")
+        self.k_name = hdr.get("product_name") or hdr.get("materialkurztext") or hdr.get("material_kurztext")
+        self.k_brand = hdr.get("brand") or hdr.get("marke")
+        self.k_category = hdr.get("category") or hdr.get("kategorie")
+        self.k_active = hdr.get("active") or hdr.get("aktiv")
+
+        if not self.k_name:
+            raise ImportFileError(
+                "The product file must have a product name column: "
+                "product_name or Materialkurztext"
+            )
+
+        self.brands = Dimension(run.con, "brands", self.create_missing)
+        self.categories = Dimension(run.con, "categories", self.create_missing)
+
+    def chunk(self, run: ImportRun, rows: list[SourceRow]) -> Counter:
+        counts = Counter()
+        errors = []
+        parsed = []
+
+        for row in rows:
+            self.row += 1
+            n = row.line
+            product_name = norm(row.get(self.k_name))
+            nc = norm(row.get(self.k_nc)) if self.k_nc else None
+            brand_name = (norm(row.get(self.k_brand)) if self.k_brand else "") or DEFAULT_BRAND
+            category_name = (norm(row.get(self.k_category)) if self.k_category else "") or DEFAULT_CATEGORY
+            active = ACTIVE_VALUES.get(norm(row.get(self.k_active)).lower() or "1") if self.k_active else 1
+
+            if not product_name:
+                errors.append((n, "Product name is required"))
+            elif active is None:
+                errors.append((n, f"Invalid active value: {row.get(self.k_active)}"))
+            else:
+                parsed.append((n, product_name, nc or None, brand_name, category_name, active))
+                continue
+
+            counts["invalid"] += 1
+
+        self.brands.resolve(list(dict.fromkeys(p[3] for p in parsed)))
+        self.categories.resolve(list(dict.fromkeys(p[4] for p in parsed)))
+
+        valid = []
+        for n, product_name, nc, brand_name, category_name, active in parsed:
+            brand_id = self.brands.get(brand_name)
+            category_id = self.categories.get(category_name)
+
+            if brand_id is None:
+                errors.append((n, f"Unknown brand: {brand_name}"))
+            elif category_id is None:
+                errors.append((n, f"Unknown category: {category_name}"))
+            else:
+                valid.append(ProductRow(n, product_name, nc, brand_id, category_id, active))
+                continue
+
+            counts["invalid"] += 1
+
+        for n, message in sorted(errors)[: MAX_REPORTED_ERRORS - len(self.errors)]:
+            self.errors.append({"row": n, "error": message})
+
+        if self.upsert:
+            counts.update(self._upsert(run.con, valid))
+        else:
+            counts.update(self._insert(run.con, valid))
+
+        return counts
+
+    def _insert(self, con: sqlite3.Connection, valid: list[ProductRow]) -> Counter:
+        with bulk_product_inserts(con):
+            cur = con.executemany(
+                """
+                INSERT OR IGNORE INTO products(
+                    category_id,
+                    brand_id,
+                    product_name,
+                    nc_nummer,
+                    active
+                )
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [(p.category_id, p.brand_id, p.product_name, p.nc_nummer, p.active) for p in valid],
+            )
+
+        return Counter(inserted=cur.rowcount, skipped=len(valid) - cur.rowcount)
+
+    def _upsert(self, con: sqlite3.Connection, valid: list[ProductRow]) -> Counter:
+        # The last row for an NC number (or a name without one) wins.
+        by_nc = {p.nc_nummer: p for p in valid if p.nc_nummer}
+        by_name = {p.product_name: p for p in valid if not p.nc_nummer}
+        counts = Counter(skipped=len(valid) - len(by_nc) - len(by_name))
+
+        existing: dict[ProductRow, sqlite3.Row] = {}
+
+        if by_nc:
+            placeholders = ",".join(["?"] * len(by_nc))
+            for r in con.execute(
+                f"""
+                SELECT id, nc_nummer, product_name, brand_id, category_id, active
+                FROM products
+                WHERE nc_nummer IN ({placeholders})
+                """,
+                list(by_nc),
+            ):
+                existing[by_nc[r["nc_nummer"]]] = r
+
+        if by_name:
+            placeholders = ",".join(["?"] * len(by_name))
+            for r in con.execute(
+                f"""
+                SELECT id, nc_nummer, product_name, brand_id, category_id, active
+                FROM products
+                WHERE nc_nummer IS NULL
+                  AND product_name IN ({placeholders})
+                ORDER BY id DESC
+                """,
+                list(by_name),
+            ):
+                existing[by_name[r["product_name"]]] = r
+
+        inserts = []
+        updates = []
+
+        for p in sorted([*by_nc.values(), *by_name.values()]):
+            r = existing.get(p)
+            if r is None:
+                inserts.append((p.category_id, p.brand_id, p.product_name, p.nc_nummer, p.active))
+            elif (r["product_name"], r["brand_id"], r["category_id"], r["active"]) != (
+                p.product_name, p.brand_id, p.category_id, p.active
+            ):
+                updates.append((p.category_id, p.brand_id, p.product_name, p.active, r["id"]))
+            else:
+                counts["unchanged"] += 1
+
+        if updates:
+            con.executemany(
+                """
+                UPDATE products
+                SET
+                    category_id = ?,
+                    brand_id = ?,
+                    product_name = ?,
+                    active = ?
+                WHERE id = ?
+                """,
+                updates,
+            )
+
+        if inserts:
+            with bulk_product_inserts(con):
+                con.executemany(
+                    """
+                    INSERT INTO products(
+                        category_id,
+                        brand_id,
+                        product_name,
+                        nc_nummer,
+                        active
+                    )
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    inserts,
+                )
+
+        counts["updated"] += len(updates)
+        counts["inserted"] += len(inserts)
+        return counts
@@ -0,0 +1,106 @@
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_M
+
+QR_CACHE_SIZE = 4096
+
+# Row, first column and length of every run of dark modules.
+QrRuns = tuple[int, tuple[tuple[int, int, int], ...]]
+
+_env_dir = os.environ.get("LAGER_QR_CACHE_DIR")
+_cache_dir: Path | None = Path(_env_dir) if _env_dir else None
+
+
+def set_qr_cache_dir(path: Path | None) -> None:
+    global _cache_dir
+
+    _cache_dir = Path(path) if path else None
+    qr_runs.cache_clear()
+
+
+def qr_matrix(payload: str, border: int = 1, error_correction: int = ERROR_CORRECT_M) -> list[list[bool]]:
+    qr = qrcode.QRCode(version=None, error_correction=error_correction, border=border)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def matrix_runs(matrix: list[list[bool]]) -> QrRuns:
+    runs = []
+    for r, line in enumerate(matrix):
+        start = None
+        for col, dark in enumerate(list(line) + [False]):
+            if dark and start is None:
+                start = col
+            elif not dark and start is not None:
+                runs.append((r, start, col - start))
+                start = None
+    return len(matrix), tuple(runs)
+
+
+def _cache_path(payload: str, border: int, error_correction: int) -> Path | None:
+    if _cache_dir is None:
+        return None
+
+    key = hashlib.sha256(f"{error_correction}:{border}:{payload}".encode("utf-8")).hexdigest()
+    return _cache_dir / key[:2] / f"{key}.txt"
+
+
+def _read_matrix(path: Path) -> list[list[bool]] | None:
+    try:
+        lines = path.read_text(encoding="ascii").split()
+    except OSError:
+        return None
+
+    if not lines or any(len(line) != len(lines) for line in lines):
+        return None
+    return [[ch == "1" for ch in line] for line in lines]
+
+
+def _write_matrix(path: Path, matrix: list[list[bool]]) -> None:
+    text = "\n".join("".join("1" if dark else "0" for dark in line) for line in matrix) + "\n"
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(text, encoding="ascii")
+        os.replace(tmp, path)
+    except OSError:
+        # The cache is an optimisation, a read-only or full disk is fine.
+        tmp.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_runs(payload: str, border: int = 1, error_correction: int = ERROR_CORRECT_M) -> QrRuns:
+    # Labels are reprinted with the same "{site_id}-{product_id}" payloads
+    # over and over, so encoded codes are kept in memory and, when a cache
+    # directory is set, on disk between runs.
+    path = _cache_path(payload, border, error_correction)
+    matrix = _read_matrix(path) if path is not None else None
+
+    if matrix is None:
+        matrix = qr_matrix(payload, border, error_correction)
+        if path is not None:
+            _write_matrix(path, matrix)
+
+    return matrix_runs(matrix)
+
+
+def draw_qr(c, payload: str, x: float, y: float, size: float, border: int = 1) -> None:
+    # Dark modules are drawn as filled rectangles of one PDF path instead of
+    # an embedded bitmap: smaller files, no image encoding, sharp at any
+    # printer resolution. Runs of dark modules in a row become one rectangle.
+    n, runs = qr_runs(payload, border)
+    module = size / n
+    path = c.beginPath()
+
+    for r, start, length in runs:
+        path.rect(x + start * module, y + size - (r + 1) * module, length * module, module)
+
+    c.saveState()
+    c.setFillColorRGB(0, 0, 0)
+    c.drawPath(path, stroke=0, fill=1)
+    c.restoreState()
@@ -1,31 +1,62 @@
+import sqlite3
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from backend.api.admin import router as admin_router
 from backend.api.auth import router as auth_router
+from backend.api.export import router as export_router
 from backend.api.inventory import router as inventory_router
+from backend.api.jobs import router as jobs_router
 from backend.api.pages import router as pages_router
+from backend.api.paging import invalid_page_handler
+from backend.api.responses import FastJSONResponse, database_busy_handler
+from backend.compression import CompressionMiddleware
+from backend.jobs import queue
+from backend.metrics import MetricsMiddleware
+from backend.profiler import ProfileMiddleware
+from backend.repo.paging import InvalidPageError
+from backend.static import PrecompressedStaticFiles
 
-app = FastAPI(title="POPSITE Lager Backend")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    queue.start()
+    yield
+    queue.shutdown()
+
+
+app = FastAPI(
+    title="POPSITE Lager Backend",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
+)
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 FRONTEND_DIR = BASE_DIR / "frontend"
 
-app.mount("/assets", StaticFiles(directory=FRONTEND_DIR / "assets"), name="assets")
-app.mount("/css", StaticFiles(directory=FRONTEND_DIR / "css"), name="css")
-app.mount("/js", StaticFiles(directory=FRONTEND_DIR / "js"), name="js")
+app.mount("/assets", PrecompressedStaticFiles(directory=FRONTEND_DIR / "assets"), name="assets")
+app.mount("/css", PrecompressedStaticFiles(directory=FRONTEND_DIR / "css"), name="css")
+app.mount("/js", PrecompressedStaticFiles(directory=FRONTEND_DIR / "js"), name="js")
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+app.add_middleware(ProfileMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_exception_handler(InvalidPageError, invalid_page_handler)
+app.add_exception_handler(sqlite3.OperationalError, database_busy_handler)
 
 app.include_router(pages_router)
 app.include_router(auth_router)
 app.include_router(admin_router)
+app.include_router(jobs_router)
+app.include_router(export_router)
 app.include_router(inventory_router)
\ No newline at end of file
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_KINDS = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "PRAGMA", "SCRIPT"}
+
+# Label for database work that happens outside of a request.
+NO_ROUTE = "background"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = buckets
+        # Per label set: one count per bucket plus +Inf, then sum.
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    le = _labels(self.label_names, labels, f'le="{bound:g}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                cumulative += counts[-1]
+                inf = _labels(self.label_names, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request until its response body was sent.",
+    ("method", "route", "status"),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQLite statements per request.",
+    ("route",),
+)
+STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds",
+    "Time per SQLite statement, from execute until the last row was fetched.",
+    ("route", "statement"),
+)
+STATEMENT_ROWS = Counter(
+    "db_rows_total",
+    "Rows fetched by queries or changed by writes.",
+    ("route", "statement"),
+)
+
+METRICS = [REQUEST_SECONDS, REQUEST_DB_SECONDS, STATEMENT_SECONDS, STATEMENT_ROWS]
+
+
+@dataclass
+class RequestStats:
+    scope: Scope
+    statements: int = 0
+    db_seconds: float = 0.0
+    rows: int = 0
+    start: float = field(default_factory=time.perf_counter)
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def route_label(scope: Scope | None) -> str:
+    if scope is None:
+        return NO_ROUTE
+
+    # Templates such as /api/{site}/stock keep the label set small.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def statement_kind(sql: str) -> str:
+    kind = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    return kind if kind in STATEMENT_KINDS else "OTHER"
+
+
+def observe_statement(sql: str, seconds: float, rows: int) -> None:
+    stats = current_request.get()
+    labels = (route_label(stats.scope if stats else None), statement_kind(sql))
+
+    STATEMENT_SECONDS.observe(labels, seconds)
+    if rows:
+        STATEMENT_ROWS.inc(labels, rows)
+
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += seconds
+        stats.rows += rows
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Records latency per route and method, plus the SQLite time the request
+# spent (also sent to the browser as a Server-Timing header).
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f"db;dur={stats.db_seconds * 1000:.1f}, app;dur={(time.perf_counter() - stats.start) * 1000:.1f}",
+                )
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = route_label(scope)
+            REQUEST_SECONDS.observe((scope["method"], route, str(status)), time.perf_counter() - stats.start)
+            REQUEST_DB_SECONDS.observe((route,), stats.db_seconds)
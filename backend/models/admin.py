@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 class WorkerCreateIn(BaseModel):
@@ -78,4 +80,26 @@ class LocationUpdateIn(BaseModel):
 
 class ProductSiteLocationUpsertIn(BaseModel):
     site_id: int
-    location_id: int
\ No newline at end of file
+    location_id: int
+
+class SlowQueryThresholdIn(BaseModel):
+    threshold_ms: float = Field(ge=0)
+
+
+class LabelsJobIn(BaseModel):
+    site_id: int
+    product_ids: list[int] = Field(min_length=1)
+
+
+class SiteLabelsJobIn(BaseModel):
+    site_id: int | None = None
+
+
+class LogsExportJobIn(BaseModel):
+    format: Literal["csv", "ndjson", "parquet"] = "csv"
+    site_id: int | None = None
+    product_id: int | None = None
+    worker_id: int | None = None
+    action: Literal["load", "take"] | None = None
+    date_from: str | None = None
+    date_to: str | None = None
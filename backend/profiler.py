@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ROOT = Path(__file__).resolve().parents[1]
+
+PROFILE_HEADER = "x-profile"
+MAX_PROFILE_SECONDS = 60
+DEFAULT_INTERVAL = 0.005
+PROFILE_LOG_SIZE = 20
+
+# Leaf functions of threads that are waiting for work, not using CPU.
+IDLE_LEAVES = {"wait", "select", "poll", "_wait_for_tstate_lock"}
+
+
+# Every sample labels every frame of every thread, so the path work is
+# done once per function.
+@functools.lru_cache(maxsize=None)
+def code_label(filename: str, name: str) -> str:
+    path = Path(filename)
+    try:
+        module = path.relative_to(ROOT).as_posix()
+    except ValueError:
+        module = "/".join(path.parts[-2:])
+    return f"{module}:{name}"
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return code_label(code.co_filename, code.co_name)
+
+
+class Sampler:
+    # Wall-clock sampling profiler: a background thread records the stack
+    # of every other thread at a fixed interval. Stacks are kept in the
+    # collapsed format (root;...;leaf count) read by flamegraph.pl and
+    # speedscope.
+    #
+    # A request sampler (for_request) only records the request's own work:
+    # the event loop while the request's task runs on it, and the threads
+    # marked by ProfiledRoute while they run its endpoint.
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, include_idle: bool = False) -> None:
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.threads: set[int] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    @classmethod
+    def for_request(cls) -> Sampler:
+        # Called on the event loop, inside the request's task.
+        sampler = cls()
+        sampler.threads = set()
+        sampler._loop = asyncio.get_running_loop()
+        sampler._loop_thread = threading.get_ident()
+        sampler._task = asyncio.current_task()
+        return sampler
+
+    def _sampled(self, ident: int) -> bool:
+        if self.threads is None:
+            return True
+        if ident == self._loop_thread:
+            return asyncio.current_task(self._loop) is self._task
+        return ident in self.threads
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+
+        while not self._stop.is_set():
+            for ident, frame in sys._current_frames().items():
+                if ident == own or not self._sampled(ident):
+                    continue
+                if not self.include_idle and frame.f_code.co_name in IDLE_LEAVES:
+                    continue
+
+                labels = []
+                while frame is not None:
+                    labels.append(frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(labels))] += 1
+
+            self.samples += 1
+            self._stop.wait(self.interval)
+
+    def start(self) -> Sampler:
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+async def profile_for(seconds: float, interval: float = DEFAULT_INTERVAL, include_idle: bool = False) -> tuple[str, int]:
+    # The event loop stays free while the sampler runs.
+    sampler = Sampler(interval, include_idle).start()
+    await asyncio.sleep(seconds)
+    collapsed = sampler.stop()
+    return collapsed, sampler.samples
+
+
+# The sampler of the request being profiled. Starlette copies the context
+# into the threadpool, so sync endpoints see it as well.
+_request_sampler: ContextVar[Sampler | None] = ContextVar("request_sampler", default=None)
+
+
+@contextmanager
+def _marked_thread(sampler: Sampler) -> Iterator[None]:
+    ident = threading.get_ident()
+    sampler.threads.add(ident)
+    try:
+        yield
+    finally:
+        sampler.threads.discard(ident)
+
+
+def _marked_iter(sampler: Sampler, iterator) -> Iterator:
+    # Each next() may run on a different threadpool thread.
+    iterator = iter(iterator)
+    while True:
+        with _marked_thread(sampler):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def _mark_stream(sampler: Sampler, response) -> None:
+    # StreamingResponse has wrapped a sync body in iterate_in_threadpool
+    # already; the body generators (PDF pages, exports) are the work worth
+    # profiling, so the wrapped iterator is marked as well.
+    body = getattr(response, "body_iterator", None)
+    if not isinstance(response, StreamingResponse) or getattr(body, "ag_code", None) is not iterate_in_threadpool.__code__:
+        return
+    if body.ag_frame is None or body.ag_running or "iterator" not in body.ag_frame.f_locals:
+        return
+
+    response.body_iterator = iterate_in_threadpool(_marked_iter(sampler, body.ag_frame.f_locals["iterator"]))
+
+
+def _marks_thread(endpoint: Callable) -> Callable:
+    if inspect.iscoroutinefunction(endpoint) or getattr(endpoint, "_marks_thread", False):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        sampler = _request_sampler.get()
+        if sampler is None:
+            return endpoint(*args, **kwargs)
+
+        with _marked_thread(sampler):
+            response = endpoint(*args, **kwargs)
+
+        _mark_stream(sampler, response)
+        return response
+
+    wrapper._marks_thread = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    # Sync endpoints and the sync bodies of their streamed responses run on
+    # threadpool threads that the request sampler has to know about; async
+    # endpoints run in the request's task already.
+    def __init__(self, path: str, endpoint: Callable, **kwargs) -> None:
+        super().__init__(path, _marks_thread(endpoint), **kwargs)
+
+
+@dataclass(frozen=True)
+class RequestProfile:
+    id: str
+    method: str
+    path: str
+    status: int
+    duration_ms: float
+    samples: int
+    collapsed: str
+
+
+_profiles: deque[RequestProfile] = deque(maxlen=PROFILE_LOG_SIZE)
+
+
+def recent_profiles() -> list[RequestProfile]:
+    return list(reversed(_profiles))
+
+
+def get_profile(profile_id: str) -> RequestProfile | None:
+    return next((p for p in _profiles if p.id == profile_id), None)
+
+
+def _is_admin(authorization: str | None) -> bool:
+    from backend.logic.auth import get_current_user
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    try:
+        return int(get_current_user(token)["is_admin"]) == 1
+    except HTTPException:
+        return False
+
+
+# Profiles a single request when an admin sends "X-Profile: 1". The result
+# is kept in memory and its id returned in the X-Profile-Id header.
+class ProfileMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER, "") in ("", "0") or not await run_in_threadpool(
+            _is_admin, headers.get("authorization")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        start = time.perf_counter()
+        sampler = Sampler.for_request().start()
+        token = _request_sampler.set(sampler)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_sampler.reset(token)
+            collapsed = sampler.stop()
+            _profiles.append(
+                RequestProfile(
+                    id=profile_id,
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status,
+                    duration_ms=round((time.perf_counter() - start) * 1000, 1),
+                    samples=sampler.samples,
+                    collapsed=collapsed,
+                )
+            )
@@ -0,0 +1,74 @@
+from backend.repo.paging import PageRequest, SortKey, build_page
+
+PRODUCT_SITE_LOCATIONS_SELECT = """
+    SELECT
+        psl.site_id,
+        s.name AS site_name,
+        psl.product_id,
+        p.product_name,
+        psl.location_id,
+        l.shelf,
+        l.row
+    FROM product_site_locations psl
+    JOIN sites s ON s.id = psl.site_id
+    JOIN products p ON p.id = psl.product_id
+    JOIN locations l ON l.id = psl.location_id
+"""
+
+PRODUCT_SITE_LOCATION_SORTS = {
+    "product_name": [
+        SortKey("p.product_name", "product_name"),
+        SortKey("s.name", "site_name"),
+    ],
+    "site_name": [
+        SortKey("s.name", "site_name"),
+        SortKey("p.product_name", "product_name"),
+    ],
+    "location": [
+        SortKey("s.name", "site_name"),
+        SortKey("l.shelf", "shelf"),
+        SortKey("l.row", "row"),
+    ],
+}
+
+PRODUCT_SITE_LOCATION_TIE = [
+    SortKey("psl.site_id", "site_id"),
+    SortKey("psl.product_id", "product_id"),
+]
+
+
+def product_site_locations_page_sql(
+    page: PageRequest,
+    site_id: int | None = None,
+    category_id: int | None = None,
+    brand_id: int | None = None,
+    active: bool | None = None,
+) -> tuple[str, list, list[SortKey]]:
+    where = []
+    params: list = []
+
+    if site_id is not None:
+        where.append("psl.site_id = ?")
+        params.append(site_id)
+
+    if category_id is not None:
+        where.append("p.category_id = ?")
+        params.append(category_id)
+
+    if brand_id is not None:
+        where.append("p.brand_id = ?")
+        params.append(brand_id)
+
+    if active is not None:
+        where.append("p.active = ?")
+        params.append(int(active))
+
+    return build_page(
+        PRODUCT_SITE_LOCATIONS_SELECT,
+        where,
+        params,
+        PRODUCT_SITE_LOCATION_SORTS,
+        "product_name",
+        PRODUCT_SITE_LOCATION_TIE,
+        page,
+    )
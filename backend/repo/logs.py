@@ -1,39 +1,114 @@
 import sqlite3
+from typing import Iterator
+
+from backend.db import iter_chunks, rows_json
+
+LOGS_SELECT = """
+    SELECT
+      l.id,
+      l.action,
+      l.quantity,
+      l.timestamp AS created_at,
+      l.location_id,
+      loc.site_id,
+      s.name AS site_name,
+      loc.shelf,
+      loc.row,
+      l.worker_id,
+      w.first_name,
+      w.last_name,
+      w.username,
+      l.product_id,
+      p.product_name,
+      p.nc_nummer,
+      c.name AS category_name,
+      b.name AS brand_name
+    FROM logs l
+    JOIN locations loc ON loc.id = l.location_id
+    JOIN sites s ON s.id = loc.site_id
+    JOIN workers w ON w.id = l.worker_id
+    JOIN products p ON p.id = l.product_id
+    LEFT JOIN categories c ON c.id = p.category_id
+    LEFT JOIN brands b ON b.id = p.brand_id
+"""
+
+
+def logs_where(
+    site_id: int | None = None,
+    product_id: int | None = None,
+    worker_id: int | None = None,
+    action: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+) -> tuple[str, list]:
+    clauses = []
+    params: list = []
+
+    if site_id is not None:
+        clauses.append("loc.site_id = ?")
+        params.append(site_id)
+
+    if product_id is not None:
+        clauses.append("l.product_id = ?")
+        params.append(product_id)
+
+    if worker_id is not None:
+        clauses.append("l.worker_id = ?")
+        params.append(worker_id)
+
+    if action:
+        clauses.append("l.action = ?")
+        params.append(action)
+
+    # timestamps are stored as 'YYYY-MM-DD HH:MM:SS', so plain string
+    # comparison works for both dates and full timestamps.
+    if date_from:
+        clauses.append("l.timestamp >= ?")
+        params.append(date_from)
+
+    if date_to:
+        clauses.append("l.timestamp < ?")
+        params.append(date_to)
+
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where, params
+
+
+LOGS_PAGE_SQL = f"""
+    {LOGS_SELECT}
+    ORDER BY l.id DESC
+    LIMIT ? OFFSET ?
+"""
+
+
+def query_logs(con: sqlite3.Connection, limit: int = 50, offset: int = 0) -> sqlite3.Cursor:
+    return con.execute(LOGS_PAGE_SQL, (limit, offset))
+
+
+def logs_json(con: sqlite3.Connection, limit: int = 50, offset: int = 0) -> bytes:
+    return rows_json(con, LOGS_PAGE_SQL, (limit, offset), "q.id DESC")
 
 
 def list_logs(con: sqlite3.Connection, limit: int = 50, offset: int = 0) -> list[dict]:
-    rows = con.execute(
-        """
-        SELECT
-          l.id,
-          l.action,
-          l.quantity,
-          l.timestamp AS created_at,
-          l.location_id,
-          loc.site_id,
-          s.name AS site_name,
-          loc.shelf,
-          loc.row,
-          l.worker_id,
-          w.first_name,
-          w.last_name,
-          w.username,
-          l.product_id,
-          p.product_name,
-          p.nc_nummer,
-          c.name AS category_name,
-          b.name AS brand_name
-        FROM logs l
-        JOIN locations loc ON loc.id = l.location_id
-        JOIN sites s ON s.id = loc.site_id
-        JOIN workers w ON w.id = l.worker_id
-        JOIN products p ON p.id = l.product_id
-        LEFT JOIN categories c ON c.id = p.category_id
-        LEFT JOIN brands b ON b.id = p.brand_id
-        ORDER BY l.id DESC
-        LIMIT ? OFFSET ?
+    rows = query_logs(con, limit=limit, offset=offset).fetchall()
+    return [dict(r) for r in rows]
+
+
+def iter_logs(
+    con: sqlite3.Connection,
+    chunk_size: int = 500,
+    **filters,
+) -> tuple[list[str], Iterator[list[sqlite3.Row]]]:
+    where, params = logs_where(**filters)
+
+    cur = con.execute(
+        f"""
+        {LOGS_SELECT}
+        {where}
+        ORDER BY l.id
         """,
-        (limit, offset),
-    ).fetchall()
+        params,
+    )
 
-    return [dict(r) for r in rows]
\ No newline at end of file
+    columns = [d[0] for d in cur.description]
+    return columns, iter_chunks(cur, chunk_size)
@@ -0,0 +1,119 @@
+import base64
+import binascii
+import json
+import sqlite3
+from dataclasses import dataclass
+
+
+class InvalidPageError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class SortKey:
+    # expr is what SQLite orders by (keep it index-friendly); column is the
+    # output column holding the same value, default mirrors any COALESCE.
+    expr: str
+    column: str
+    default: object = None
+
+
+@dataclass(frozen=True)
+class PageRequest:
+    limit: int | None = None
+    cursor: str | None = None
+    sort: str | None = None
+    desc: bool = False
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidPageError("Invalid cursor")
+
+    if not isinstance(values, list):
+        raise InvalidPageError("Invalid cursor")
+
+    return values
+
+
+def build_page(
+    select_sql: str,
+    where: list[str],
+    params: list,
+    sorts: dict[str, list[SortKey]],
+    default_sort: str,
+    tie: list[SortKey],
+    page: PageRequest,
+) -> tuple[str, list, list[SortKey]]:
+    name = page.sort or default_sort
+    if name not in sorts:
+        raise InvalidPageError(f"Sort must be one of: {', '.join(sorts)}")
+
+    keys = sorts[name] + tie
+    where = list(where)
+    params = list(params)
+
+    # Keyset pagination: continue strictly after the last row of the
+    # previous page, so deep pages cost the same as the first one.
+    if page.cursor:
+        values = decode_cursor(page.cursor)
+        if len(values) != len(keys):
+            raise InvalidPageError("Invalid cursor")
+
+        op = "<" if page.desc else ">"
+        exprs = ", ".join(k.expr for k in keys)
+        marks = ", ".join("?" for _ in keys)
+        where.append(f"({exprs}) {op} ({marks})")
+        params.extend(values)
+
+    direction = "DESC" if page.desc else "ASC"
+    sql = select_sql
+
+    if where:
+        sql += "\nWHERE " + "\n  AND ".join(where)
+
+    sql += "\nORDER BY " + ", ".join(f"{k.expr} {direction}" for k in keys)
+
+    if page.limit is not None:
+        sql += "\nLIMIT ?"
+        params.append(page.limit)
+
+    return sql, params, keys
+
+
+def sql_literal(value: object) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def output_order(keys: list[SortKey], desc: bool = False, alias: str = "q") -> str:
+    # The ORDER BY of build_page, written over the output columns of its
+    # query (for wrapping it in a subquery).
+    direction = "DESC" if desc else "ASC"
+    return ", ".join(
+        f'{alias}."{k.column}" {direction}'
+        if k.default is None
+        else f'COALESCE({alias}."{k.column}", {sql_literal(k.default)}) {direction}'
+        for k in keys
+    )
+
+
+def next_cursor(rows: list[sqlite3.Row], keys: list[SortKey], limit: int | None) -> str | None:
+    if limit is None or len(rows) < limit:
+        return None
+
+    last = rows[-1]
+    return encode_cursor(
+        [k.default if last[k.column] is None else last[k.column] for k in keys]
+    )
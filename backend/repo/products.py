@@ -1,7 +1,83 @@
 import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+from backend.repo.paging import PageRequest, SortKey, build_page
+
+PRODUCTS_SELECT = """
+    SELECT
+      p.id,
+      p.category_id,
+      c.name AS category_name,
+      p.brand_id,
+      b.name AS brand_name,
+      p.product_name,
+      p.nc_nummer,
+      p.active
+    FROM products p
+    LEFT JOIN categories c ON c.id = p.category_id
+    LEFT JOIN brands b ON b.id = p.brand_id
+"""
+
+PRODUCTS_SQL = PRODUCTS_SELECT + "ORDER BY p.id"
+
+PRODUCT_SORTS = {
+    "id": [],
+    "product_name": [SortKey("p.product_name", "product_name")],
+    "nc_nummer": [SortKey("COALESCE(p.nc_nummer, '')", "nc_nummer", "")],
+    "category_name": [SortKey("COALESCE(c.name, '')", "category_name", "")],
+    "brand_name": [SortKey("COALESCE(b.name, '')", "brand_name", "")],
+}
+
+PRODUCT_TIE = [SortKey("p.id", "id")]
+
+
+def query_products(con: sqlite3.Connection) -> sqlite3.Cursor:
+    return con.execute(PRODUCTS_SQL)
 
 
 def list_products(con: sqlite3.Connection) -> list[dict]:
+    rows = query_products(con).fetchall()
+    return [dict(r) for r in rows]
+
+
+def products_page_sql(
+    page: PageRequest,
+    category_id: int | None = None,
+    brand_id: int | None = None,
+    active: bool | None = None,
+) -> tuple[str, list, list[SortKey]]:
+    where = []
+    params: list = []
+
+    if category_id is not None:
+        where.append("p.category_id = ?")
+        params.append(category_id)
+
+    if brand_id is not None:
+        where.append("p.brand_id = ?")
+        params.append(brand_id)
+
+    if active is not None:
+        where.append("p.active = ?")
+        params.append(int(active))
+
+    return build_page(PRODUCTS_SELECT, where, params, PRODUCT_SORTS, "id", PRODUCT_TIE, page)
+
+
+def fts_query(text: str) -> str | None:
+    # Every word becomes a quoted prefix term; FTS5 ANDs them together.
+    terms = [t.replace('"', '""') for t in (text or "").split()]
+    if not terms:
+        return None
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def search_products(con: sqlite3.Connection, text: str, limit: int = 20) -> list[dict]:
+    match = fts_query(text)
+    if match is None:
+        return []
+
     rows = con.execute(
         """
         SELECT
@@ -13,10 +89,92 @@ def list_products(con: sqlite3.Connection) -> list[dict]:
           p.product_name,
           p.nc_nummer,
           p.active
-        FROM products p
+        FROM products_fts f
+        JOIN products p ON p.id = f.rowid
         LEFT JOIN categories c ON c.id = p.category_id
         LEFT JOIN brands b ON b.id = p.brand_id
-        ORDER BY p.id
+        WHERE products_fts MATCH ?
+          AND p.active = 1
+        ORDER BY bm25(products_fts, 10.0, 5.0, 2.0, 1.0), p.id
+        LIMIT ?
+        """,
+        (match, limit),
+    ).fetchall()
+
+    return [dict(r) for r in rows]
+
+
+@contextmanager
+def bulk_product_inserts(con: sqlite3.Connection) -> Iterator[None]:
+    # products_fts_ai indexes inserted products one trigger run at a time,
+    # about four times slower than indexing them with one statement. For a
+    # bulk insert the trigger is dropped, the new rows are indexed at the
+    # end and the trigger is created again. Use inside a transaction: other
+    # connections never see the schema without the trigger, and a rollback
+    # restores it.
+    trigger = con.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'products_fts_ai'"
+    ).fetchone()
+
+    if trigger is None:
+        yield
+        return
+
+    last_id = con.execute("SELECT COALESCE(MAX(id), 0) FROM products").fetchone()[0]
+    con.execute("DROP TRIGGER products_fts_ai")
+
+    yield
+
+    con.execute(
+        """
+        INSERT INTO products_fts(rowid, product_name, nc_nummer, brand_name, category_name)
+        SELECT p.id, p.product_name, p.nc_nummer, b.name, c.name
+        FROM products p
+        LEFT JOIN brands b ON b.id = p.brand_id
+        LEFT JOIN categories c ON c.id = p.category_id
+        WHERE p.id > ?
+        """,
+        (last_id,),
+    )
+    con.execute(trigger[0])
+
+
+def get_product(con: sqlite3.Connection, product_id: int) -> dict | None:
+    row = con.execute(
         """
+        SELECT id, product_name, nc_nummer, active
+        FROM products
+        WHERE id = ?
+        """,
+        (product_id,),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def list_products_by_ids(con: sqlite3.Connection, ids: list[int]) -> list[dict]:
+    if not ids:
+        return []
+
+    placeholders = ",".join(["?"] * len(ids))
+    rows = con.execute(
+        f"""
+        SELECT
+          p.id,
+          p.category_id,
+          c.name AS category_name,
+          p.brand_id,
+          b.name AS brand_name,
+          p.product_name,
+          p.nc_nummer,
+          p.active
+        FROM products p
+        LEFT JOIN categories c ON c.id = p.category_id
+        LEFT JOIN brands b ON b.id = p.brand_id
+        WHERE p.id IN ({placeholders})
+          AND p.active = 1
+        """,
+        ids,
     ).fetchall()
-    return [dict(r) for r in rows]
\ No newline at end of file
+
+    by_id = {r["id"]: dict(r) for r in rows}
+    return [by_id[i] for i in ids if i in by_id]
@@ -1,82 +1,171 @@
 import sqlite3
+from typing import Iterator
 
+from backend.db import iter_chunks, rows_json
+from backend.repo.paging import PageRequest, SortKey, build_page
 
-def list_stock_for_site(con: sqlite3.Connection, site_id: int) -> list[dict]:
-    rows = con.execute(
-        """
-        SELECT
-          p.id AS product_id,
-          p.product_name,
-          p.nc_nummer,
-          p.category_id,
-          c.name AS category_name,
-          p.brand_id,
-          b.name AS brand_name,
-          psl.location_id,
-          loc.site_id,
-          st.name AS site_name,
-          loc.shelf,
-          loc.row,
-          COALESCE(s.quantity, 0) AS quantity
-        FROM products p
-        LEFT JOIN categories c ON c.id = p.category_id
-        LEFT JOIN brands b ON b.id = p.brand_id
-        JOIN sites st ON st.id = ?
-        LEFT JOIN product_site_locations psl
-          ON psl.product_id = p.id
-         AND psl.site_id = st.id
-        LEFT JOIN locations loc
-          ON loc.id = psl.location_id
-         AND loc.site_id = st.id
-         AND loc.active = 1
-        LEFT JOIN stock s
-          ON s.product_id = p.id
-         AND s.location_id = loc.id
-        WHERE p.active = 1
-          AND st.active = 1
-        ORDER BY p.id, loc.shelf, loc.row, loc.id
-        """,
-        (site_id,),
-    ).fetchall()
+STOCK_FOR_SITE_SELECT = """
+    SELECT
+      p.id AS product_id,
+      p.product_name,
+      p.nc_nummer,
+      p.category_id,
+      c.name AS category_name,
+      p.brand_id,
+      b.name AS brand_name,
+      psl.location_id,
+      loc.site_id,
+      st.name AS site_name,
+      loc.shelf,
+      loc.row,
+      COALESCE(s.quantity, 0) AS quantity
+    FROM products p
+    LEFT JOIN categories c ON c.id = p.category_id
+    LEFT JOIN brands b ON b.id = p.brand_id
+    JOIN sites st ON st.id = ?
+    LEFT JOIN product_site_locations psl
+      ON psl.product_id = p.id
+     AND psl.site_id = st.id
+    LEFT JOIN locations loc
+      ON loc.id = psl.location_id
+     AND loc.site_id = st.id
+     AND loc.active = 1
+    LEFT JOIN stock s
+      ON s.product_id = p.id
+     AND s.location_id = loc.id
+"""
+
+STOCK_FOR_SITE_SQL = STOCK_FOR_SITE_SELECT + """
+    WHERE p.active = 1
+      AND st.active = 1
+    ORDER BY p.id, loc.shelf, loc.row, loc.id
+"""
+
+# product_site_locations has one row per (site, product), so the per-site
+# stock list has exactly one row per product and p.id is a unique tie-breaker.
+STOCK_SORTS = {
+    "product_id": [],
+    "product_name": [SortKey("p.product_name", "product_name")],
+    "nc_nummer": [SortKey("COALESCE(p.nc_nummer, '')", "nc_nummer", "")],
+    "category_name": [SortKey("COALESCE(c.name, '')", "category_name", "")],
+    "brand_name": [SortKey("COALESCE(b.name, '')", "brand_name", "")],
+    "quantity": [SortKey("COALESCE(s.quantity, 0)", "quantity", 0)],
+    "location": [
+        SortKey("COALESCE(loc.shelf, -1)", "shelf", -1),
+        SortKey("COALESCE(loc.row, -1)", "row", -1),
+    ],
+}
+
+STOCK_TIE = [SortKey("p.id", "product_id")]
+
+STOCK_COMBINED_SQL = """
+    SELECT
+      p.id AS product_id,
+      p.product_name,
+      p.nc_nummer,
+      p.category_id,
+      c.name AS category_name,
+      p.brand_id,
+      b.name AS brand_name,
+      psl.location_id,
+      st.id AS site_id,
+      st.name AS site_name,
+      loc.shelf,
+      loc.row,
+      COALESCE(s.quantity, 0) AS quantity
+    FROM products p
+    CROSS JOIN sites st
+    LEFT JOIN categories c ON c.id = p.category_id
+    LEFT JOIN brands b ON b.id = p.brand_id
+    LEFT JOIN product_site_locations psl
+      ON psl.product_id = p.id
+     AND psl.site_id = st.id
+    LEFT JOIN locations loc
+      ON loc.id = psl.location_id
+     AND loc.site_id = st.id
+     AND loc.active = 1
+    LEFT JOIN stock s
+      ON s.product_id = p.id
+     AND s.location_id = loc.id
+    WHERE p.active = 1
+      AND st.active = 1
+    ORDER BY p.id, st.name, loc.shelf, loc.row, loc.id
+"""
+
+
+# The ORDER BY of the queries above, over their output columns.
+STOCK_COMBINED_ORDER = "q.product_id, q.site_name, q.shelf, q.row, q.location_id"
+STOCK_FOR_SITE_ORDER = "q.product_id, q.shelf, q.row, q.location_id"
+
+
+def stock_sql(site_id: int | None = None) -> tuple[str, tuple]:
+    if site_id is None:
+        return STOCK_COMBINED_SQL, ()
+    return STOCK_FOR_SITE_SQL, (site_id,)
+
+
+def query_stock(con: sqlite3.Connection, site_id: int | None = None) -> sqlite3.Cursor:
+    return con.execute(*stock_sql(site_id))
+
+
+def stock_json(con: sqlite3.Connection, site_id: int | None = None) -> bytes:
+    order = STOCK_COMBINED_ORDER if site_id is None else STOCK_FOR_SITE_ORDER
+    return rows_json(con, *stock_sql(site_id), order)
 
+
+def list_stock_for_site(con: sqlite3.Connection, site_id: int) -> list[dict]:
+    rows = query_stock(con, site_id).fetchall()
     return [dict(r) for r in rows]
 
 
 def list_stock_combined(con: sqlite3.Connection) -> list[dict]:
-    rows = con.execute(
-        """
-        SELECT
-          p.id AS product_id,
-          p.product_name,
-          p.nc_nummer,
-          p.category_id,
-          c.name AS category_name,
-          p.brand_id,
-          b.name AS brand_name,
-          psl.location_id,
-          st.id AS site_id,
-          st.name AS site_name,
-          loc.shelf,
-          loc.row,
-          COALESCE(s.quantity, 0) AS quantity
-        FROM products p
-        CROSS JOIN sites st
-        LEFT JOIN categories c ON c.id = p.category_id
-        LEFT JOIN brands b ON b.id = p.brand_id
-        LEFT JOIN product_site_locations psl
-          ON psl.product_id = p.id
-         AND psl.site_id = st.id
-        LEFT JOIN locations loc
-          ON loc.id = psl.location_id
-         AND loc.site_id = st.id
-         AND loc.active = 1
-        LEFT JOIN stock s
-          ON s.product_id = p.id
-         AND s.location_id = loc.id
-        WHERE p.active = 1
-          AND st.active = 1
-        ORDER BY p.id, st.name, loc.shelf, loc.row, loc.id
-        """
-    ).fetchall()
-
-    return [dict(r) for r in rows]
\ No newline at end of file
+    rows = query_stock(con).fetchall()
+    return [dict(r) for r in rows]
+
+
+def stock_page_sql(
+    site_id: int,
+    page: PageRequest,
+    category_id: int | None = None,
+    brand_id: int | None = None,
+    has_location: bool | None = None,
+    min_quantity: int | None = None,
+    max_quantity: int | None = None,
+) -> tuple[str, list, list[SortKey]]:
+    where = ["p.active = 1", "st.active = 1"]
+    params: list = [site_id]
+
+    if category_id is not None:
+        where.append("p.category_id = ?")
+        params.append(category_id)
+
+    if brand_id is not None:
+        where.append("p.brand_id = ?")
+        params.append(brand_id)
+
+    if has_location is True:
+        where.append("loc.id IS NOT NULL")
+    elif has_location is False:
+        where.append("loc.id IS NULL")
+
+    if min_quantity is not None:
+        where.append("COALESCE(s.quantity, 0) >= ?")
+        params.append(min_quantity)
+
+    if max_quantity is not None:
+        where.append("COALESCE(s.quantity, 0) <= ?")
+        params.append(max_quantity)
+
+    return build_page(
+        STOCK_FOR_SITE_SELECT, where, params, STOCK_SORTS, "product_id", STOCK_TIE, page
+    )
+
+
+def iter_stock(
+    con: sqlite3.Connection,
+    site_id: int | None = None,
+    chunk_size: int = 500,
+) -> tuple[list[str], Iterator[list[sqlite3.Row]]]:
+    cur = query_stock(con, site_id)
+    columns = [d[0] for d in cur.description]
+    return columns, iter_chunks(cur, chunk_size)
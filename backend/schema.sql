@@ -11,7 +11,7 @@ CREATE TABLE IF NOT EXISTS locations (
   site_id INTEGER NOT NULL,
   shelf INTEGER NOT NULL,
   row INTEGER NOT NULL,
-  active INTEGER NOT NULL DEF-AULT 1 CHECK (active IN (0,1)),
+  active INTEGER NOT NULL DEFAULT 1 CHECK (active IN (0,1)),
   UNIQUE (site_id, shelf, row),
   FOREIGN KEY (site_id) REFERENCES sites(id)
 );
@@ -87,4 +87,108 @@ CREATE TABLE IF NOT EXISTS logs (
   FOREIGN KEY (location_id) REFERENCES locations(id),
   FOREIGN KEY (worker_id) REFERENCES workers(id),
   FOREIGN KEY (product_id) REFERENCES products(id)
-);
\ No newline at end of file
+);
+
+-- Full-text search over the product catalog. rowid = products.id.
+-- Kept in sync by the triggers below, so admin edits and import scripts
+-- are picked up without application code.
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+  product_name,
+  nc_nummer,
+  brand_name,
+  category_name,
+  tokenize = 'unicode61 remove_diacritics 2',
+  prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products
+BEGIN
+  INSERT INTO products_fts(rowid, product_name, nc_nummer, brand_name, category_name)
+  SELECT
+    new.id,
+    new.product_name,
+    new.nc_nummer,
+    (SELECT name FROM brands WHERE id = new.brand_id),
+    (SELECT name FROM categories WHERE id = new.category_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products
+BEGIN
+  DELETE FROM products_fts WHERE rowid = old.id;
+  INSERT INTO products_fts(rowid, product_name, nc_nummer, brand_name, category_name)
+  SELECT
+    new.id,
+    new.product_name,
+    new.nc_nummer,
+    (SELECT name FROM brands WHERE id = new.brand_id),
+    (SELECT name FROM categories WHERE id = new.category_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products
+BEGIN
+  DELETE FROM products_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_brand_au AFTER UPDATE OF name ON brands
+BEGIN
+  UPDATE products_fts
+  SET brand_name = new.name
+  WHERE rowid IN (SELECT id FROM products WHERE brand_id = new.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_category_au AFTER UPDATE OF name ON categories
+BEGIN
+  UPDATE products_fts
+  SET category_name = new.name
+  WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id);
+END;
+
+-- Backfill products that existed before products_fts was created.
+INSERT INTO products_fts(rowid, product_name, nc_nummer, brand_name, category_name)
+SELECT
+  p.id,
+  p.product_name,
+  p.nc_nummer,
+  b.name,
+  c.name
+FROM products p
+LEFT JOIN brands b ON b.id = p.brand_id
+LEFT JOIN categories c ON c.id = p.category_id
+WHERE p.id NOT IN (SELECT rowid FROM products_fts);
+
+-- Filters and sort orders of the paged product and stock lists.
+CREATE INDEX IF NOT EXISTS idx_products_category ON products(category_id);
+CREATE INDEX IF NOT EXISTS idx_products_brand ON products(brand_id);
+CREATE INDEX IF NOT EXISTS idx_products_name ON products(product_name);
+
+-- Foreign keys and filters of the hot queries, found with
+-- benchmarks/query_plans.py. SQLite does not index foreign keys itself;
+-- without these, every insert or delete of a product, location or worker
+-- scans the child tables, and the log filters scan all of logs.
+CREATE INDEX IF NOT EXISTS idx_logs_product ON logs(product_id);
+CREATE INDEX IF NOT EXISTS idx_logs_worker ON logs(worker_id);
+CREATE INDEX IF NOT EXISTS idx_logs_location ON logs(location_id);
+CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_locations_site_active ON locations(site_id, active);
+CREATE INDEX IF NOT EXISTS idx_psl_location ON product_site_locations(location_id);
+CREATE INDEX IF NOT EXISTS idx_psl_product ON product_site_locations(product_id);
+CREATE INDEX IF NOT EXISTS idx_stock_product ON stock(product_id);
+CREATE INDEX IF NOT EXISTS idx_products_active ON products(active);
+
+-- The jobs table is created by backend/jobs.py when the server starts.
+
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+  source TEXT PRIMARY KEY,
+  signature TEXT NOT NULL,
+  offset INTEGER NOT NULL,
+  rows INTEGER NOT NULL,
+  counts TEXT NOT NULL,
+  updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS import_keys (
+  source TEXT NOT NULL,
+  key TEXT NOT NULL,
+  value TEXT,
+  PRIMARY KEY (source, key)
+) WITHOUT ROWID;
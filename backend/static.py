@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from backend.compression import brotli, choose_encoding, compress, is_compressible
+
+ROOT = Path(__file__).resolve().parents[1]
+FRONTEND_DIR = ROOT / "frontend"
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+ASSET_URL_RE = re.compile(r'((?:src|href)=")(/(?:css|js|assets)/[^"?#]+)(")')
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    body: bytes
+    media_type: str
+    version: str
+    encoded: dict[str, bytes]
+
+    def etag(self, encoding: str | None = None) -> str:
+        # Each encoding is its own representation and needs its own tag, or
+        # a cache could answer a gzip request with the brotli body.
+        if encoding is None:
+            return f'"{self.version}"'
+        return f'"{self.version}-{encoding}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def build_asset(body: bytes, media_type: str) -> StaticAsset:
+    encoded = {}
+
+    if is_compressible(media_type):
+        encoded["gzip"] = compress(body, "gzip")
+        if brotli is not None:
+            encoded["br"] = compress(body, "br")
+
+        # Tiny files can grow when compressed.
+        encoded = {k: v for k, v in encoded.items() if len(v) < len(body)}
+
+    version = hashlib.sha256(body).hexdigest()[:12]
+    return StaticAsset(body=body, media_type=media_type, version=version, encoded=encoded)
+
+
+def media_type_for(path: Path) -> str:
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+@lru_cache(maxsize=None)
+def frontend_assets() -> dict[str, StaticAsset]:
+    # Loaded and compressed once per process, keyed by URL path.
+    assets = {}
+
+    for mount in ("assets", "css", "js"):
+        for path in sorted((FRONTEND_DIR / mount).rglob("*")):
+            if path.is_file():
+                url = "/" + path.relative_to(FRONTEND_DIR).as_posix()
+                assets[url] = build_asset(path.read_bytes(), media_type_for(path))
+
+    return assets
+
+
+@lru_cache(maxsize=None)
+def html_page(name: str) -> StaticAsset:
+    assets = frontend_assets()
+    html = (FRONTEND_DIR / name).read_text(encoding="utf-8")
+
+    # Stamp every local asset URL with its content hash so browsers can cache
+    # it forever and still pick up a new version after a deploy.
+    def stamp(m: re.Match) -> str:
+        asset = assets.get(m.group(2))
+        if asset is None:
+            return m.group(0)
+        return f"{m.group(1)}{m.group(2)}?v={asset.version}{m.group(3)}"
+
+    body = ASSET_URL_RE.sub(stamp, html).encode("utf-8")
+    return build_asset(body, "text/html; charset=utf-8")
+
+
+def asset_response(asset: StaticAsset, scope: Scope, immutable: bool = False) -> Response:
+    request_headers = Headers(scope=scope)
+
+    encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+    if encoding not in asset.encoded:
+        encoding = None
+
+    headers = {
+        "ETag": asset.etag(encoding),
+        "Cache-Control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+        "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(request_headers.get("if-none-match", ""), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is None:
+        return Response(asset.body, media_type=asset.media_type, headers=headers)
+
+    headers["Content-Encoding"] = encoding
+    return Response(asset.encoded[encoding], media_type=asset.media_type, headers=headers)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    def __init__(self, *, directory: Path, **kwargs) -> None:
+        super().__init__(directory=directory, **kwargs)
+        self.url_prefix = "/" + Path(directory).relative_to(FRONTEND_DIR).as_posix()
+        frontend_assets()
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = frontend_assets().get(f"{self.url_prefix}/{Path(path).as_posix()}")
+
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        query = scope.get("query_string", b"").decode("latin-1")
+        immutable = f"v={asset.version}" in query.split("&")
+        return asset_response(asset, scope, immutable=immutable)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+sys.path.insert(0, str(ROOT))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from backend.api.responses import FastJSONResponse  # noqa: E402
+from backend.repo.stock import list_stock_combined, stock_json  # noqa: E402
+from synthetic_db import Scale, generate  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare JSON serialization paths on list_stock_combined.",
+    )
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--sites", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    return parser.parse_args()
+
+
+def build_db(path: Path, n_products: int, n_sites: int) -> sqlite3.Connection:
+    generate(
+        path,
+        Scale(
+            sites=n_sites,
+            products=n_products,
+            locations=n_sites * 400,
+            workers=1,
+            logs=0,
+            mapped=0.7,
+        ),
+    )
+    con = sqlite3.connect(str(path))
+    con.row_factory = sqlite3.Row
+    return con
+
+
+def current_path(con: sqlite3.Connection) -> bytes:
+    return JSONResponse(jsonable_encoder(list_stock_combined(con))).body
+
+
+def dicts_fast_encoder(con: sqlite3.Connection) -> bytes:
+    return FastJSONResponse(list_stock_combined(con)).body
+
+
+def rows_json_path(con: sqlite3.Connection) -> bytes:
+    return FastJSONResponse(stock_json(con)).body
+
+
+def measure(fn, con: sqlite3.Connection, repeat: int) -> tuple[list[float], int]:
+    size = len(fn(con))
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(con)
+        timings.append(time.perf_counter() - start)
+
+    return timings, size
+
+
+def main() -> None:
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        con = build_db(Path(tmp) / "bench.db", args.products, args.sites)
+
+        try:
+            rows = len(list_stock_combined(con))
+            print(f"list_stock_combined: {rows} rows, repeat={args.repeat}")
+            print(f"{'path':<24} {'median ms':>10} {'p95 ms':>10} {'bytes':>10}")
+
+            baseline = None
+            for name, fn in (
+                ("jsonable_encoder+json", current_path),
+                ("dicts+FastJSONResponse", dicts_fast_encoder),
+                ("rows_json", rows_json_path),
+            ):
+                timings, size = measure(fn, con, args.repeat)
+                median = statistics.median(timings) * 1000
+                p95 = statistics.quantiles(timings, n=20)[-1] * 1000
+                baseline = baseline or median
+                print(
+                    f"{name:<24} {median:>10.1f} {p95:>10.1f} {size:>10}"
+                    f"   x{baseline / median:.1f}"
+                )
+        finally:
+            con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+sys.path.insert(0, str(ROOT))
+
+from synthetic_db import DB_CACHE_DIR, DEFAULT_PASSWORD, SCALES, cached_database  # noqa: E402
+
+ACTIONS = ("login", "resolve", "resolve_site", "take", "load", "stock")
+DEFAULT_MIX = "resolve=40,resolve_site=10,take=15,load=15,stock=15,login=5"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Drive backend.main:app with concurrent scanner-like virtual users.",
+    )
+    parser.add_argument("--db", type=Path, help="database to copy, instead of a synthetic one")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-dir", type=Path, default=DB_CACHE_DIR)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="password of the workers")
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per run")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--think-ms", type=float, default=100.0, help="pause between requests of a user")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted actions, e.g. resolve=40,take=15")
+    parser.add_argument("--workers", default="1", help="uvicorn worker counts to compare, e.g. 1,2,4")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    return parser.parse_args()
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ACTIONS:
+            raise SystemExit(f"Unknown action {name!r}, expected one of: {', '.join(ACTIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+@dataclass
+class Workload:
+    usernames: list[str]
+    sites: list[str]
+    products: dict[str, list[int]]
+    site_ids: dict[str, int]
+
+
+def load_workload(db_path: Path) -> Workload:
+    con = sqlite3.connect(str(db_path))
+    try:
+        usernames = [
+            r[0]
+            for r in con.execute(
+                "SELECT username FROM workers WHERE is_active = 1 AND password_hash IS NOT NULL ORDER BY id"
+            )
+        ]
+        sites = con.execute("SELECT id, name FROM sites WHERE active = 1 ORDER BY id").fetchall()
+        products = {}
+        for site_id, name in sites:
+            products[name] = [
+                r[0]
+                for r in con.execute(
+                    """
+                    SELECT psl.product_id
+                    FROM product_site_locations psl
+                    JOIN products p ON p.id = psl.product_id
+                    JOIN locations l ON l.id = psl.location_id
+                    WHERE psl.site_id = ? AND p.active = 1 AND l.active = 1
+                    """,
+                    (site_id,),
+                )
+            ]
+    finally:
+        con.close()
+
+    sites = [(i, n) for i, n in sites if products[n]]
+    if not usernames or not sites:
+        raise SystemExit(f"{db_path} has no workers with a password or no mapped products")
+
+    return Workload(
+        usernames=usernames,
+        sites=[n for _, n in sites],
+        products=products,
+        site_ids={n: i for i, n in sites},
+    )
+
+
+@dataclass
+class Sample:
+    action: str
+    status: int
+    elapsed: float
+
+
+class VirtualUser:
+    # One scanner: logs in once, then picks weighted actions on its own
+    # keep-alive connection until the run ends.
+
+    def __init__(self, n: int, port: int, workload: Workload, mix: dict[str, float], args) -> None:
+        self.port = port
+        self.workload = workload
+        self.args = args
+        self.rnd = random.Random(n)
+        self.username = workload.usernames[n % len(workload.usernames)]
+        self.site = workload.sites[n % len(workload.sites)]
+        self.actions = list(mix)
+        self.weights = list(mix.values())
+        self.samples: list[Sample] = []
+        self.token = None
+        self.conn = None
+
+    def request(self, action: str, method: str, path: str, body: dict | None = None) -> dict | None:
+        headers = {"Accept-Encoding": "gzip"}
+        data = None
+        if body is not None:
+            data = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        start = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+            self.conn.request(method, path, body=data, headers=headers)
+            resp = self.conn.getresponse()
+            payload = resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+            status, payload = 0, b""
+
+        self.samples.append(Sample(action, status, time.perf_counter() - start))
+
+        if action == "login" and status == 200:
+            return json.loads(payload)
+        return None
+
+    def login(self) -> None:
+        out = self.request(
+            "login",
+            "POST",
+            "/api/auth/login",
+            {"username": self.username, "password": self.args.password},
+        )
+        if out:
+            self.token = out["access_token"]
+
+    def step(self, action: str) -> None:
+        product_id = self.rnd.choice(self.workload.products[self.site])
+        site_id = self.workload.site_ids[self.site]
+
+        if action == "login":
+            self.login()
+        elif action == "resolve":
+            self.request(action, "GET", f"/api/resolve?code={site_id}-{product_id}")
+        elif action == "resolve_site":
+            self.request(action, "GET", f"/api/{self.site}/products/{product_id}/resolve")
+        elif action in ("take", "load"):
+            self.request(
+                action,
+                "POST",
+                f"/api/{self.site}/{action}",
+                {"product_id": product_id, "quantity": self.rnd.randint(1, 3)},
+            )
+        elif action == "stock":
+            self.request(action, "GET", f"/api/{self.site}/stock")
+
+    def run(self, start_at: float, deadline: float) -> None:
+        time.sleep(max(0.0, start_at - time.perf_counter()))
+        self.login()
+        think = self.args.think_ms / 1000
+
+        while time.perf_counter() < deadline:
+            self.step(self.rnd.choices(self.actions, self.weights)[0])
+            if think:
+                time.sleep(self.rnd.uniform(0.5, 1.5) * think)
+
+        if self.conn is not None:
+            self.conn.close()
+
+
+@dataclass
+class Server:
+    process: subprocess.Popen
+    log_path: Path
+    log_file: object = field(repr=False)
+
+    def stop(self) -> str:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log_file.close()
+        return self.log_path.read_text(encoding="utf-8", errors="replace")
+
+
+def start_server(db_path: Path, workers: int, port: int, log_path: Path) -> Server:
+    log_file = open(log_path, "w", encoding="utf-8")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "backend.main:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--workers", str(workers),
+            "--log-level", "warning",
+            "--no-access-log",
+        ],
+        cwd=ROOT,
+        env={**os.environ, "LAGER_DB_PATH": str(db_path)},
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    server = Server(process, log_path, log_file)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited:\n{server.stop()}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", "/health")
+                if conn.getresponse().status == 200:
+                    return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+
+    raise SystemExit(f"uvicorn did not start:\n{server.stop()}")
+
+
+def percentile(values: list[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+def summarize(samples: list[Sample], seconds: float) -> dict[str, dict]:
+    by_action: dict[str, list[Sample]] = {}
+    for s in samples:
+        by_action.setdefault(s.action, []).append(s)
+    by_action["all"] = samples
+
+    report = {}
+    for action, items in by_action.items():
+        times = [s.elapsed * 1000 for s in items]
+        n = len(items)
+        report[action] = {
+            "requests": n,
+            "rps": round(n / seconds, 1),
+            "p50_ms": round(percentile(times, 50), 2),
+            "p95_ms": round(percentile(times, 95), 2),
+            "p99_ms": round(percentile(times, 99), 2),
+            "client_errors": sum(1 for s in items if 400 <= s.status < 500),
+            "busy": sum(1 for s in items if s.status == 503),
+            "errors": sum(1 for s in items if s.status == 0 or (s.status >= 500 and s.status != 503)),
+        }
+    return report
+
+
+def print_report(workers: int, report: dict, locked_in_log: int) -> None:
+    print(f"\nuvicorn --workers {workers}")
+    print(
+        f"{'endpoint':<14} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        f" {'4xx':>6} {'busy':>7} {'errors':>7}"
+    )
+
+    for action, r in report.items():
+        n = r["requests"] or 1
+        print(
+            f"{action:<14} {r['requests']:>9} {r['rps']:>8} {r['p50_ms']:>9} {r['p95_ms']:>9}"
+            f" {r['p99_ms']:>9} {r['client_errors']:>6}"
+            f" {r['busy'] / n:>6.1%} {r['errors'] / n:>6.1%}"
+        )
+
+    if locked_in_log:
+        print(f"'database is locked' in server log: {locked_in_log}")
+
+
+def run(workers: int, source: Path, workload: Workload, mix: dict[str, float], args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        # Bookings write, so every run starts from the same data.
+        db_path = Path(tmp) / "load.db"
+        shutil.copyfile(source, db_path)
+
+        server = start_server(db_path, workers, args.port, Path(tmp) / "server.log")
+        try:
+            users = [VirtualUser(n, args.port, workload, mix, args) for n in range(args.users)]
+            start = time.perf_counter()
+            deadline = start + args.duration
+            step = args.ramp_up / max(1, len(users))
+            threads = [
+                threading.Thread(target=u.run, args=(start + i * step, deadline), daemon=True)
+                for i, u in enumerate(users)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            seconds = time.perf_counter() - start
+        finally:
+            log = server.stop()
+
+    samples = [s for u in users for s in u.samples]
+    report = summarize(samples, seconds)
+    locked = log.count("database is locked")
+    print_report(workers, report, locked)
+
+    return {"workers": workers, "seconds": round(seconds, 1), "locked_in_log": locked, "endpoints": report}
+
+
+def main() -> None:
+    args = parse_args()
+    mix = parse_mix(args.mix)
+    worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+
+    source = args.db or cached_database(args.scale, args.seed, args.db_dir)
+    workload = load_workload(source)
+
+    print(
+        f"{source}: {args.users} users, {args.duration:.0f}s per run, "
+        f"think {args.think_ms:.0f} ms, mix {args.mix}"
+    )
+
+    runs = [run(w, source, workload, mix, args) for w in worker_counts]
+
+    if len(runs) > 1:
+        print(f"\n{'workers':>7} {'req/s':>8} {'p95 ms':>9} {'busy':>7} {'errors':>7}")
+        for r in runs:
+            total = r["endpoints"]["all"]
+            n = total["requests"] or 1
+            print(
+                f"{r['workers']:>7} {total['rps']:>8} {total['p95_ms']:>9}"
+                f" {total['busy'] / n:>6.1%} {total['errors'] / n:>6.1%}"
+            )
+
+    if args.json:
+        args.json.write_text(
+            json.dumps({"args": {k: str(v) for k, v in vars(args).items()}, "runs": runs}, indent=2) + "\n",
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    main()
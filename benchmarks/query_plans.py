@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCHEMA_PATH = ROOT / "backend" / "schema.sql"
+
+sys.path.insert(0, str(ROOT))
+
+# Drives every endpoint against a seeded throwaway database, records each SQL
+# statement through a connection hook and exits 1 when EXPLAIN QUERY PLAN
+# shows a full scan of a large table where an index lookup is expected.
+LARGE_TABLES = {"products", "locations", "product_site_locations", "stock", "logs"}
+
+TABLE_RE = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+SQL_KEYWORDS = {"ON", "WHERE", "SET", "JOIN", "LEFT", "INNER", "ORDER", "GROUP", "LIMIT", "VALUES", "SELECT"}
+
+SKIP_PREFIXES = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "CREATE", "--", "EXPLAIN")
+
+SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS (\w+))?(.*)$")
+AUTOMATIC_RE = re.compile(r"^SEARCH (\w+) USING AUTOMATIC")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Fail on full table scans in the queries run by the API.",
+    )
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    return parser.parse_args()
+
+
+def seed(con: sqlite3.Connection) -> None:
+    con.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+
+    con.executemany("INSERT INTO sites(name) VALUES (?)", [("Konstanz",), ("Zürich",)])
+    con.executemany(
+        "INSERT INTO locations(site_id, shelf, row) VALUES (?, ?, ?)",
+        [(s, shelf, row) for s in (1, 2) for shelf in range(1, 6) for row in range(1, 6)],
+    )
+    con.executemany(
+        "INSERT INTO categories(name) VALUES (?)",
+        [(f"Kategorie {i}",) for i in range(1, 6)],
+    )
+    con.executemany(
+        "INSERT INTO brands(name) VALUES (?)",
+        [(f"Marke {i}",) for i in range(1, 6)],
+    )
+    con.executemany(
+        "INSERT INTO products(category_id, brand_id, product_name, nc_nummer) VALUES (?, ?, ?, ?)",
+        [(i % 5 + 1, i % 5 + 1, f"Kabelbinder Typ {i}", f"NC{i:08d}") for i in range(1, 51)],
+    )
+    con.executemany(
+        "INSERT INTO product_site_locations(site_id, product_id, location_id) VALUES (?, ?, ?)",
+        [(s, p, (s - 1) * 25 + p % 25 + 1) for s in (1, 2) for p in range(1, 41)],
+    )
+    con.executemany(
+        "INSERT INTO stock(location_id, product_id, quantity) VALUES (?, ?, ?)",
+        [(loc, p, 10) for s, p, loc in con.execute("SELECT * FROM product_site_locations").fetchall()],
+    )
+    con.execute(
+        """
+        INSERT INTO workers(first_name, last_name, username, is_admin)
+        VALUES ('Audit', 'Admin', 'audit.admin', 1)
+        """
+    )
+    con.executemany(
+        """
+        INSERT INTO logs(action, location_id, worker_id, product_id, quantity, timestamp)
+        VALUES (?, ?, 1, ?, 1, ?)
+        """,
+        [
+            ("take" if i % 2 else "load", i % 50 + 1, i % 50 + 1, f"2024-01-{i % 28 + 1:02d} 10:00:00")
+            for i in range(200)
+        ],
+    )
+    con.commit()
+
+
+def drive(client) -> None:
+    get = client.get
+
+    get("/api/auth/me")
+    get("/api/resolve", params={"code": "1-1"})
+    get("/api/Konstanz/products/1/resolve")
+    get("/api/Konstanz/workers")
+    get("/api/Konstanz/locations")
+    get("/api/logs", params={"limit": 50, "offset": 100})
+    get("/api/logs", params={"format": "columnar"})
+    get("/api/stock/combined")
+    get("/api/stock/combined", params={"format": "columnar"})
+
+    get("/api/Konstanz/products")
+    get("/api/Konstanz/products", params={"limit": 10, "sort": "product_name"})
+    get("/api/Konstanz/products", params={"category_id": 1, "brand_id": 1, "active": True})
+    get("/api/Konstanz/products/search", params={"q": "kabel"})
+    get("/api/Konstanz/products/fuzzy", params={"q": "kabelbiner"})
+    get("/api/Konstanz/stock")
+    get("/api/Konstanz/stock", params={"limit": 10, "sort": "quantity", "order": "desc"})
+    get("/api/Konstanz/stock", params={"has_location": True, "min_quantity": 1, "category_id": 1})
+
+    get("/api/export/logs", params={"format": "csv", "site": "Konstanz", "product_id": 1})
+    get("/api/export/logs", params={"format": "ndjson", "worker_id": 1, "action": "take"})
+    get("/api/export/logs", params={"date_from": "2024-01-05", "date_to": "2024-01-10"})
+    get("/api/export/stock", params={"site": "Konstanz"})
+
+    get("/api/admin/workers")
+    get("/api/admin/products")
+    get("/api/admin/products", params={"limit": 10, "sort": "brand_name"})
+    get("/api/admin/categories")
+    get("/api/admin/brands")
+    get("/api/admin/sites")
+    get("/api/admin/locations")
+    get("/api/admin/locations", params={"site_id": 1})
+    get("/api/admin/product-site-locations")
+    get("/api/admin/product-site-locations", params={"site_id": 1, "limit": 10})
+    get("/api/admin/products/qr-pdf", params={"product_ids": "1,2,3", "site_id": 1})
+
+    client.post("/api/Konstanz/take", json={"product_id": 1, "quantity": 1})
+    client.post("/api/Konstanz/load", json={"product_id": 1, "quantity": 1})
+    client.patch("/api/Konstanz/products/45/location", json={"location_id": 3})
+    client.delete("/api/Konstanz/products/45/location")
+    client.put("/api/admin/products/46/default-location", json={"site_id": 1, "location_id": 4})
+
+    client.post("/api/admin/categories", json={"name": "Audit Kategorie"})
+    client.patch("/api/admin/categories/1", json={"name": "Kategorie 1"})
+    client.post("/api/admin/brands", json={"name": "Audit Marke"})
+    client.patch("/api/admin/brands/1", json={"name": "Marke 1"})
+    client.post("/api/admin/sites", json={"name": "Audit Standort"})
+    client.patch("/api/admin/sites/2", json={"name": "Zürich"})
+    client.post("/api/admin/locations", json={"site_id": 1, "shelf": 9, "row": 9})
+    client.patch("/api/admin/locations/1", json={"site_id": 1, "shelf": 1, "row": 1})
+    client.post(
+        "/api/admin/products",
+        json={"category_id": 1, "brand_id": 1, "product_name": "Audit Produkt"},
+    )
+    client.patch(
+        "/api/admin/products/1",
+        json={"category_id": 1, "brand_id": 1, "product_name": "Kabelbinder Typ 1", "nc_nummer": "NC00000001"},
+    )
+    client.post("/api/admin/workers", json={"first_name": "Audit", "last_name": "Worker"})
+    client.patch("/api/admin/workers/2/admin", json={"is_admin": False})
+    client.patch("/api/admin/workers/2/deactivate")
+    client.patch("/api/admin/workers/2/activate")
+
+
+def explain(con: sqlite3.Connection, sql: str) -> list[tuple[int, int, str]]:
+    return [
+        (row[0], row[1], row[3])
+        for row in con.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    ]
+
+
+def table_aliases(sql: str) -> dict[str, str]:
+    aliases = {}
+
+    for table, alias in TABLE_RE.findall(sql):
+        aliases[table] = table
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias] = table
+
+    return aliases
+
+
+def full_scans(sql: str, plan: list[tuple[int, int, str]]) -> list[str]:
+    aliases = table_aliases(sql)
+    parts = re.split(r"\bWHERE\b", sql, maxsplit=1, flags=re.I)
+    where = parts[1] if len(parts) > 1 else ""
+    found = []
+
+    for _, _, detail in plan:
+        m = AUTOMATIC_RE.match(detail)
+        if m and aliases.get(m.group(1), m.group(1)) in LARGE_TABLES:
+            # SQLite builds a throwaway index for every such statement.
+            found.append(detail)
+            continue
+
+        m = SCAN_RE.match(detail)
+        if not m:
+            continue
+
+        name = m.group(2) or m.group(1)
+        table = aliases.get(name, name)
+        if table not in LARGE_TABLES:
+            continue
+
+        if name not in aliases:
+            # Not part of the statement: a foreign key check or trigger
+            # looking up child rows without an index.
+            found.append(detail)
+        elif "USING" not in m.group(3) and (
+            f"{name}." in where or (len(set(aliases.values())) == 1 and where)
+        ):
+            # Rows of a filtered table are read only to be thrown away.
+            found.append(detail)
+
+    return found
+
+
+def main() -> None:
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "audit.db"
+        os.environ["LAGER_DB_PATH"] = str(db_path)
+
+        con = sqlite3.connect(str(db_path))
+        seed(con)
+
+        from fastapi.testclient import TestClient
+
+        from backend.db import add_connection_hook
+        from backend.logic.auth import create_access_token
+        from backend.main import app
+
+        statements: dict[str, None] = {}
+
+        def trace(sql: str) -> None:
+            text = sql.strip()
+            if text and not text.upper().startswith(SKIP_PREFIXES):
+                statements.setdefault(text)
+
+        add_connection_hook(lambda c: c.set_trace_callback(trace))
+
+        client = TestClient(app)
+        client.headers["Authorization"] = f"Bearer {create_access_token(1)}"
+        drive(client)
+
+        failures = 0
+        for sql in statements:
+            try:
+                plan = explain(con, sql)
+            except sqlite3.Error:
+                continue
+
+            scans = full_scans(sql, plan)
+            if scans or args.verbose:
+                print("-" * 72)
+                print(re.sub(r"\s+", " ", sql)[:400])
+                for _, _, detail in plan:
+                    print(f"  {detail}")
+            if scans:
+                failures += 1
+                print(f"  !! full scan: {'; '.join(scans)}")
+
+        con.close()
+
+    print("-" * 72)
+    print(f"{len(statements)} statements checked, {failures} with full scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
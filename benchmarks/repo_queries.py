@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+BASELINE_PATH = ROOT / "benchmarks" / "baseline.json"
+
+sys.path.insert(0, str(ROOT))
+
+from synthetic_db import DB_CACHE_DIR, SCALES, cached_database  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Time repo queries and bookings against synthetic databases.",
+    )
+    parser.add_argument("--scales", default="small,medium", help="comma separated, see synthetic_db.py")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20, help="samples per list query")
+    parser.add_argument("--point-repeat", type=int, default=500, help="samples per lookup or booking")
+    parser.add_argument("--max-seconds", type=float, default=15.0, help="time budget per case")
+    parser.add_argument("--db-dir", type=Path, default=DB_CACHE_DIR)
+    parser.add_argument("--save", type=Path, nargs="?", const=BASELINE_PATH, help="write results as baseline")
+    parser.add_argument("--compare", type=Path, nargs="?", const=BASELINE_PATH, help="compare with a baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown, 0.25 = 25%%")
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=0.1,
+        help="ignore slowdowns smaller than this, lookups are noisy",
+    )
+    parser.add_argument("--run-scale", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+@dataclass
+class Context:
+    con: sqlite3.Connection
+    rnd: random.Random
+    site_id: int
+    site_name: str
+    worker: dict
+    product_ids: list[int]
+    worker_ids: list[int]
+    log_count: int
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    run: Callable[[Context], int]
+    point: bool = False
+
+
+def build_cases(ctx: Context) -> list[Case]:
+    from backend.api.inventory import api_resolve_product_for_site, resolve
+    from backend.logic.stock import act
+    from backend.models.inventory import ActionIn
+    from backend.repo.logs import list_logs
+    from backend.repo.stock import list_stock_combined, list_stock_for_site
+    from backend.repo.workers import get_worker_by_id
+
+    def logs_at(offset: int) -> Callable[[Context], int]:
+        return lambda c: len(list_logs(c.con, limit=50, offset=offset))
+
+    def resolve_qr(c: Context) -> int:
+        resolve(f"{c.site_id}-{c.rnd.choice(c.product_ids)}", current_user=c.worker)
+        return 1
+
+    def resolve_for_site(c: Context) -> int:
+        api_resolve_product_for_site(c.site_name, c.rnd.choice(c.product_ids), current_user=c.worker)
+        return 1
+
+    bookings = iter(range(10**9))
+
+    def book(c: Context) -> int:
+        # Alternating load and take of the same product keeps stock levels
+        # where the generator left them.
+        i = next(bookings)
+        payload = ActionIn(product_id=c.product_ids[i // 2 % len(c.product_ids)], quantity=1)
+        act(c.site_name, payload, "load" if i % 2 == 0 else "take", c.worker)
+        return 1
+
+    deep = max(0, ctx.log_count - 50)
+
+    return [
+        Case("list_stock_for_site", lambda c: len(list_stock_for_site(c.con, c.site_id))),
+        Case("list_stock_combined", lambda c: len(list_stock_combined(c.con))),
+        Case("list_logs[offset=0]", logs_at(0)),
+        Case("list_logs[offset=mid]", logs_at(deep // 2)),
+        Case("list_logs[offset=end]", logs_at(deep)),
+        Case("get_worker_by_id", lambda c: int(get_worker_by_id(c.con, c.rnd.choice(c.worker_ids)) is not None), point=True),
+        Case("resolve", resolve_qr, point=True),
+        Case("resolve_product_for_site", resolve_for_site, point=True),
+        Case("stock.act", book, point=True),
+    ]
+
+
+def measure(case: Case, ctx: Context, repeat: int, max_seconds: float) -> dict:
+    case.run(ctx)
+
+    timings = []
+    rows = 0
+    deadline = time.perf_counter() + max_seconds
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows += case.run(ctx)
+        timings.append(time.perf_counter() - start)
+
+        if len(timings) >= 3 and time.perf_counter() > deadline:
+            break
+
+    q = statistics.quantiles(timings, n=100, method="inclusive")
+    total = sum(timings)
+
+    return {
+        "n": len(timings),
+        "p50_ms": round(statistics.median(timings) * 1000, 4),
+        "p95_ms": round(q[94] * 1000, 4),
+        "p99_ms": round(q[98] * 1000, 4),
+        "mean_ms": round(total / len(timings) * 1000, 4),
+        "rows": rows // len(timings),
+        "rows_per_sec": round(rows / total) if total else 0,
+    }
+
+
+def run_scale(args: argparse.Namespace) -> dict:
+    # Runs in its own process: LAGER_DB_PATH is read when backend.db is
+    # imported, and the handlers open their own connections.
+    from backend.db import get_conn
+    from backend.repo.workers import get_worker_by_id
+
+    con = get_conn()
+    try:
+        site = con.execute("SELECT id, name FROM sites WHERE active = 1 ORDER BY id LIMIT 1").fetchone()
+        product_ids = [
+            r[0]
+            for r in con.execute(
+                """
+                SELECT psl.product_id
+                FROM product_site_locations psl
+                JOIN products p ON p.id = psl.product_id
+                JOIN locations l ON l.id = psl.location_id
+                WHERE psl.site_id = ? AND p.active = 1 AND l.active = 1
+                """,
+                (site["id"],),
+            )
+        ]
+        worker_ids = [r[0] for r in con.execute("SELECT id FROM workers")]
+
+        ctx = Context(
+            con=con,
+            rnd=random.Random(args.seed),
+            site_id=site["id"],
+            site_name=site["name"],
+            worker=get_worker_by_id(con, worker_ids[0]),
+            product_ids=product_ids,
+            worker_ids=worker_ids,
+            log_count=con.execute("SELECT COUNT(*) FROM logs").fetchone()[0],
+        )
+
+        results = {}
+        for case in build_cases(ctx):
+            repeat = args.point_repeat if case.point else args.repeat
+            results[case.name] = measure(case, ctx, repeat, args.max_seconds)
+            print(f"  {case.name:<28} done", file=sys.stderr)
+        return results
+    finally:
+        con.close()
+
+
+def bench_scale(scale: str, args: argparse.Namespace) -> dict:
+    source = cached_database(scale, args.seed, args.db_dir)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Bookings write, so every run starts from a fresh copy.
+        work = Path(tmp) / "bench.db"
+        shutil.copyfile(source, work)
+
+        cmd = [
+            sys.executable, __file__,
+            "--run-scale", scale,
+            "--seed", str(args.seed),
+            "--repeat", str(args.repeat),
+            "--point-repeat", str(args.point_repeat),
+            "--max-seconds", str(args.max_seconds),
+        ]
+        env = {**os.environ, "LAGER_DB_PATH": str(work)}
+        out = subprocess.run(cmd, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+
+    return json.loads(out)
+
+
+def print_results(
+    scale: str,
+    results: dict,
+    baseline: dict | None,
+    threshold: float,
+    min_delta_ms: float,
+) -> list[str]:
+    regressions = []
+
+    print(f"\n{scale}")
+    print(
+        f"{'case':<28} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}"
+        f" {'rows/s':>12} {'vs base':>9}"
+    )
+
+    for name, r in results.items():
+        delta = ""
+        base = (baseline or {}).get(name)
+        if base and base["p50_ms"]:
+            change = r["p50_ms"] / base["p50_ms"] - 1
+            delta = f"{change:+.0%}"
+            if change > threshold and r["p50_ms"] - base["p50_ms"] > min_delta_ms:
+                delta += " !"
+                regressions.append(f"{scale}/{name}: p50 {base['p50_ms']} -> {r['p50_ms']} ms")
+
+        print(
+            f"{name:<28} {r['n']:>5} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['p99_ms']:>10.3f}"
+            f" {r['rows_per_sec']:>12,} {delta:>9}"
+        )
+
+    return regressions
+
+
+def main() -> None:
+    args = parse_args()
+
+    if args.run_scale:
+        print(json.dumps(run_scale(args)))
+        return
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        raise SystemExit(f"Unknown scale(s): {', '.join(unknown)}")
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+
+    results = {}
+    regressions = []
+    for scale in scales:
+        results[scale] = bench_scale(scale, args)
+        regressions += print_results(
+            scale,
+            results[scale],
+            (baseline or {}).get(scale),
+            args.threshold,
+            args.min_delta_ms,
+        )
+
+    if args.save:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "machine": platform.machine(),
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "point_repeat": args.point_repeat,
+            },
+            "results": results,
+        }
+        args.save.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"\nsaved {args.save}")
+
+    if regressions:
+        print("\nSlower than baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from array import array
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+ROOT = Path(__file__).resolve().parents[1]
+SCHEMA_PATH = ROOT / "backend" / "schema.sql"
+
+sys.path.insert(0, str(ROOT))
+
+from backend.logic.users import username_from_worker  # noqa: E402
+
+BATCH_SIZE = 50_000
+DB_CACHE_DIR = Path(tempfile.gettempdir()) / "lager-bench"
+DEFAULT_PASSWORD = "synthetic123"
+
+# Logs end here, so the same seed always gives the same database.
+LOGS_END = datetime(2025, 1, 1)
+
+
+@dataclass(frozen=True)
+class Scale:
+    sites: int
+    products: int
+    locations: int
+    workers: int
+    logs: int
+    categories: int = 40
+    brands: int = 200
+    # Share of products that have a default location at each site.
+    mapped: float = 0.3
+
+
+SCALES = {
+    "small": Scale(sites=3, products=2_000, locations=3_000, workers=20, logs=20_000),
+    "medium": Scale(sites=10, products=20_000, locations=50_000, workers=100, logs=1_000_000),
+    "large": Scale(sites=50, products=100_000, locations=500_000, workers=500, logs=10_000_000),
+}
+
+CITIES = [
+    "Konstanz", "Singen", "Radolfzell", "Friedrichshafen", "Ravensburg", "Ulm",
+    "Stuttgart", "Freiburg", "Karlsruhe", "Mannheim", "Heilbronn", "Reutlingen",
+    "Tübingen", "Pforzheim", "Villingen", "Lörrach", "Offenburg", "Kempten",
+    "Lindau", "Zürich", "Winterthur", "St. Gallen", "Basel", "Schaffhausen",
+]
+
+PRODUCT_TYPES = [
+    "Kabelbinder", "Schraube", "Dübel", "Mutter", "Unterlegscheibe", "Schlauchschelle",
+    "Sicherung", "Klemme", "Relais", "Kabelschuh", "Steckdose", "Schalter", "Leuchte",
+    "Filter", "Dichtung", "Kupplung", "Ventil", "Kugellager", "Keilriemen", "Batterie",
+]
+
+PRODUCT_VARIANTS = [
+    "verzinkt", "Edelstahl", "schwarz", "weiß", "hitzebeständig", "isoliert",
+    "selbstsichernd", "flach", "lang", "kurz", "Profi", "Industrie",
+]
+
+CATEGORY_NAMES = [
+    "Befestigung", "Elektro", "Sanitär", "Werkzeug", "Hydraulik", "Pneumatik",
+    "Beleuchtung", "Arbeitsschutz", "Verbrauchsmaterial", "Antrieb",
+]
+
+FIRST_NAMES = [
+    "Anna", "Ben", "Clara", "David", "Elena", "Felix", "Greta", "Hannes", "Ida",
+    "Jonas", "Klara", "Lukas", "Mia", "Noah", "Paula", "Quentin", "Rosa", "Simon",
+    "Tina", "Uwe", "Vera", "Wolfgang", "Yara", "Zoe",
+]
+
+LAST_NAMES = [
+    "Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker",
+    "Schulz", "Hoffmann", "Koch", "Richter", "Klein", "Wolf", "Neumann", "Schwarz",
+    "Braun", "Zimmermann", "Krüger", "Hartmann",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic Lager database for load tests and benchmarks.",
+    )
+    parser.add_argument("out", type=Path, help="path of the database file to create")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sites", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--locations", type=int, help="total over all sites")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--logs", type=int)
+    parser.add_argument("--mapped", type=float, help="share of products mapped per site")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="password of every worker")
+    parser.add_argument("--force", action="store_true", help="overwrite an existing file")
+    return parser.parse_args()
+
+
+def unique_names(base: list[str], n: int) -> list[str]:
+    names = list(base[:n])
+    round_ = 2
+    while len(names) < n:
+        names.extend(f"{name} {round_}" for name in base[: n - len(names)])
+        round_ += 1
+    return names
+
+
+def batched(rows: Iterator[tuple], size: int = BATCH_SIZE) -> Iterator[list[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert_many(con: sqlite3.Connection, sql: str, rows: Iterator[tuple]) -> int:
+    count = 0
+    for batch in batched(rows):
+        con.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def location_rows(scale: Scale, rnd: random.Random) -> Iterator[tuple]:
+    per_site = max(1, scale.locations // scale.sites)
+    shelves = math.ceil(math.sqrt(per_site))
+
+    for site_id in range(1, scale.sites + 1):
+        for i in range(per_site):
+            active = 0 if rnd.random() < 0.02 else 1
+            yield site_id, i // shelves + 1, i % shelves + 1, active
+
+
+def product_rows(scale: Scale, rnd: random.Random) -> Iterator[tuple]:
+    for i in range(1, scale.products + 1):
+        name = " ".join(
+            (
+                rnd.choice(PRODUCT_TYPES),
+                rnd.choice(PRODUCT_VARIANTS),
+                f"{rnd.choice((3, 4, 5, 6, 8, 10, 12, 16, 20))}x{rnd.randint(10, 300)}",
+            )
+        )
+        active = 0 if rnd.random() < 0.03 else 1
+        yield (
+            rnd.randint(1, scale.categories),
+            rnd.randint(1, scale.brands),
+            name,
+            f"NC{i:08d}",
+            active,
+        )
+
+
+def worker_rows(scale: Scale, password_hash: str) -> Iterator[tuple]:
+    pairs = (
+        (first, last if n == 0 else f"{last}{n + 1}")
+        for n in range(scale.workers // (len(FIRST_NAMES) * len(LAST_NAMES)) + 1)
+        for last in LAST_NAMES
+        for first in FIRST_NAMES
+    )
+
+    for i, (first, last) in zip(range(scale.workers), pairs):
+        yield first, last, username_from_worker(first, last), password_hash, 1 if i == 0 else 0
+
+
+def generate(path: Path, scale: Scale, seed: int = 42, password: str = DEFAULT_PASSWORD) -> dict[str, int]:
+    from backend.logic.auth import hash_password
+
+    rnd = random.Random(seed)
+    counts = {}
+
+    con = sqlite3.connect(str(path))
+    try:
+        con.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+        con.execute("PRAGMA journal_mode = MEMORY;")
+        con.execute("PRAGMA synchronous = OFF;")
+
+        # Secondary indexes are rebuilt in one pass at the end, which is much
+        # cheaper than updating them on every insert.
+        indexes = [
+            row[0]
+            for row in con.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+            )
+        ]
+        for name in indexes:
+            con.execute(f'DROP INDEX "{name}"')
+
+        con.execute("BEGIN")
+
+        counts["sites"] = insert_many(
+            con,
+            "INSERT INTO sites(name) VALUES (?)",
+            ((name,) for name in unique_names(CITIES, scale.sites)),
+        )
+        counts["categories"] = insert_many(
+            con,
+            "INSERT INTO categories(name) VALUES (?)",
+            ((name,) for name in unique_names(CATEGORY_NAMES, scale.categories)),
+        )
+        counts["brands"] = insert_many(
+            con,
+            "INSERT INTO brands(name) VALUES (?)",
+            ((f"Marke {i:03d}",) for i in range(1, scale.brands + 1)),
+        )
+        counts["locations"] = insert_many(
+            con,
+            "INSERT INTO locations(site_id, shelf, row, active) VALUES (?, ?, ?, ?)",
+            location_rows(scale, rnd),
+        )
+        counts["products"] = insert_many(
+            con,
+            """
+            INSERT INTO products(category_id, brand_id, product_name, nc_nummer, active)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            product_rows(scale, rnd),
+        )
+        counts["workers"] = insert_many(
+            con,
+            """
+            INSERT INTO workers(first_name, last_name, username, password_hash, is_admin)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            worker_rows(scale, hash_password(password)),
+        )
+
+        # Mapped (product, location) pairs are kept in flat arrays, so the
+        # log generator can pick from millions of them without tuples.
+        per_site = max(1, scale.locations // scale.sites)
+        mapped_products = array("i")
+        mapped_locations = array("i")
+
+        def mappings() -> Iterator[tuple]:
+            for site_id in range(1, scale.sites + 1):
+                first_location = (site_id - 1) * per_site + 1
+                for product_id in range(1, scale.products + 1):
+                    if rnd.random() < scale.mapped:
+                        location_id = first_location + rnd.randrange(per_site)
+                        mapped_products.append(product_id)
+                        mapped_locations.append(location_id)
+                        yield site_id, product_id, location_id
+
+        counts["product_site_locations"] = insert_many(
+            con,
+            "INSERT INTO product_site_locations(site_id, product_id, location_id) VALUES (?, ?, ?)",
+            mappings(),
+        )
+        counts["stock"] = insert_many(
+            con,
+            "INSERT OR IGNORE INTO stock(location_id, product_id, quantity) VALUES (?, ?, ?)",
+            (
+                (location_id, product_id, rnd.randint(0, 200))
+                for product_id, location_id in zip(mapped_products, mapped_locations)
+            ),
+        )
+
+        def logs() -> Iterator[tuple]:
+            n_mapped = len(mapped_products)
+            if not n_mapped or not scale.workers:
+                return
+
+            start = LOGS_END - timedelta(days=365)
+            step = 365 * 86400 / max(1, scale.logs)
+
+            for i in range(scale.logs):
+                # Skewed towards the front, so some products are far busier
+                # than others, as in a real warehouse.
+                k = int(n_mapped * rnd.random() ** 3)
+                timestamp = start + timedelta(seconds=int(i * step))
+                yield (
+                    "take" if rnd.random() < 0.7 else "load",
+                    mapped_locations[k],
+                    rnd.randint(1, scale.workers),
+                    mapped_products[k],
+                    rnd.randint(1, 20),
+                    timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                )
+
+        counts["logs"] = insert_many(
+            con,
+            """
+            INSERT INTO logs(action, location_id, worker_id, product_id, quantity, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            logs(),
+        )
+
+        con.commit()
+
+        con.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+        con.execute("PRAGMA journal_mode = WAL;")
+    finally:
+        con.close()
+
+    return counts
+
+
+def cached_database(scale: str, seed: int = 42, db_dir: Path = DB_CACHE_DIR) -> Path:
+    db_dir.mkdir(parents=True, exist_ok=True)
+    path = db_dir / f"{scale}-seed{seed}.db"
+
+    # Generation is deterministic, so a database is built once and reused.
+    if not path.exists():
+        print(f"generating {scale} database in {path} ...", file=sys.stderr)
+        tmp = path.with_suffix(".tmp")
+        tmp.unlink(missing_ok=True)
+        generate(tmp, SCALES[scale], seed=seed)
+        tmp.rename(path)
+
+    return path
+
+
+def main() -> None:
+    args = parse_args()
+
+    scale = SCALES[args.scale]
+    overrides = {
+        name: getattr(args, name)
+        for name in ("sites", "products", "locations", "workers", "logs", "mapped")
+        if getattr(args, name) is not None
+    }
+    scale = replace(scale, **overrides)
+
+    if args.out.exists():
+        if not args.force:
+            raise SystemExit(f"{args.out} exists, use --force to overwrite")
+        args.out.unlink()
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    counts = generate(args.out, scale, seed=args.seed, password=args.password)
+
+    for table, count in counts.items():
+        print(f"{table:<24} {count:>12,}")
+    print(f"OK: {args.out} in {time.perf_counter() - start:.1f}s (password: {args.password})")
+
+
+if __name__ == "__main__":
+    main()
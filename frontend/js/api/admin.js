@@ -101,11 +101,40 @@
 
 
 
+  function sleep(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+  }
+
+  async function waitForJob(jobId) {
+    // Large label sheets are rendered as a background job on the server;
+    // poll until it is done instead of holding one long request open.
+    for (;;) {
+      const job = await window.App.api.get(`/admin/jobs/${jobId}`);
+
+      if (job.status === "done") {
+        return job;
+      }
+
+      if (job.status === "failed" || job.status === "cancelled") {
+        throw new Error(job.error || "QR PDF konnte nicht erstellt werden.");
+      }
+
+      await sleep(500);
+    }
+  }
+
   async function openQrPdf(productIds, siteId) {
     const token = localStorage.getItem("lager_token");
 
+    const job = await window.App.api.post("/admin/jobs/labels", {
+      site_id: siteId,
+      product_ids: productIds
+    });
+
+    await waitForJob(job.id);
+
     const response = await fetch(
-      `/api/admin/products/qr-pdf?site_id=${siteId}&product_ids=${productIds.join(",")}`,
+      `/api/admin/jobs/${job.id}/artifact`,
       {
         headers: {
           Authorization: `Bearer ${token}`
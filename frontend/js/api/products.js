@@ -3,6 +3,18 @@
     return window.App.api.get(`/${site}/products`);
   }
 
+  async function searchProducts(site, query, limit = 20) {
+    return window.App.api.get(
+      `/${site}/products/search?q=${encodeURIComponent(query)}&limit=${encodeURIComponent(limit)}`
+    );
+  }
+
+  async function fuzzyProducts(site, query, limit = 20) {
+    return window.App.api.get(
+      `/${site}/products/fuzzy?q=${encodeURIComponent(query)}&limit=${encodeURIComponent(limit)}`
+    );
+  }
+
   async function listLocations(site) {
     return window.App.api.get(`/${site}/locations`);
   }
@@ -22,6 +34,8 @@
   window.App = window.App || {};
   window.App.productsApi = {
     listProducts,
+    searchProducts,
+    fuzzyProducts,
     listLocations,
     setProductLocation,
     resolveProductForStandort
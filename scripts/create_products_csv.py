@@ -3,18 +3,22 @@ from __future__ import annotations
 
 from pathlib import Path
 import sqlite3
+import sys
 
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
-
-import qrcode
 
 
 ROOT = Path(__file__).resolve().parents[1]
 DB_PATH = ROOT / "db" / "Lager_live.db"
 OUT_PDF = ROOT / "data" / "qr_labels.pdf"
+QR_CACHE_DIR = ROOT / "data" / "qr_cache"
+
+sys.path.insert(0, str(ROOT))
+
+from backend.logic.label_layout import ellipsize, wrap_hyphenated  # noqa: E402
+from backend.logic.qr import draw_qr, set_qr_cache_dir  # noqa: E402
 
 
 def get_conn():
@@ -58,19 +62,9 @@ def fetch_products():
     return rows
 
 
-def make_qr_image(payload: str):
-    qr = qrcode.QRCode(
-        version=None,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=10,
-        border=2,
-    )
-    qr.add_data(payload)
-    qr.make(fit=True)
-    return qr.make_image(fill_color="black", back_color="white").get_image()
-
-
 def main():
+    set_qr_cache_dir(QR_CACHE_DIR)
+
     rows = fetch_products()
     if not rows:
         raise SystemExit("No matching products found (active netcom).")
@@ -103,94 +97,6 @@ def main():
             return str(r["nc_nummer"]).strip()
         return ""
 
-    def text_width(s: str, font: str, size: int) -> float:
-        return c.stringWidth(s, font, size)
-
-    def ellipsize(s: str, font: str, size: int, max_w: float) -> str:
-        s = (s or "").strip()
-        if not s:
-            return ""
-        if text_width(s, font, size) <= max_w:
-            return s
-        dots = "..."
-        if text_width(dots, font, size) > max_w:
-            return ""
-        lo, hi = 0, len(s)
-        while lo < hi:
-            mid = (lo + hi) // 2
-            cand = s[:mid].rstrip() + dots
-            if text_width(cand, font, size) <= max_w:
-                lo = mid + 1
-            else:
-                hi = mid
-        out = s[: max(0, lo - 1)].rstrip() + dots
-        while out and text_width(out, font, size) > max_w:
-            out = out[:-1]
-        return out
-
-    def split_long_token(token: str, font: str, size: int, max_w: float):
-        token = token.strip()
-        if not token:
-            return []
-        if text_width(token, font, size) <= max_w:
-            return [token]
-
-        out = []
-        i = 0
-        n = len(token)
-        while i < n:
-            j = i + 1
-            best = i + 1
-            while j <= n:
-                chunk = token[i:j]
-                if text_width(chunk, font, size) <= max_w:
-                    best = j
-                    j += 1
-                else:
-                    break
-
-            chunk = token[i:best]
-            if best < n:
-                while chunk and text_width(chunk + "-", font, size) > max_w:
-                    best -= 1
-                    chunk = token[i:best]
-                if not chunk:
-                    chunk = token[i:i+1]
-                    best = i + 1
-                out.append(chunk + "-")
-            else:
-                out.append(chunk)
-
-            i = best
-        return out
-
-    def wrap_mixed(text: str, font: str, size: int, max_w: float):
-        text = (text or "").strip()
-        if not text:
-            return []
-
-        c.setFont(font, size)
-        words = text.split()
-        lines = []
-        cur = ""
-
-        for w in words:
-            # hyphenate word if needed
-            parts = split_long_token(w, font, size, max_w)
-            for part in parts:
-                test = (cur + " " + part).strip()
-                if not cur:
-                    test = part
-                if text_width(test, font, size) <= max_w:
-                    cur = test
-                else:
-                    if cur:
-                        lines.append(cur)
-                    cur = part
-        if cur:
-            lines.append(cur)
-        return lines
-
     def leading_for(size: int) -> float:
         if size >= 10:
             return 5.8 * mm
@@ -209,11 +115,9 @@ def main():
         top_text_pad = 2.5 * mm
 
         qr_side = label_h - 2 * pad
-        qr_img = make_qr_image(payload)
-        qr_reader = ImageReader(qr_img)
         qr_x = x + pad
         qr_y = y + pad
-        c.drawImage(qr_reader, qr_x, qr_y, qr_side, qr_side, mask="auto")
+        draw_qr(c, payload, qr_x, qr_y, qr_side, border=2)
 
         text_x = qr_x + qr_side + gap
         text_w = (x + label_w - pad) - text_x
@@ -235,8 +139,8 @@ def main():
 
         for ns in name_sizes:
             for ncs in nc_sizes:
-                nl = wrap_mixed(name, "Helvetica-Bold", ns, text_w)
-                cl = wrap_mixed(nc, "Helvetica", ncs, text_w)
+                nl = wrap_hyphenated(name, "Helvetica-Bold", ns, text_w)
+                cl = wrap_hyphenated(nc, "Helvetica", ncs, text_w)
 
                 n_lead = leading_for(ns)
                 c_lead = leading_for(ncs)
@@ -252,10 +156,10 @@ def main():
         # If still too tall, clamp lines and ellipsize the last visible line.
         if not name_lines:
             chosen_ns = 8
-            name_lines = wrap_mixed(name, "Helvetica-Bold", chosen_ns, text_w) or [""]
+            name_lines = wrap_hyphenated(name, "Helvetica-Bold", chosen_ns, text_w) or [""]
         if not nc_lines:
             chosen_ncs = 7
-            nc_lines = wrap_mixed(nc, "Helvetica", chosen_ncs, text_w) or [""]
+            nc_lines = wrap_hyphenated(nc, "Helvetica", chosen_ncs, text_w) or [""]
 
         cursor = top_y
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DB_PATH = ROOT / "db" / "Lager_live.db"
+OUT_PATH = ROOT / "data" / "logs.parquet"
+
+sys.path.insert(0, str(ROOT))
+
+from backend.logic.export import ParquetUnavailableError, write_logs_parquet  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export stock logs to a Parquet file for pandas/Arrow.",
+    )
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--out", type=Path, default=OUT_PATH)
+    parser.add_argument("--site-id", type=int)
+    parser.add_argument("--product-id", type=int)
+    parser.add_argument("--worker-id", type=int)
+    parser.add_argument("--action", choices=["load", "take"])
+    parser.add_argument("--date-from", help="inclusive, e.g. 2026-01-01")
+    parser.add_argument("--date-to", help="exclusive, e.g. 2026-02-01")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--compression", default="zstd")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if not args.db.exists():
+        raise SystemExit(f"DB not found: {args.db}")
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+
+    con = sqlite3.connect(str(args.db))
+    con.row_factory = sqlite3.Row
+
+    try:
+        written = write_logs_parquet(
+            con,
+            str(args.out),
+            chunk_size=args.chunk_size,
+            compression=args.compression,
+            site_id=args.site_id,
+            product_id=args.product_id,
+            worker_id=args.worker_id,
+            action=args.action,
+            date_from=args.date_from,
+            date_to=args.date_to,
+        )
+    except ParquetUnavailableError as e:
+        raise SystemExit(str(e))
+    finally:
+        con.close()
+
+    print(f"Wrote {written} log rows: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
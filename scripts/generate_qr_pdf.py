@@ -1,277 +1,191 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-import re
+import argparse
+import json
+import os
 import sqlite3
-
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
-
-import qrcode
+import sys
+import time
 
 
 ROOT = Path(__file__).resolve().parents[1]
 DB_PATH = ROOT / "db" / "Lager_live.db"
 OUTPUT_DIR = ROOT / "data"
+QR_CACHE_DIR = OUTPUT_DIR / "qr_cache"
 
+# Fingerprints of the labels on the sheets last written to the output dir.
+MANIFEST_NAME = "qr_labels.json"
 
-def get_conn():
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
+sys.path.insert(0, str(ROOT))
+
+from backend.logic.labels import (  # noqa: E402
+    fetch_label_rows,
+    generate_for_site,
+    group_by_site,
+    label_fingerprint,
+    sheet_fingerprint,
+    site_sheet_filename,
+)
+from backend.logic.qr import set_qr_cache_dir  # noqa: E402
 
 
-def fetch_label_rows():
-    con = get_conn()
-    rows = con.execute(
-        """
-        SELECT
-          s.id AS site_id,
-          s.name AS site_name,
-          p.id AS product_id,
-          p.product_name,
-          p.nc_nummer,
-          l.id AS location_id,
-          l.shelf,
-          l.row
-        FROM sites s
-        CROSS JOIN products p
-        LEFT JOIN product_site_locations psl
-          ON psl.site_id = s.id
-         AND psl.product_id = p.id
-        LEFT JOIN locations l
-          ON l.id = psl.location_id
-         AND l.site_id = s.id
-         AND l.active = 1
-        WHERE s.active = 1
-          AND p.active = 1
-        ORDER BY s.id, p.id
-        """
-    ).fetchall()
-    con.close()
-    return rows
-
-
-def slugify(text: str) -> str:
-    text = (text or "").strip().lower()
-    text = re.sub(r"\s+", "_", text)
-    text = re.sub(r"[^a-z0-9_äöüß]", "", text)
-    return text or "site"
-
-
-def make_qr_image(payload: str):
-    qr = qrcode.QRCode(
-        version=None,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=10,
-        border=1,
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Write one QR label sheet per active site to data/, skipping sites whose labels did not change.",
     )
-    qr.add_data(payload)
-    qr.make(fit=True)
-    return qr.make_image(fill_color="black", back_color="white").get_image()
-
-
-def string_width(c, text: str, font: str, size: int) -> float:
-    c.setFont(font, size)
-    return c.stringWidth(text, font, size)
-
-
-def ellipsize(c, text: str, font: str, size: int, max_width: float) -> str:
-    text = (text or "").strip()
-    if not text:
-        return ""
-
-    if string_width(c, text, font, size) <= max_width:
-        return text
-
-    dots = "..."
-    lo, hi = 0, len(text)
-    while lo < hi:
-        mid = (lo + hi) // 2
-        candidate = text[:mid].rstrip() + dots
-        if string_width(c, candidate, font, size) <= max_width:
-            lo = mid + 1
-        else:
-            hi = mid
-
-    out = text[: max(0, lo - 1)].rstrip() + dots
-    while out and string_width(c, out, font, size) > max_width:
-        out = out[:-1]
-    return out
-
-
-def wrap_text(c, text: str, font: str, size: int, max_width: float, max_lines: int) -> list[str]:
-    text = (text or "").strip()
-    if not text:
-        return []
-
-    c.setFont(font, size)
-    words = text.split()
-    lines = []
-    cur = ""
-
-    for i, word in enumerate(words):
-        candidate = word if not cur else f"{cur} {word}"
-        if c.stringWidth(candidate, font, size) <= max_width:
-            cur = candidate
-        else:
-            if cur:
-                lines.append(cur)
-            cur = word
-            if len(lines) == max_lines - 1:
-                remaining = " ".join([cur] + words[i + 1:])
-                lines.append(ellipsize(c, remaining, font, size, max_width))
-                return lines
-
-    if cur:
-        lines.append(cur)
-
-    if len(lines) > max_lines:
-        lines = lines[:max_lines]
-
-    if len(lines) == max_lines:
-        lines[-1] = ellipsize(c, lines[-1], font, size, max_width)
-
-    return lines
-
-
-def draw_label(c, x, y, label_w, label_h, r):
-    site_id = int(r["site_id"])
-    product_id = int(r["product_id"])
-    payload = f"{site_id}-{product_id}"
-
-    left = x + 3 * mm
-    top = y + label_h - 2.7 * mm
-
-    c.setFont("Helvetica", 6.8)
-    c.drawString(left, top, f"QR: {payload}")
-
-    qr_size = 24.5 * mm
-    qr_y = top - 1.8 * mm - qr_size
-    qr_x = left
-
-    qr_img = make_qr_image(payload)
-    c.drawImage(
-        ImageReader(qr_img),
-        qr_x,
-        qr_y,
-        qr_size,
-        qr_size,
-        mask="auto",
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--out-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1,
+        help="sites rendered in parallel, 0 = one per CPU core",
     )
-
-    text_left = left
-    text_width_available = label_w - 6 * mm
-
-    product_line = f"{(r['product_name'] or '').strip()} {(r['site_name'] or '').strip()}".strip()
-    name_lines = wrap_text(
-        c,
-        product_line,
-        "Helvetica-Bold",
-        6.7,
-        text_width_available,
-        max_lines=3,
+    parser.add_argument("--force", action="store_true", help="rewrite every sheet")
+    parser.add_argument(
+        "--delta", action="store_true",
+        help="also write qr_<site>_delta.pdf with only the labels that are new or changed since the last run",
     )
+    return parser.parse_args()
 
-    name_y = qr_y - 2.4 * mm
-    c.setFont("Helvetica-Bold", 6.7)
-    for i, line in enumerate(name_lines):
-        c.drawString(text_left, name_y - i * 3.15 * mm, line)
-
-    after_name_y = name_y - max(1, len(name_lines)) * 3.15 * mm - 0.6 * mm
-
-    nc_text = ellipsize(c, r["nc_nummer"] or "-", "Helvetica", 6.0, text_width_available)
-    c.setFont("Helvetica", 6.0)
-    c.drawString(text_left, after_name_y, nc_text)
-
-    shelf = r["shelf"]
-    row = r["row"]
-    if shelf is None or row is None:
-        loc_text = "Regal - / Fach -"
-    else:
-        loc_text = f"Regal {shelf} / Fach {row}"
-
-    loc_text = ellipsize(c, loc_text, "Helvetica-Bold", 6.2, text_width_available)
-    c.setFont("Helvetica-Bold", 6.2)
-    c.drawString(text_left, after_name_y - 3.7 * mm, loc_text)
 
+def get_conn(db_path: Path = DB_PATH):
+    con = sqlite3.connect(db_path)
+    con.row_factory = sqlite3.Row
+    return con
 
-def draw_grid_lines(c, page_w, page_h, cols_n, rows_per_page, margin_x, margin_y, gap_x, gap_y, label_w, label_h):
-    c.setLineWidth(0.25)
-
-    # vertical separator lines between columns
-    for col in range(cols_n - 1):
-        x_line = margin_x + (col + 1) * label_w + col * gap_x + gap_x / 2
-        c.line(x_line, margin_y, x_line, page_h - margin_y)
-
-    # horizontal separator lines between rows
-    for row in range(rows_per_page - 1):
-        y_top_current = page_h - margin_y - row * (label_h + gap_y) - label_h
-        y_line = y_top_current - gap_y / 2
-        c.line(margin_x, y_line, page_w - margin_x, y_line)
-
-
-def generate_for_site(rows: list[sqlite3.Row], out_pdf: Path):
-    out_pdf.parent.mkdir(parents=True, exist_ok=True)
-
-    c = canvas.Canvas(str(out_pdf), pagesize=A4)
-    W, H = A4
 
-    cols_n = 4
-    rows_per_page = 6
+def load_manifest(path: Path) -> dict:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
 
-    margin_x = 2.5 * mm
-    margin_y = 3.5 * mm
 
-    gap_x = 2.0 * mm
-    gap_y = 4.6 * mm
+def save_manifest(path: Path, manifest: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
 
-    label_w = (W - 2 * margin_x - (cols_n - 1) * gap_x) / cols_n
-    label_h = (H - 2 * margin_y - (rows_per_page - 1) * gap_y) / rows_per_page
 
-    labels_per_page = cols_n * rows_per_page
+def render_site(db_path: Path, site_id: int, out_pdf: Path, product_ids: list[int] | None = None) -> int:
+    # Runs in a worker process: rows are read there rather than pickled
+    # across, and the QR disk cache is shared through its directory.
+    set_qr_cache_dir(QR_CACHE_DIR)
 
-    for i, r in enumerate(rows):
-        idx = i % labels_per_page
-        row_i = idx // cols_n
-        col_i = idx % cols_n
+    con = get_conn(db_path)
+    try:
+        rows = fetch_label_rows(con, site_id)
+    finally:
+        con.close()
 
-        if idx == 0:
-            draw_grid_lines(
-                c, W, H, cols_n, rows_per_page,
-                margin_x, margin_y, gap_x, gap_y, label_w, label_h
-            )
+    if product_ids is not None:
+        wanted = set(product_ids)
+        rows = [r for r in rows if r["product_id"] in wanted]
 
-        x = margin_x + col_i * (label_w + gap_x)
-        y = H - margin_y - (row_i + 1) * label_h - row_i * gap_y
+    generate_for_site(rows, out_pdf)
+    return len(rows)
 
-        draw_label(c, x, y, label_w, label_h, r)
 
-        if (i + 1) % labels_per_page == 0 and (i + 1) != len(rows):
-            c.showPage()
+def main():
+    args = parse_args()
+    set_qr_cache_dir(QR_CACHE_DIR)
 
-    c.save()
-    print(f"Wrote: {out_pdf}")
+    if not args.db.exists():
+        raise SystemExit(f"DB not found: {args.db}")
 
+    con = get_conn(args.db)
+    try:
+        grouped = group_by_site(fetch_label_rows(con))
+    finally:
+        con.close()
 
-def main():
-    rows = fetch_label_rows()
-    if not rows:
+    if not grouped:
         raise SystemExit("No active sites/products found.")
 
-    grouped: dict[tuple[int, str], list[sqlite3.Row]] = {}
-    for r in rows:
-        key = (int(r["site_id"]), r["site_name"])
-        grouped.setdefault(key, []).append(r)
-
-    for (site_id, site_name), site_rows in grouped.items():
-        filename = f"qr_{site_id}_{slugify(site_name)}.pdf"
-        out_pdf = OUTPUT_DIR / filename
-        generate_for_site(site_rows, out_pdf)
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = args.out_dir / MANIFEST_NAME
+    previous = load_manifest(manifest_path)
+    # Entries of sites that are not rewritten yet stay until they are, so an
+    # interrupted run still compares against the last complete sheets.
+    manifest = {str(site_id): previous[str(site_id)] for site_id, _ in grouped if str(site_id) in previous}
+
+    # (site id, output file, product ids or None for the full sheet, labels)
+    tasks: list[tuple[int, Path, list[int] | None, int]] = []
+    pending: dict[Path, tuple[str, dict]] = {}
+    unchanged = 0
+
+    for (site_id, site_name), rows in grouped.items():
+        labels = {r["product_id"]: label_fingerprint(r) for r in rows}
+        entry = {
+            "file": site_sheet_filename(site_id, site_name),
+            "hash": sheet_fingerprint(labels),
+            "labels": {str(product_id): fp for product_id, fp in labels.items()},
+        }
+        out_pdf = args.out_dir / entry["file"]
+        delta_pdf = out_pdf.with_name(f"{out_pdf.stem}_delta.pdf")
+        prev = previous.get(str(site_id)) or {}
+
+        if args.delta:
+            # A delta sheet is only meaningful for this run's changes.
+            delta_pdf.unlink(missing_ok=True)
+
+        if not args.force and prev.get("hash") == entry["hash"] and out_pdf.exists():
+            unchanged += 1
+            continue
+
+        tasks.append((site_id, out_pdf, None, len(rows)))
+        pending[out_pdf] = (str(site_id), entry)
+
+        if args.delta:
+            prev_labels = prev.get("labels") or {}
+            changed = [product_id for product_id, fp in labels.items() if prev_labels.get(str(product_id)) != fp]
+            if changed:
+                tasks.append((site_id, delta_pdf, changed, len(changed)))
+
+    if unchanged:
+        print(f"Unchanged: {unchanged} of {len(grouped)} sites")
+    if not tasks:
+        save_manifest(manifest_path, manifest)
+        return
+
+    total = sum(t[3] for t in tasks)
+    done = 0
+    start = time.perf_counter()
+
+    def report(n: int, out_pdf: Path, labels: int) -> None:
+        nonlocal done
+        done += labels
+        print(
+            f"[{n}/{len(tasks)}] {done}/{total} labels, {time.perf_counter() - start:.1f}s"
+            f" - Wrote: {out_pdf}"
+        )
+
+        # Saved after every sheet so an interrupted run keeps its progress.
+        if out_pdf in pending:
+            site_key, entry = pending.pop(out_pdf)
+            manifest[site_key] = entry
+            save_manifest(manifest_path, manifest)
+
+    workers = min(args.jobs or os.cpu_count() or 1, len(tasks))
+
+    if workers == 1:
+        for n, (site_id, out_pdf, product_ids, _) in enumerate(tasks, start=1):
+            report(n, out_pdf, render_site(args.db, site_id, out_pdf, product_ids))
+        return
+
+    # Sites are independent, so each one is rendered by its own process and
+    # the run scales with the number of cores.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(render_site, args.db, site_id, out_pdf, product_ids): out_pdf
+            for site_id, out_pdf, product_ids, _ in tasks
+        }
+        for n, future in enumerate(as_completed(futures), start=1):
+            report(n, futures[future], future.result())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
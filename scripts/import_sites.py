@@ -1,56 +1,68 @@
 from __future__ import annotations
 
-import csv
+import argparse
 import sqlite3
+import sys
+from collections import Counter
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 DB_PATH = ROOT / "db" / "Lager_live.db"
 CSV_PATH = ROOT / "data" / "sites.csv"
 
+sys.path.insert(0, str(ROOT))
 
-def main() -> None:
-    if not CSV_PATH.exists():
-        raise SystemExit(f"sites.csv not found: {CSV_PATH}")
+from backend.logic.csv_import import DEFAULT_CHUNK_SIZE, CsvImporter, ImportRun, run_csv_import  # noqa: E402
+from backend.seed import ensure_schema  # noqa: E402
 
-    con = sqlite3.connect(str(DB_PATH))
-    con.row_factory = sqlite3.Row
 
-    inserted = 0
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import sites from a CSV with a name column.")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--csv", type=Path, default=CSV_PATH)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint of an interrupted import")
+    return parser.parse_args()
 
-    try:
-        con.execute("BEGIN")
 
-        with CSV_PATH.open("r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
+class SiteImporter(CsvImporter):
+    def chunk(self, run: ImportRun, rows: list[dict[str, str]]) -> Counter:
+        names = [(name,) for name in ((row.get("name") or "").strip() for row in rows) if name]
 
-            for row in reader:
-                name = (row.get("name") or "").strip()
-                if not name:
-                    continue
+        cur = run.con.executemany(
+            """
+            INSERT OR IGNORE INTO sites(name, active)
+            VALUES (?, 1)
+            """,
+            names,
+        )
+        return Counter(inserted=cur.rowcount)
 
-                cur = con.execute(
-                    """
-                    INSERT OR IGNORE INTO sites(name, active)
-                    VALUES (?, 1)
-                    """,
-                    (name,),
-                )
 
-                if cur.rowcount:
-                    inserted += 1
+def main() -> None:
+    args = parse_args()
 
-        con.commit()
+    if not args.csv.exists():
+        raise SystemExit(f"sites.csv not found: {args.csv}")
 
-    except Exception:
-        con.rollback()
-        raise
+    con = sqlite3.connect(str(args.db))
+    con.row_factory = sqlite3.Row
 
+    try:
+        ensure_schema(con)
+        counts = run_csv_import(
+            con,
+            "sites",
+            args.csv,
+            SiteImporter(),
+            chunk_size=args.chunk_size,
+            restart=args.restart,
+        )
     finally:
         con.close()
 
-    print(f"Inserted sites: {inserted}")
+    print(f"Inserted sites: {counts['inserted']}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
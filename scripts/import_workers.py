@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-import csv
+import argparse
 import sqlite3
+import sys
+from collections import Counter
 from pathlib import Path
 
 from passlib.context import CryptContext
@@ -23,6 +25,20 @@ FIRST_ADMINS = {
 
 pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+sys.path.insert(0, str(ROOT))
+
+from backend.logic.csv_import import DEFAULT_CHUNK_SIZE, CsvImporter, ImportRun, run_csv_import  # noqa: E402
+from backend.seed import ensure_schema  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sync workers with a CSV of first_name,last_name.")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--csv", type=Path, default=CSV_PATH)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint of an interrupted import")
+    return parser.parse_args()
+
 
 def norm(x: str | None) -> str:
     return " ".join((x or "").split()).strip()
@@ -68,60 +84,31 @@ def is_first_admin(first_name: str, last_name: str) -> bool:
     return False
 
 
-def main() -> None:
-    if not CSV_PATH.exists():
-        raise SystemExit(f"workers.csv not found: {CSV_PATH}")
-
-    if not DB_PATH.exists():
-        raise SystemExit(f"DB not found: {DB_PATH}")
-
-    con = sqlite3.connect(str(DB_PATH))
-    con.row_factory = sqlite3.Row
-    con.execute("PRAGMA foreign_keys = ON;")
-
-    inserted = 0
-    reactivated = 0
-    unchanged = 0
-    deactivated = 0
-    admins_set = 0
-
-    try:
-        con.execute("BEGIN")
-
-        with CSV_PATH.open("r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
-
-            expected = ["first_name", "last_name"]
-
-            if reader.fieldnames != expected:
-                raise SystemExit(
-                    "workers.csv must have header: first_name,last_name"
-                )
-
-            csv_workers: list[tuple[str, str]] = []
-
-            for row in reader:
-                first = norm(row["first_name"])
-                last = norm(row["last_name"])
+class WorkerImporter(CsvImporter):
+    def start(self, run: ImportRun, fieldnames: list[str]) -> None:
+        expected = ["first_name", "last_name"]
 
-                if not first or not last:
-                    continue
-
-                csv_workers.append((first, last))
+        if fieldnames != expected:
+            raise SystemExit(
+                "workers.csv must have header: first_name,last_name"
+            )
 
-        seen = set()
-        unique_csv_workers: list[tuple[str, str]] = []
+    def chunk(self, run: ImportRun, rows: list[dict[str, str]]) -> Counter:
+        con = run.con
+        counts = Counter()
 
-        for first, last in csv_workers:
-            key = (first.casefold(), last.casefold())
+        for row in rows:
+            first = norm(row.get("first_name"))
+            last = norm(row.get("last_name"))
 
-            if key in seen:
+            if not first or not last:
                 continue
 
-            seen.add(key)
-            unique_csv_workers.append((first, last))
+            # Later rows with the same name in another case are duplicates.
+            # The kept spelling is what finish() compares against.
+            if not run.mark(f"{first.casefold()}\x1f{last.casefold()}", f"{first}\x1f{last}"):
+                continue
 
-        for first, last in unique_csv_workers:
             existing = con.execute(
                 """
                 SELECT
@@ -169,12 +156,12 @@ def main() -> None:
                 )
 
                 if is_admin == 1 and int(existing["is_admin"]) != 1:
-                    admins_set += 1
+                    counts["admins_set"] += 1
 
                 if int(existing["is_active"]) != 1:
-                    reactivated += 1
+                    counts["reactivated"] += 1
                 else:
-                    unchanged += 1
+                    counts["unchanged"] += 1
 
             else:
                 base_username = username_from_worker(first, last)
@@ -204,60 +191,62 @@ def main() -> None:
                 )
 
                 if is_admin == 1:
-                    admins_set += 1
+                    counts["admins_set"] += 1
 
-                inserted += 1
+                counts["inserted"] += 1
 
-        csv_name_set = {
-            (first, last)
-            for first, last in unique_csv_workers
-        }
+        return counts
 
-        db_workers = con.execute(
-            """
-            SELECT
-                id,
-                first_name,
-                last_name,
-                is_active
-            FROM workers
+    def finish(self, run: ImportRun) -> Counter:
+        cur = run.con.execute(
             """
-        ).fetchall()
+            UPDATE workers
+            SET is_active = 0
+            WHERE is_active != 0
+              AND first_name || char(31) || last_name NOT IN (
+                SELECT value
+                FROM import_keys
+                WHERE source = ?
+              )
+            """,
+            (run.source,),
+        )
+        return Counter(deactivated=cur.rowcount)
 
-        for row in db_workers:
-            key = (
-                row["first_name"],
-                row["last_name"],
-            )
 
-            if key not in csv_name_set and int(row["is_active"]) != 0:
-                con.execute(
-                    """
-                    UPDATE workers
-                    SET is_active = 0
-                    WHERE id = ?
-                    """,
-                    (row["id"],),
-                )
+def main() -> None:
+    args = parse_args()
 
-                deactivated += 1
+    if not args.csv.exists():
+        raise SystemExit(f"workers.csv not found: {args.csv}")
 
-        con.commit()
+    if not args.db.exists():
+        raise SystemExit(f"DB not found: {args.db}")
 
-    except Exception:
-        con.rollback()
-        raise
+    con = sqlite3.connect(str(args.db))
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA foreign_keys = ON;")
 
+    try:
+        ensure_schema(con)
+        counts = run_csv_import(
+            con,
+            "workers",
+            args.csv,
+            WorkerImporter(),
+            chunk_size=args.chunk_size,
+            restart=args.restart,
+        )
     finally:
         con.close()
 
-    print(f"Inserted new workers: {inserted}")
-    print(f"Reactivated workers: {reactivated}")
-    print(f"Unchanged active workers: {unchanged}")
-    print(f"Deactivated missing workers: {deactivated}")
-    print(f"Admins assigned: {admins_set}")
+    print(f"Inserted new workers: {counts['inserted']}")
+    print(f"Reactivated workers: {counts['reactivated']}")
+    print(f"Unchanged active workers: {counts['unchanged']}")
+    print(f"Deactivated missing workers: {counts['deactivated']}")
+    print(f"Admins assigned: {counts['admins_set']}")
     print(f"Default password for admins only: {DEFAULT_PASSWORD}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
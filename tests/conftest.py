@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+sys.path.insert(0, str(ROOT))
+
+from backend.db import DbConfig, get_conn  # noqa: E402
+from backend.seed import ensure_schema  # noqa: E402
+
+
+@pytest.fixture
+def new_con(tmp_path):
+    # Opens a fresh database with the full schema; several per test are fine.
+    cons = []
+
+    def new_con(name: str = "lager.db"):
+        con = get_conn(DbConfig(db_path=tmp_path / name))
+        ensure_schema(con)
+        cons.append(con)
+        return con
+
+    yield new_con
+
+    for con in cons:
+        con.close()
+
+
+@pytest.fixture
+def con(new_con):
+    return new_con()
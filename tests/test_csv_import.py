@@ -0,0 +1,199 @@
+import codecs
+import csv
+import io
+
+import pytest
+
+from backend.logic.csv_import import _Lines, file_signature, load_checkpoint, run_csv_import
+from backend.logic.product_import import ProductImporter
+from scripts.import_workers import WorkerImporter
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after(importer, chunks: int):
+    # The chunk after `chunks` committed ones writes its rows and then fails,
+    # so its transaction is rolled back halfway.
+    chunk = importer.chunk
+    calls = 0
+
+    def failing(run, rows):
+        nonlocal calls
+        calls += 1
+        counts = chunk(run, rows)
+        if calls > chunks:
+            raise Interrupted
+        return counts
+
+    importer.chunk = failing
+    return importer
+
+
+def write_csv(path, rows, bom=False):
+    buf = io.StringIO(newline="")
+    csv.writer(buf, lineterminator="\r\n").writerows(rows)
+    path.write_bytes((codecs.BOM_UTF8 if bom else b"") + buf.getvalue().encode("utf-8"))
+    return path
+
+
+def product_rows():
+    rows = [["Materialkurztext", "NC-Nummer", "Marke", "Kategorie"]]
+    for i in range(23):
+        name = f"Kabel {i}"
+        if i == 6:
+            # A quoted field with a line break at the end of the second chunk.
+            name = "Kabel 6\nschwarz, 2m"
+        if i == 9:
+            name = "Stecker äöü €"
+        rows.append([name, f"NC-{i % 20}", "Netcom" if i % 3 else "Phoenix", "Kabel"])
+    return rows
+
+
+def catalog(con):
+    return con.execute(
+        """
+        SELECT p.id, p.product_name, p.nc_nummer, b.name, c.name, p.active
+        FROM products p
+        JOIN brands b ON b.id = p.brand_id
+        JOIN categories c ON c.id = p.category_id
+        ORDER BY p.id
+        """
+    ).fetchall()
+
+
+def run(con, path, importer, **kwargs):
+    return run_csv_import(con, "products", path, importer, chunk_size=kwargs.pop("chunk_size", 4), progress=None, **kwargs)
+
+
+def test_lines_track_the_offset_of_every_record():
+    data = 'a,b\r\n"x\r\ny",1\r\nz,2\r\n'.encode("utf-8")
+    lines = _Lines(io.BytesIO(data))
+    records = csv.reader(lines)
+
+    offsets = []
+    for _ in records:
+        offsets.append(lines.offset)
+
+    assert offsets == [5, 15, 20]
+
+    lines.seek(5)
+    assert next(csv.reader(lines)) == ["x\r\ny", "1"]
+
+
+@pytest.mark.parametrize("chunks", [0, 1, 2, 5])
+def test_resumed_import_matches_a_clean_run(new_con, tmp_path, chunks):
+    path = write_csv(tmp_path / "products.csv", product_rows(), bom=True)
+
+    clean = new_con("clean.db")
+    expected = run(clean, path, ProductImporter())
+
+    con = new_con("resumed.db")
+    with pytest.raises(Interrupted):
+        run(con, path, interrupt_after(ProductImporter(), chunks))
+
+    checkpoint = load_checkpoint(con, "products", file_signature(path))
+    if chunks:
+        assert checkpoint.rows == 4 * chunks
+        assert len(catalog(con)) == checkpoint.counts["inserted"]
+    else:
+        assert checkpoint is None
+        assert catalog(con) == []
+
+    counts = run(con, path, ProductImporter())
+
+    assert counts == expected
+    assert catalog(con) == catalog(clean)
+    assert con.execute("SELECT count(*) FROM import_checkpoints").fetchone()[0] == 0
+    assert con.execute("SELECT count(*) FROM import_keys").fetchone()[0] == 0
+
+
+def test_bom_and_quoted_newline_are_read(con, tmp_path):
+    path = write_csv(tmp_path / "products.csv", product_rows(), bom=True)
+
+    counts = run(con, path, ProductImporter())
+    names = [r[1] for r in catalog(con)]
+
+    assert counts["inserted"] == 20
+    assert counts["skipped"] == 3
+    assert "Kabel 6 schwarz, 2m" in names
+    assert "Stecker äöü €" in names
+    assert {r[3] for r in catalog(con)} == {"Netcom", "Phoenix"}
+
+
+def test_changed_file_starts_over(con, tmp_path):
+    path = write_csv(tmp_path / "products.csv", product_rows())
+    with pytest.raises(Interrupted):
+        run(con, path, interrupt_after(ProductImporter(), 2))
+
+    rows = product_rows()
+    rows[1][0] = "Kabel 0 neu"
+    write_csv(path, rows + [["Kabel 99", "NC-99", "Netcom", "Kabel"]])
+
+    counts = run(con, path, ProductImporter())
+
+    # The first two chunks are in the database already and count as skipped.
+    assert counts["inserted"] == 21 - 8
+    assert counts["skipped"] == 3 + 8
+
+
+def add_workers(con, names):
+    con.executemany(
+        "INSERT INTO workers(first_name, last_name, username) VALUES (?, ?, ?)",
+        [(first, last, f"{first}.{last}".lower()) for first, last in names],
+    )
+    con.commit()
+
+
+def workers(con):
+    return dict(
+        ((r["first_name"], r["last_name"]), r["is_active"])
+        for r in con.execute("SELECT first_name, last_name, is_active FROM workers")
+    )
+
+
+def test_missing_workers_are_deactivated_after_a_resumed_import(new_con, tmp_path):
+    rows = [["first_name", "last_name"]] + [[f"Anna{i}", "Berg"] for i in range(10)]
+    rows.insert(4, ["ANNA1", "berg"])
+    path = write_csv(tmp_path / "workers.csv", rows)
+    existing = [("Anna1", "Berg"), ("Anna3", "Berg"), ("Old", "Worker"), ("Gone", "Too")]
+
+    clean = new_con("clean.db")
+    add_workers(clean, existing)
+    expected = run_csv_import(clean, "workers", path, WorkerImporter(), chunk_size=3, progress=None)
+
+    con = new_con("resumed.db")
+    add_workers(con, existing)
+    with pytest.raises(Interrupted):
+        run_csv_import(con, "workers", path, interrupt_after(WorkerImporter(), 2), chunk_size=3, progress=None)
+
+    # The names seen before the interruption are kept with the checkpoint,
+    # so the resumed run does not deactivate them.
+    assert con.execute("SELECT count(*) FROM import_keys WHERE source = 'workers'").fetchone()[0] == 5
+
+    counts = run_csv_import(con, "workers", path, WorkerImporter(), chunk_size=3, progress=None)
+
+    assert counts == expected
+    assert counts["deactivated"] == 2
+    assert counts["inserted"] == 8
+    assert workers(con) == workers(clean)
+    assert workers(con)[("Old", "Worker")] == 0
+    assert workers(con)[("Anna1", "Berg")] == 1
+    assert ("ANNA1", "berg") not in workers(con)
+
+
+def test_errors_name_the_file_row_after_a_resume(con, tmp_path):
+    path = tmp_path / "products.csv"
+    path.write_bytes(
+        b"product_name,nc_nummer\n"
+        + b"".join(f"Kabel {i},NC-{i}\n".encode() for i in range(4))
+        + b"\n\"Kabel\nlang\",NC-8\n,NC-9\n"
+    )
+    with pytest.raises(Interrupted):
+        run(con, path, interrupt_after(ProductImporter(), 1))
+
+    importer = ProductImporter()
+    run(con, path, importer)
+
+    assert importer.errors == [{"row": 9, "error": "Product name is required"}]
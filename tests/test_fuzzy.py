@@ -0,0 +1,37 @@
+import contextlib
+import threading
+import time
+
+from backend.logic import fuzzy
+from backend.logic.fuzzy import TrigramIndex
+
+
+def product(id, name, active=1):
+    return {"id": id, "product_name": name, "nc_nummer": None, "active": active}
+
+
+def test_typos_are_found():
+    index = TrigramIndex()
+    index.load([product(1, "Kabelbinder 200mm"), product(2, "Kabelkanal"), product(3, "Dübel", active=0)])
+
+    assert index.search("Kabelbiner")[0][0] == 1
+    assert index.search("Dubel") == []
+
+
+def test_upsert_during_first_load_is_kept(monkeypatch):
+    index = TrigramIndex()
+    saver = threading.Thread(target=index.upsert, args=(product(2, "Kabelbinder schwarz"),))
+
+    def list_products(con):
+        # A product is saved while the catalog is being read.
+        saver.start()
+        time.sleep(0.1)
+        return [product(1, "Kabelkanal")]
+
+    monkeypatch.setattr(fuzzy, "db_session", contextlib.nullcontext)
+    monkeypatch.setattr(fuzzy, "list_products", list_products)
+
+    index.ensure_loaded()
+    saver.join()
+
+    assert index.search("Kabelbinder")[0][0] == 2
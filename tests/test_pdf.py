@@ -0,0 +1,54 @@
+import io
+
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import A4
+
+from backend.logic.labels import SELECTION_PER_PAGE, selection_pages
+from backend.logic.pdf import StreamingPdf, iter_pdf
+
+
+def read_pdf(chunks) -> PdfReader:
+    return PdfReader(io.BytesIO(b"".join(chunks)), strict=True)
+
+
+def test_selection_labels_are_paginated():
+    site = {"id": 1, "name": "Konstanz"}
+    rows = [{"id": i, "product_name": f"Kabel {i}", "nc_nummer": None} for i in range(SELECTION_PER_PAGE * 2 + 1)]
+
+    pdf = StreamingPdf(A4)
+    reader = read_pdf(iter_pdf(pdf, selection_pages(pdf, site, rows)))
+
+    assert len(reader.pages) == 3
+    assert "Kabel 0" in reader.pages[0].extract_text()
+    assert f"Kabel {len(rows) - 1}" in reader.pages[2].extract_text()
+
+
+def test_text_outside_cp1252_is_not_replaced():
+    pdf = StreamingPdf(A4)
+    c = pdf.canvas()
+    c.setFont("Helvetica", 10)
+    c.drawString(50, 700, "Widerstand \u2265 10 (5 \u20ac) \\ \u00c4rger")
+
+    text = read_pdf(iter_pdf(pdf, iter([c]))).pages[0].extract_text()
+
+    assert "?" not in text
+    for part in ["Widerstand", "\u2265 10", "5 \u20ac", "\u00c4rger"]:
+        assert part in text
+
+
+def test_chunks_are_one_document():
+    pdf = StreamingPdf(A4)
+    pages = []
+    for n in range(4):
+        c = pdf.canvas()
+        c.setFont("Helvetica-Bold", 12)
+        c.drawCentredString(A4[0] / 2, 400, f"Seite {n + 1}")
+        c.rect(10, 10, 50, 50)
+        pages.append(c)
+
+    chunks = list(iter_pdf(pdf, iter(pages)))
+    reader = read_pdf(chunks)
+
+    # begin, one chunk per page, end
+    assert len(chunks) == 6
+    assert [p.extract_text().strip() for p in reader.pages] == ["Seite 1", "Seite 2", "Seite 3", "Seite 4"]
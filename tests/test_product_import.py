@@ -0,0 +1,112 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from backend.logic.csv_import import ImportFileError, read_csv_upload, read_xlsx_upload, run_import
+from backend.logic.product_import import ProductImporter
+
+
+def upload(con, data: bytes, xlsx=False, **kwargs):
+    importer = ProductImporter(upsert=True, **kwargs)
+    fieldnames, rows = (read_xlsx_upload if xlsx else read_csv_upload)(io.BytesIO(data))
+    counts = run_import(con, "upload:test", importer, fieldnames, rows, chunk_size=2)
+    return importer, counts
+
+
+def xlsx(rows) -> bytes:
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    f = io.BytesIO()
+    wb.save(f)
+    return f.getvalue()
+
+
+def products(con):
+    rows = con.execute(
+        """
+        SELECT p.product_name, p.nc_nummer, b.name, p.active
+        FROM products p
+        JOIN brands b ON b.id = p.brand_id
+        ORDER BY p.id
+        """
+    )
+    return [tuple(r) for r in rows]
+
+
+def test_csv_errors_name_the_row_in_the_file(con):
+    data = (
+        "product_name;nc_nummer;brand\n"
+        "Kabel;NC-1;Netcom\n"
+        "\n"
+        ";NC-2;Netcom\n"
+        '"Kabel\nschwarz";NC-3;Netcom\n'
+        "Stecker;NC-4;Unbekannt\n"
+    ).encode("utf-8-sig")
+    con.execute("INSERT INTO brands(name) VALUES ('Netcom')")
+    con.execute("INSERT INTO categories(name) VALUES ('Other')")
+    con.commit()
+
+    importer, counts = upload(con, data, create_missing=False)
+
+    assert importer.errors == [
+        {"row": 4, "error": "Product name is required"},
+        {"row": 7, "error": "Unknown brand: Unbekannt"},
+    ]
+    assert importer.row == 4
+    assert counts["inserted"] == 2
+    assert counts["invalid"] == 2
+
+
+def test_xlsx_errors_name_the_row_in_the_sheet(con):
+    data = xlsx([
+        ["product_name", "nc_nummer", "active"],
+        ["Kabel", "NC-1", 1],
+        [None, None, None],
+        ["Stecker", "NC-2", "vielleicht"],
+    ])
+
+    importer, counts = upload(con, data, xlsx=True)
+
+    assert importer.errors == [{"row": 4, "error": "Invalid active value: vielleicht"}]
+    assert counts["inserted"] == 1
+
+
+def test_upsert_counts(con):
+    first = (
+        "product_name,nc_nummer,brand,category\n"
+        "Kabel,NC-1,Netcom,Kabel\n"
+        "Stecker,NC-2,Netcom,Kabel\n"
+        "Ohne Nummer,,Netcom,Kabel\n"
+    ).encode()
+    _, counts = upload(con, first)
+    assert (counts["inserted"], counts["updated"], counts["unchanged"]) == (3, 0, 0)
+
+    second = (
+        "product_name,nc_nummer,brand,category,active\n"
+        "Dose,NC-3,Netcom,Kabel,1\n"
+        "Dose rot,NC-3,Netcom,Kabel,1\n"
+        "Kabel,NC-1,Netcom,Kabel,1\n"
+        "Stecker 2m,NC-2,Netcom,Kabel,1\n"
+        "Ohne Nummer,,Phoenix,Kabel,0\n"
+    ).encode()
+    importer, counts = upload(con, second)
+
+    assert (counts["inserted"], counts["updated"], counts["unchanged"], counts["skipped"]) == (1, 2, 1, 1)
+    assert importer.brands.created == ["Phoenix"]
+    assert products(con) == [
+        ("Kabel", "NC-1", "Netcom", 1),
+        ("Stecker 2m", "NC-2", "Netcom", 1),
+        ("Ohne Nummer", None, "Phoenix", 0),
+        ("Dose rot", "NC-3", "Netcom", 1),
+    ]
+
+
+def test_undecodable_csv_changes_nothing(con):
+    data = b"product_name\n" + b"".join(f"Kabel {i}\n".encode() for i in range(10)) + b"Stecker \xe4\n"
+
+    with pytest.raises(ImportFileError, match="line 12"):
+        upload(con, data)
+
+    assert products(con) == []
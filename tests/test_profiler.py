@@ -0,0 +1,52 @@
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend import profiler
+from backend.profiler import ProfileMiddleware, ProfiledRoute, get_profile
+
+
+def busy_chunk(n: int) -> bytes:
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        sum(range(1000))
+    return f"chunk {n}\n".encode()
+
+
+def chunks():
+    for n in range(4):
+        yield busy_chunk(n)
+
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("/stream")
+def stream():
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+app = FastAPI()
+app.include_router(router)
+app.add_middleware(ProfileMiddleware)
+
+
+def test_streamed_body_is_profiled(monkeypatch):
+    monkeypatch.setattr(profiler, "_is_admin", lambda authorization: True)
+
+    with TestClient(app) as c:
+        r = c.get("/stream", headers={"X-Profile": "1"})
+
+    assert r.text == "".join(f"chunk {n}\n" for n in range(4))
+    collapsed = get_profile(r.headers["x-profile-id"]).collapsed
+    assert "tests/test_profiler.py:chunks;tests/test_profiler.py:busy_chunk" in collapsed
+
+
+def test_unprofiled_stream_is_unchanged():
+    with TestClient(app) as c:
+        r = c.get("/stream")
+
+    assert "x-profile-id" not in r.headers
+    assert r.text.count("chunk") == 4
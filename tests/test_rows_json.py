@@ -0,0 +1,56 @@
+import json
+
+from backend.db import rows_json
+from backend.repo.logs import logs_json
+from backend.repo.paging import PageRequest, output_order
+from backend.repo.products import products_page_sql
+
+
+def add_products(con, names):
+    con.execute("INSERT INTO brands(name) VALUES ('Netcom')")
+    con.execute("INSERT INTO categories(name) VALUES ('Other')")
+    con.executemany(
+        "INSERT INTO products(category_id, brand_id, product_name, nc_nummer) VALUES (1, 1, ?, ?)",
+        [(name, nc) for name, nc in names],
+    )
+
+
+def test_rows_keep_the_requested_order(con):
+    add_products(con, [(f"Kabel {i:03}", None) for i in range(300)])
+
+    sql = "SELECT id, product_name FROM products ORDER BY product_name DESC LIMIT 250"
+    rows = json.loads(rows_json(con, sql, (), "q.product_name DESC"))
+
+    assert [r["product_name"] for r in rows] == [f"Kabel {i:03}" for i in range(299, 49, -1)]
+
+
+def test_empty_result_is_an_empty_array(con):
+    assert json.loads(rows_json(con, "SELECT id FROM products ORDER BY id", (), "q.id")) == []
+
+
+def test_page_order_is_kept_with_defaults(con):
+    add_products(con, [("B", None), ("A", "2"), ("C", ""), ("D", "1"), ("E", None)])
+
+    page = PageRequest(sort="nc_nummer", desc=True)
+    sql, params, keys = products_page_sql(page)
+    rows = json.loads(rows_json(con, sql, params, output_order(keys, page.desc)))
+
+    assert [r["product_name"] for r in rows] == [dict(r)["product_name"] for r in con.execute(sql, params)]
+    assert [r["product_name"] for r in rows] == ["A", "D", "E", "C", "B"]
+
+
+def test_logs_are_newest_first(con):
+    add_products(con, [("Kabel", None)])
+    con.execute("INSERT INTO sites(name) VALUES ('Konstanz')")
+    con.execute("INSERT INTO locations(site_id, shelf, row) VALUES (1, 1, 1)")
+    con.execute(
+        "INSERT INTO workers(username, first_name, last_name, password_hash) VALUES ('w', 'W', 'W', 'x')"
+    )
+    con.executemany(
+        "INSERT INTO logs(action, quantity, location_id, worker_id, product_id, timestamp) VALUES ('add', ?, 1, 1, 1, '2026-01-01 08:00:00')",
+        [(n,) for n in range(20)],
+    )
+
+    rows = json.loads(logs_json(con, limit=10, offset=5))
+
+    assert [r["quantity"] for r in rows] == list(range(14, 4, -1))